@@ -0,0 +1,151 @@
+import time
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import COMPRESS_BROTLI_QUALITY, COMPRESS_GZIP_LEVEL, COMPRESS_MIN_BYTES
+from app.core.metrics import HTTP_REQUESTS, HTTP_SECONDS, RESPONSE_BYTES, profiled
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Content types worth compressing; anything else (Parquet, images, already-encoded bodies) is sent as it is
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/msgpack", "application/javascript", "image/svg+xml")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no per-request task or body buffering): latency histogram and request counter per
+    route template, e.g. /api/jobs/{job_id}, so ids do not multiply the series. Paths that match no route
+    are grouped as "unmatched". Latency is measured until the response body is complete.
+    Also drives the opt-in slow-request profiler.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            with profiled(f"{scope['method']} {scope['path']}"):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            labels = {"method": scope["method"], "route": route, "status": str(status[0])}
+            HTTP_SECONDS.observe(time.perf_counter() - start, **labels)
+            HTTP_REQUESTS.inc(**labels)
+
+
+def accepted_encodings(header: str) -> set:
+    """Codings of an Accept-Encoding header, minus those refused with q=0."""
+    accepted = set()
+    for item in header.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def compress(self, data, final):
+        return self._z.compress(data) + self._z.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data, final):
+        return self._c.process(data) + (self._c.finish() if final else self._c.flush())
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI response compression: brotli when the client accepts it and the `brotli` package is installed, else
+    gzip. A body sent in one piece is compressed when it has at least `minimum_size` bytes; streamed bodies (NDJSON,
+    files) are compressed chunk by chunk and flushed, so they keep streaming. Responses that are already encoded or
+    whose type does not compress (see COMPRESSIBLE_TYPES) pass through.
+    Body sizes before and after are exported as modelguard_response_bytes.
+    """
+    def __init__(self, app, minimum_size=COMPRESS_MIN_BYTES, gzip_level=COMPRESS_GZIP_LEVEL, brotli_quality=COMPRESS_BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        coding = self._choose(scope)
+        start = None
+        compressor = None
+        sizes = [0, 0]  # identity, sent
+
+        async def send_wrapper(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message  # Held until the first body chunk tells whether the body is worth compressing
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            body, more = message.get("body", b""), message.get("more_body", False)
+            sizes[0] += len(body)
+            if start is not None:
+                headers = MutableHeaders(scope=start)
+                compressible = coding and "content-encoding" not in headers and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                if compressible:
+                    headers.add_vary_header("Accept-Encoding")
+                    if more or len(body) >= self.minimum_size:
+                        compressor = _Brotli(self.brotli_quality) if coding == "br" else _Gzip(self.gzip_level)
+                        body = compressor.compress(body, final=not more)
+                        headers["Content-Encoding"] = coding
+                        if more:
+                            del headers["content-length"]  # Streamed: length unknown until the end
+                        else:
+                            headers["Content-Length"] = str(len(body))
+                await send(start)
+                start = None
+            elif compressor is not None:
+                body = compressor.compress(body, final=not more)
+
+            sizes[1] += len(body)
+            await send({**message, "body": body} if compressor is not None else message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            RESPONSE_BYTES.observe(sizes[0], route=route, encoding="identity")
+            if compressor is not None:
+                RESPONSE_BYTES.observe(sizes[1], route=route, encoding=coding)
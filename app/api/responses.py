@@ -0,0 +1,121 @@
+import contextvars
+import functools
+import inspect
+import json
+import sys
+import time
+
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+
+from app.core.metrics import SERIALIZE_SECONDS
+
+try:
+    import orjson
+except ImportError:  # Slower stdlib fallback
+    orjson = None
+try:
+    import msgpack
+except ImportError:  # Binary responses are then not offered
+    msgpack = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+_REQUEST = contextvars.ContextVar("encoded_request", default=("", "unmatched"))  # (Accept header, route path)
+
+
+def _default(obj):
+    """Types the encoders do not handle natively. NumPy arrays of plain dtypes never get here with orjson."""
+    np, pd = sys.modules.get("numpy"), sys.modules.get("pandas")
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()  # Object / float16 / datetime arrays, and every array for msgpack
+        if isinstance(obj, np.generic):
+            return obj.item()
+    if pd is not None:
+        if obj is pd.NaT or obj is pd.NA:
+            return None
+        if isinstance(obj, pd.Timestamp):
+            return obj.isoformat()
+        if isinstance(obj, (pd.Series, pd.Index)):
+            if obj.dtype.kind in "mM":  # NaT has no native encoding: go through Timestamps / None
+                obj = pd.Series(obj).astype(object).where(pd.Series(obj).notna(), None)
+            return obj.to_numpy()
+        if isinstance(obj, pd.DataFrame):
+            return {str(c): obj[c] for c in obj.columns}  # Column-oriented: one array per column
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    from fastapi.encoders import jsonable_encoder
+    return jsonable_encoder(obj)  # Pydantic models, Decimal, paths... as FastAPI would encode them
+
+
+def encode_json(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def encode_msgpack(obj) -> bytes:
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def negotiate(accept: str) -> str:
+    """"msgpack" when the client asks for it and msgpack is installed, else "json"."""
+    if msgpack is not None and any(t in accept for t in MSGPACK_TYPES):
+        return "msgpack"
+    return "json"
+
+
+def encoded_response(content, status_code=200, accept=None, route=None) -> Response:
+    """`content` encoded for the request being handled by an EncodedRoute (or as given by `accept` / `route`)."""
+    current_accept, current_route = _REQUEST.get()
+    accept, route = current_accept if accept is None else accept, route or current_route
+    fmt = negotiate(accept)
+    start = time.perf_counter()
+    if fmt == "msgpack":
+        body, media_type = encode_msgpack(content), "application/msgpack"
+    else:
+        body, media_type = encode_json(content), "application/json"
+    SERIALIZE_SECONDS.observe(time.perf_counter() - start, route=route, format=fmt)
+    return Response(body, status_code=status_code, media_type=media_type, headers={"Vary": "Accept"})
+
+
+class EncodedRoute(APIRoute):
+    """
+    Route whose plain return values (dicts, lists) skip FastAPI's jsonable_encoder pass: they are encoded straight
+    to bytes by encoded_response, in the format the request's Accept header negotiates. Responses returned by the
+    endpoint are sent unchanged. Sync endpoints encode on the threadpool, like the rest of their work.
+    """
+    def __init__(self, path, endpoint, **kwargs):
+        # include_router() re-creates routes from their (already wrapped) endpoints: wrap the original once more
+        endpoint = getattr(endpoint, "_unencoded", endpoint)
+        super().__init__(path, self._encoding(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request):
+            token = _REQUEST.set((request.headers.get("accept", ""), self.path))  # Copied into the threadpool with the context
+            try:
+                return await handler(request)
+            finally:
+                _REQUEST.reset(token)
+        return route_handler
+
+    def _encoding(self, endpoint):
+        def encode(result):
+            if isinstance(result, Response):
+                return result
+            return encoded_response(result, self.status_code or 200)
+
+        # functools.wraps keeps the signature FastAPI reads parameters from
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                return encode(await endpoint(*args, **kwargs))
+        else:
+            @functools.wraps(endpoint)
+            def wrapper(*args, **kwargs):
+                return encode(endpoint(*args, **kwargs))
+        wrapper._unencoded = endpoint
+        return wrapper
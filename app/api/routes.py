@@ -1,53 +1,249 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import pandas as pd
-import io
+from typing import Optional
+import json
+import re
+import sqlite3
+import time
 import traceback
 
-from app.core.drift_engine import DriftAnalyzer
-from app.core.database import DatabaseEngine
-from app.core.schemas import validate_dataframe # Checks Data Contracts
+from app.api.responses import EncodedRoute, encoded_response
+# Engines and the pandas/SciPy-backed modules are loaded on first use (or by the startup warm-up): see Services
+from app.core.services import Services
+from app.core.jobs import QueueFull
+from app.core.sql_runner import CursorExpired
+from app.core.metrics import INGEST_BYTES, REGISTRY, Stopwatch, observe_stage, profiled, span
+from app.config import DRIFT_ENGINE, HISTORY_MAX_PAGE, HISTORY_PAGE_SIZE, INGEST_COMPACT, LLM_MAX_RECORDS, MONITOR_MAX_BATCH_ROWS, MONITOR_WINDOW_ROWS, REPORT_PRERENDER, SAMPLE_ERROR, SCHEDULER_INTERVAL_S
 
-db = DatabaseEngine()
-router = APIRouter()
+router = APIRouter(route_class=EncodedRoute)  # Results encoded straight to JSON / msgpack bytes: see EncodedRoute
+ETAG_PATTERN = re.compile(r'\*|(?:W/)?"[^"]*"')  # One entity tag of an If-None-Match list
+
+def _init_job_worker():
+    """Process-mode job workers must not share the parent's SQLite connection."""
+    services.reset("db", "analyst_store")
+
+services = Services(job_initializer=_init_job_worker)
 
 class SQLRequest(BaseModel):
     query: str
+    cursor: Optional[str] = None     # next_cursor of the previous page
+    page_size: Optional[int] = None
+
+class ModelRegistration(BaseModel):
+    reference_path: str
+    current_path: str                  # A file (re-checked when it changes) or a directory of new files
+    interval_s: float = SCHEDULER_INTERVAL_S
+    priority: int = 0
+    deadline_s: Optional[float] = None  # Due -> finished; defaults to interval_s
+    features: Optional[dict] = None     # {feature: {"weight", "impact", "action"}}
+    thresholds: Optional[dict] = None   # Overrides of DEFAULT_THRESHOLDS
+    version: Optional[str] = None
+
+def _contract_violation(report):
+    print("❌ Data Contract Violation")
+    # 400 Bad Request triggers the frontend alert
+    return HTTPException(
+        status_code=400, 
+        detail={"message": "Data Contract Violation", "errors": report.errors()[:5], "violations": report.violations}
+    )
+
+def _parse_and_validate(reference_file: UploadFile, current_file: UploadFile, stored=None):
+    """
+    Parsing + contract check (blocking; runs in the threadpool while the upload files are still open).
+    With a `stored` reference only the current upload is parsed, and it is encoded with the stored schema.
+    """
+    # 1. DATA CONTRACT VALIDATION (The Gatekeeper)
+    # We validate every row of 'current' data to stop garbage from entering the pipeline.
+    # Uploads are parsed in chunks straight from the spooled file (CSV, Parquet or Arrow) and checked chunk by chunk.
+    from app.core.ingest import read_upload
+    from app.core.schemas import ADULT_CENSUS_CONTRACT # Checks Data Contracts
+    validator = ADULT_CENSUS_CONTRACT.streaming()
+    check = Stopwatch(validator)
+    start = time.perf_counter()
+    try:
+        curr_df = read_upload(current_file, on_chunk=check)
+        if not validator.report.is_valid:
+            raise _contract_violation(validator.report)
+        ref_df = read_upload(reference_file) if stored is None else None
+    finally:
+        observe_stage("validation", check.seconds)
+        observe_stage("parse", time.perf_counter() - start - check.seconds)
+
+    # Both sides share one compact encoding (narrow numbers, categories with the reference's dictionary)
+    footprint = None
+    if INGEST_COMPACT:
+        from app.core.compact import compact_pair, frame_nbytes
+        with span("compact"):
+            if stored is None:
+                ref_df, curr_df, footprint = compact_pair(ref_df, curr_df)
+            else:  # The stored reference is encoded already: only the current side takes on its schema
+                raw = frame_nbytes(curr_df)
+                curr_df = stored.schema().apply(curr_df)
+                footprint = {"raw_bytes": raw, "compact_bytes": frame_nbytes(curr_df)}
+        INGEST_BYTES.observe(footprint["raw_bytes"], encoding="raw")
+        INGEST_BYTES.observe(footprint["compact_bytes"], encoding="compact")
+        print(f"🗜️ Compact ingest: {footprint['raw_bytes'] / 2**20:.1f} MB -> {footprint['compact_bytes'] / 2**20:.1f} MB")
+    return ref_df, curr_df, footprint
+
+def _sketch_and_validate(reference_file: UploadFile, current_file: UploadFile, stored=None):
+    """DRIFT_ENGINE=approx: same contract check, but chunks are folded into sketches and never held together."""
+    from app.core.ingest import sketch_upload
+    from app.core.sketches import DatasetSketch
+    from app.core.schemas import ADULT_CENSUS_CONTRACT
+    validator = ADULT_CENSUS_CONTRACT.streaming()
+    check = Stopwatch(validator)
+    start = time.perf_counter()
+    try:
+        curr_sketch = sketch_upload(current_file, on_chunk=check)
+        if not validator.report.is_valid:
+            raise _contract_violation(validator.report)
+        ref_sketch = sketch_upload(reference_file) if stored is None else DatasetSketch().update(stored.frame())
+    finally:
+        observe_stage("validation", check.seconds)
+        observe_stage("parse", time.perf_counter() - start - check.seconds)
+    return ref_sketch, curr_sketch
+
+def run_analysis_job(ref_df, curr_df, footprint=None, sample_error=SAMPLE_ERROR, reference=None):
+    """
+    The queued part of /analyze: SQL upload + drift analysis. `footprint` (compact ingest sizes) is added to the result;
+    `sample_error` > 0 measures drift on a stratified sample of large uploads. `reference`: fingerprint of a stored
+    reference, opened (memory-mapped) in whichever process runs the job, used instead of `ref_df`.
+    """
+    from app.core.drift_engine import DriftAnalyzer
+    try:
+        ref_profile = None
+        if reference is not None:
+            stored = services.references.open(reference)
+            if stored is None:
+                raise FileNotFoundError(f"Stored reference {reference[:12]} was removed")
+            ref_df, ref_profile = stored.frame, stored.profile  # Rows built only where needed (Evidently, reports, SQL)
+
+        # 2. SQL UPLOAD (Analyst Mode): columnar, de-duplicated, loaded in the background
+        services.analyst_store.publish("reference_table", ref_df, reference)
+        services.analyst_store.publish("current_table", curr_df)
+
+        # 3. ANALYSIS
+        engine = DriftAnalyzer(db_engine=services.db, profile_cache=services.profile_cache, report_store=services.report_store, sample_error=sample_error)
+        with profiled("job analyze"):
+            result = engine.run_analysis(ref_df, curr_df, ref_profile)
+        if footprint:
+            result["ingest"] = footprint
+        return result
+    except Exception:
+        print("\n❌ ANALYSIS JOB CRASH REPORT:")
+        traceback.print_exc()
+        raise
+
+def run_sketch_job(ref_sketch, curr_sketch):
+    """The queued part of approximate analyses (no SQL upload or HTML report: the rows are not kept)."""
+    from app.core.drift_engine import DriftAnalyzer
+    try:
+        with profiled("job analyze (approx)"):
+            return DriftAnalyzer(db_engine=services.db).run_sketch_analysis(ref_sketch, curr_sketch)
+    except Exception:
+        print("\n❌ SKETCH JOB CRASH REPORT:")
+        traceback.print_exc()
+        raise
+
+def _prerender_report(result):
+    report_id = (result or {}).get("report_id")
+    if REPORT_PRERENDER and report_id:
+        try:
+            services.job_queue.submit("render", services.report_store.render_in_background, report_id)
+        except QueueFull:
+            pass  # Falls back to rendering on GET /api/reports/{id}
 
-@router.post("/analyze")
+def _result_key(reference_file, current_file, stored, sample_error):
+    """Result-cache key of an /analyze request, from the raw upload bytes (blocking: runs in the threadpool)."""
+    from app.core.drift_engine import config_version
+    from app.core.result_cache import analysis_key, digest_upload
+    reference = f"stored:{stored.fingerprint}" if stored else f"upload:{digest_upload(reference_file)}"
+    return analysis_key(reference, f"upload:{digest_upload(current_file)}", config_version(DRIFT_ENGINE, sample_error))
+
+def _cache_result(key, prerender=False):
+    """on_success hook of an analysis job: keeps the result for identical requests (and pre-renders its report)."""
+    def hook(result):
+        services.result_cache.put(key, result)
+        if prerender:
+            _prerender_report(result)
+    return hook
+
+# Scrape-time views of the queue and caches (GET /metrics)
+def _cache_stats():
+    """Caches that have not been built yet are left out (a scrape must not load them)."""
+    profile_cache, db, llm, results = services.peek("profile_cache"), services.peek("db"), services.peek("llm"), services.peek("result_cache")
+    return {
+        **({"reference_profiles": profile_cache.stats()} if profile_cache else {}),
+        **({"analysis_results": results.stats()} if results else {}),
+        **({"sql_results": db.sql.stats()} if db else {}),
+        **({"llm_descriptors": llm.cache.stats()} if llm else {}),
+    }
+
+REGISTRY.gauge("modelguard_job_queue", "Analysis jobs waiting or running.", lambda: {k: services.job_queue.metrics()[k] for k in ("queue_depth", "running")}, label="state")
+REGISTRY.gauge("modelguard_jobs_total", "Analysis jobs by outcome.", lambda: dict(services.job_queue.counters), label="outcome", kind="counter")
+REGISTRY.gauge("modelguard_job_wait_seconds_p95", "95th percentile queue wait of recent jobs.", lambda: services.job_queue.metrics()["wait_seconds_p95"])
+REGISTRY.gauge("modelguard_cache_hits_total", "Cache hits by cache.", lambda: {k: v["hits"] + v.get("disk_hits", 0) for k, v in _cache_stats().items()}, label="cache", kind="counter")
+REGISTRY.gauge("modelguard_cache_misses_total", "Cache misses by cache.", lambda: {k: v["misses"] for k, v in _cache_stats().items()}, label="cache", kind="counter")
+REGISTRY.gauge("modelguard_cache_bytes", "Bytes held in memory by cache.", lambda: {k: v["bytes"] for k, v in _cache_stats().items()}, label="cache")
+
+@router.post("/analyze", status_code=202)
 async def analyze_drift(
-    reference_file: UploadFile = File(...),
-    current_file: UploadFile = File(...)
+    reference_file: UploadFile = File(None),
+    current_file: UploadFile = File(...),
+    sample_error: float = SAMPLE_ERROR,
+    reference: str = None
 ):
+    """
+    Validates the uploads and queues the analysis. Poll GET /api/jobs/{job_id} for the result.
+    `sample_error`: latency / accuracy budget of sampled analysis (0 = every row).
+    `reference`: name of a stored reference (POST /api/references/{name}), used instead of `reference_file`.
+    Idempotent: a repeat of a recent analysis is answered at once from the result cache (200, `cached: true`), and
+    a repeat of one still in progress gets that analysis' job.
+    """
+    if not 0 <= sample_error < 1:
+        raise HTTPException(status_code=400, detail="sample_error must be in [0, 1)")
+    stored = None
+    if reference is not None:
+        stored = _stored_reference(reference)
+    elif reference_file is None:
+        raise HTTPException(status_code=400, detail="Send a reference_file or name a stored reference")
     try:
-        print(f"📥 Processing: {reference_file.filename} vs {current_file.filename}")
-        ref_content = await reference_file.read()
-        curr_content = await current_file.read()
-        
-        ref_df = pd.read_csv(io.BytesIO(ref_content))
-        curr_df = pd.read_csv(io.BytesIO(curr_content))
-        
-        # 1. DATA CONTRACT VALIDATION (The Gatekeeper)
-        # We validate 'current' data to stop garbage from entering the pipeline
-        is_valid, errors = validate_dataframe(curr_df)
-        if not is_valid:
-            print("❌ Data Contract Violation")
-            # 400 Bad Request triggers the frontend alert
-            raise HTTPException(
-                status_code=400, 
-                detail={"message": "Data Contract Violation", "errors": errors[:5]}
-            )
-        
-        # 2. SQL UPLOAD (Analyst Mode)
-        db.upload_dataset("reference_table", ref_df)
-        db.upload_dataset("current_table", curr_df)
-        
-        # 3. ANALYSIS
-        engine = DriftAnalyzer(db_engine=db)
-        results = engine.run_analysis(ref_df, curr_df)
-        
-        return {"status": "success", "data": results}
+        print(f"📥 Processing: {reference if stored else reference_file.filename} vs {current_file.filename}")
+        key = await run_in_threadpool(_result_key, reference_file, current_file, stored, sample_error)
+        cached, flight, leader = services.result_cache.lookup(key)
+        if cached is not None:
+            print(f"♻️ Result cache hit: {key[:12]}")
+            from app.core.drift_engine import DriftAnalyzer
+            cached = DriftAnalyzer(db_engine=services.db).refresh_decision(cached)  # Cooldown / version may have moved
+            services.db.log_cache_hit(key, cached, wait=False)
+            return encoded_response({"status": "succeeded", "cached": True, "data": cached})
+        if not leader:
+            job = await run_in_threadpool(flight.wait)
+            if job is not None:
+                print(f"🔗 Identical analysis in progress: joining job {job.id}")
+                return {"status": "queued", "job_id": job.id, "status_url": f"/api/jobs/{job.id}", "deduplicated": True}
+            flight = None  # Its leader failed before queueing anything: run this one on its own
 
+        try:
+            if DRIFT_ENGINE == "approx":
+                ref_sketch, curr_sketch = await run_in_threadpool(_sketch_and_validate, reference_file, current_file, stored)
+                job = services.job_queue.submit("analyze", run_sketch_job, ref_sketch, curr_sketch, on_success=_cache_result(key))
+            else:
+                ref_df, curr_df, footprint = await run_in_threadpool(_parse_and_validate, reference_file, current_file, stored)
+                job = services.job_queue.submit("analyze", run_analysis_job, ref_df, curr_df, footprint, sample_error,
+                                                stored.fingerprint if stored else None, on_success=_cache_result(key, prerender=True))
+        except BaseException:
+            if flight is not None:
+                services.result_cache.abandon(key, flight)
+            raise
+        if flight is not None:
+            flight.attach(job)
+        return {"status": "queued", "job_id": job.id, "status_url": f"/api/jobs/{job.id}"}
+
+    except QueueFull as qf:
+        raise HTTPException(status_code=429, detail=f"Analysis queue is full: {qf}", headers={"Retry-After": "5"})
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -55,12 +251,238 @@ async def analyze_drift(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/analyze/sketches", status_code=202)
+async def analyze_sketches(request: Request):
+    """
+    Approximate analysis from pre-built DatasetSketches (e.g. one per producer shard).
+    Body: {"reference": [sketch, ...], "current": [sketch, ...]}; each side is merged before the analysis is queued.
+    """
+    payload = await request.json()
+    try:
+        ref_sketch, curr_sketch = (_merge_sketches(payload.get(side)) for side in ("reference", "current"))
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid sketch payload: {e}")
+    try:
+        job = services.job_queue.submit("analyze", run_sketch_job, ref_sketch, curr_sketch)
+    except QueueFull as qf:
+        raise HTTPException(status_code=429, detail=f"Analysis queue is full: {qf}", headers={"Retry-After": "5"})
+    return {"status": "queued", "job_id": job.id, "status_url": f"/api/jobs/{job.id}"}
+
+def _merge_sketches(parts):
+    from app.core.sketches import DatasetSketch
+    parts = parts if isinstance(parts, list) else [parts]
+    if not parts or parts[0] is None:
+        raise ValueError("at least one sketch per side is required")
+    merged = DatasetSketch.from_dict(parts[0])
+    for part in parts[1:]:
+        merged.merge(DatasetSketch.from_dict(part))
+    return merged
+
+@router.get("/jobs/metrics")
+async def get_job_metrics():
+    """Queue depth, in-flight jobs, outcome counters and queue wait times."""
+    return {"status": "success", "data": services.job_queue.metrics()}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = services.job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": job.status, "job": job.to_dict(include_result=False), "data": job.result if job.status == "succeeded" else None}
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = services.job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not services.job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is {job.status} and can no longer be cancelled")
+    return {"status": "cancelled", "job_id": job_id}
+
+@router.get("/reports/{report_id}")
+def get_report(report_id: str, request: Request):
+    """Evidently HTML for an analysis, rendered on first request and cached on disk."""
+    if not services.report_store.exists(report_id):
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    etag = services.report_store.etag(report_id)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path = services.report_store.get_html_path(report_id)
+        with open(path, "rb") as f:  # Read here: eviction may remove the file before a response streams it
+            html = f.read()
+    except FileNotFoundError:  # Evicted since the lookup above
+        raise HTTPException(status_code=404, detail="Report not found")
+    return Response(html, media_type="text/html", headers=headers)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match is "*" or a list of entity tags; weak comparison, so W/"x" matches "x"."""
+    tags = ETAG_PATTERN.findall(if_none_match)
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+def _parse_records(body: bytes, content_type: str):
+    """JSON (list of records or {"model_id", "records"}) or JSONL (one record per line) -> (model_id, records)."""
+    text = body.decode("utf-8")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return None, [json.loads(line) for line in text.splitlines() if line.strip()]
+    payload = json.loads(text)
+    if isinstance(payload, dict):
+        return payload.get("model_id"), payload.get("records", [])
+    return None, payload
+
+def _ingest_batch(body: bytes, content_type: str, model_id: str = None):
+    import pandas as pd
+    try:
+        body_model, records = _parse_records(body, content_type)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON/JSONL body: {e}")
+    if len(records) > MONITOR_MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch of {len(records)} rows exceeds MONITOR_MAX_BATCH_ROWS={MONITOR_MAX_BATCH_ROWS}")
+
+    df = pd.DataFrame.from_records(records)
+    model_id = model_id or body_model
+    if model_id:
+        batches = [(model_id, df.drop(columns="model_id", errors="ignore"))]
+    elif "model_id" in df.columns:
+        # JSONL streams may interleave models: one micro-batch per model, arrival order kept
+        batches = [(str(m), g.drop(columns="model_id")) for m, g in df.groupby("model_id", sort=False)]
+    else:
+        raise HTTPException(status_code=400, detail="model_id is required (query parameter, body field or per record)")
+
+    unknown = [m for m, _ in batches if services.monitors.get(m) is None]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"No monitor registered for: {', '.join(unknown)}")
+
+    out = []
+    for m, batch in batches:
+        monitor = services.monitors.get(m)
+        windows = monitor.ingest(batch)
+        out.append({"model_id": m, "accepted": len(batch), "rows_seen": monitor.rows_seen, "windows_closed": windows})
+    return out
+
+@router.post("/monitors/{model_id}/reference")
+async def register_monitor(model_id: str, reference_file: UploadFile = File(...), window_rows: int = MONITOR_WINDOW_ROWS, slide_rows: int = None):
+    """Stores the reference for a model's stream and (re)starts its window (tumbling, or sliding when slide_rows < window_rows)."""
+    def build():
+        from app.core.ingest import read_upload
+        profile = services.profile_cache.get_or_build(read_upload(reference_file))
+        return services.monitors.register(model_id, profile, window_rows, slide_rows)
+    try:
+        monitor = await run_in_threadpool(build)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return {"status": "success", "data": monitor.state()}
+
+@router.get("/monitors/{model_id}")
+async def get_monitor(model_id: str):
+    monitor = services.monitors.get(model_id)
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Monitor not found")
+    return {"status": "success", "data": monitor.state()}
+
+def _stored_reference(name):
+    try:
+        stored = services.references.get(name)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Reference not found")
+    return stored
+
+@router.post("/references/{name}")
+async def register_reference(name: str, reference_file: UploadFile = File(...)):
+    """Parses, compiles and stores a reference once; /analyze?reference={name} then uses it without an upload."""
+    from app.core.reference_store import NAME_PATTERN
+    if not NAME_PATTERN.match(name):
+        raise HTTPException(status_code=400, detail=f"Invalid reference name: {name!r}")
+    def build():
+        from app.core.ingest import read_upload
+        return services.references.register(name, read_upload(reference_file))
+    return {"status": "success", "data": await run_in_threadpool(build)}
+
+@router.get("/references")
+async def list_references():
+    return {"status": "success", "data": services.references.list()}
+
+@router.get("/references/{name}")
+async def get_reference(name: str):
+    _stored_reference(name)
+    return {"status": "success", "data": services.references.describe(name)}
+
+@router.delete("/references/{name}")
+async def delete_reference(name: str):
+    """Unregisters the name; its files are removed once no name points at them (after a grace period)."""
+    if not services.references.delete(name):
+        raise HTTPException(status_code=404, detail="Reference not found")
+    return {"status": "success"}
+
+@router.post("/models/{model_id}")
+def register_model(model_id: str, request: ModelRegistration):
+    """Registers (or replaces) a model for periodic drift checks; its reference is compiled now."""
+    from app.core.scheduler import ModelSpec
+    try:
+        return {"status": "success", "data": services.scheduler.register(ModelSpec(model_id, **request.dict()))}
+    except (ValueError, OSError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/models")
+async def get_models():
+    """Scheduler throughput, lag and deadline misses, overall and per model."""
+    return {"status": "success", "data": services.scheduler.stats()}
+
+@router.get("/models/{model_id}")
+async def get_model(model_id: str):
+    model = services.scheduler.get(model_id)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return {"status": "success", "data": model}
+
+@router.post("/models/{model_id}/check")
+async def check_model_now(model_id: str):
+    """Runs the model's check as soon as a worker is free."""
+    if not services.scheduler.check_now(model_id):
+        raise HTTPException(status_code=404, detail="Model not found")
+    return {"status": "success"}
+
+@router.delete("/models/{model_id}")
+async def unregister_model(model_id: str):
+    if not services.scheduler.unregister(model_id):
+        raise HTTPException(status_code=404, detail="Model not found")
+    return {"status": "success"}
+
+@router.post("/ingest")
+async def ingest_records(request: Request, model_id: str = None):
+    """Micro-batch of prediction records; drift is re-evaluated (and the decision gate run) on every window close."""
+    body = await request.body()
+    data = await run_in_threadpool(_ingest_batch, body, request.headers.get("content-type", ""), model_id)
+    return {"status": "success", "data": data}
+
 @router.post("/sql")
-async def run_sql(request: SQLRequest):
-    """Executes arbitrary SQL queries on the uploaded data."""
+def run_sql(request: SQLRequest, http_request: Request):
+    """
+    Executes arbitrary SQL queries on the uploaded data (sync: runs on the threadpool with its own connection).
+    Paged JSON by default; `Accept: application/x-ndjson` streams every row instead.
+    """
     print(f"🔍 SQL: {request.query}")
-    result = db.execute_sql(request.query)
-    return {"status": "success", "data": result}
+    try:
+        if "application/x-ndjson" in http_request.headers.get("accept", ""):
+            return StreamingResponse(services.db.sql.stream(request.query), media_type="application/x-ndjson")
+        result = services.db.sql.run(request.query, request.cursor, request.page_size)
+    except CursorExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.Error as e:
+        return {"status": "success", "data": {"error": str(e)}}
+    return {"status": "success", **result}
+
+@router.get("/sql/tables")
+def get_sql_tables():
+    """Published analyst tables (name, content hash, rows, last update)."""
+    return {"status": "success", "data": services.analyst_store.describe()}
 
 @router.get("/sql/presets")
 async def get_sql_presets():
@@ -75,17 +497,91 @@ async def get_sql_presets():
             },
             {
                 "name": "Drift Over Time",
-                "query": "SELECT date(timestamp), risk_score FROM run_history GROUP BY date(timestamp) ORDER BY date(timestamp)",
+                "query": "SELECT period AS day, sum_risk / runs AS avg_risk, max_risk, runs FROM run_rollups WHERE bucket = 'day' ORDER BY period",
                 "desc": "Time-series view of model health."
             }
         ]
     }
 
 @router.get("/history")
-async def get_history():
-    return {"status": "success", "data": db.get_history()}
+def get_history(start: str = None, end: str = None, limit: int = HISTORY_PAGE_SIZE, cursor: str = None, features: bool = False):
+    """Runs in [start, end) (ISO dates), newest first; pass `next_cursor` back as `cursor` for the next page."""
+    try:
+        page = services.db.history_page(start, end, limit, cursor, include_features=features)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", **page}
+
+@router.get("/history/rollups")
+def get_history_rollups(bucket: str = "day", start: str = None, end: str = None, feature: str = None):
+    """Hourly or daily aggregates of the run history (or of one feature's drift scores)."""
+    try:
+        return {"status": "success", "data": services.db.rollups(bucket, start, end, feature)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/history/features/{feature}")
+def get_feature_history(feature: str, start: str = None, end: str = None, limit: int = HISTORY_MAX_PAGE, cursor: str = None):
+    """One feature's drift score per run, newest first."""
+    try:
+        page = services.db.feature_history(feature, start, end, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", **page}
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit rate, size and eviction counters of the analysis caches."""
+    return {"status": "success", "data": {
+        "reference_profiles": services.profile_cache.stats(),
+        "analysis_results": services.result_cache.stats(),
+        "sql_results": services.db.sql.stats(),
+        "llm_descriptors": services.llm.cache.stats(),
+    }}
+
+@router.get("/health")
+async def health():
+    """Liveness: the process is up and serving (answers while the warm-up is still running)."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready():
+    """Readiness: 503 until the startup warm-up has run (WARMUP=true), or if it failed."""
+    if not services.ready.is_set():
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    if services.warmup_error:
+        return JSONResponse(status_code=503, content={"status": "failed", "error": services.warmup_error})
+    return {"status": "ready", "warmup_seconds": {k: round(v, 4) for k, v in services.timings.items()}}
+
+def _scan_llm(body: bytes, content_type: str, rows: bool):
+    try:
+        if "ndjson" in content_type or "jsonl" in content_type:
+            payload = [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+        else:
+            payload = json.loads(body)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON/JSONL body: {e}")
+
+    # {"prompt", "response"} | [records] | {"records": [...], "reference": [...]}
+    reference = None
+    if isinstance(payload, dict):
+        records, reference = (payload.get("records", []), payload.get("reference")) if "records" in payload else ([payload], None)
+    else:
+        records = payload
+    batches = [records] + ([reference] if reference is not None else [])
+    if not all(isinstance(b, list) and all(isinstance(r, dict) for r in b) for b in batches):
+        raise HTTPException(status_code=400, detail="Records must be JSON objects with a 'response' field")
+    n = sum(len(b) for b in batches)
+    if n > LLM_MAX_RECORDS:
+        raise HTTPException(status_code=413, detail=f"Batch of {n} records exceeds LLM_MAX_RECORDS={LLM_MAX_RECORDS}")
+    return services.llm.scan(records, reference, include_rows=rows)
 
-# Stub for future LLM integration
 @router.post("/analyze/llm")
-async def analyze_llm():
-    return {"status": "success", "data": {"message": "Placeholder"}}
\ No newline at end of file
+async def analyze_llm(request: Request, rows: bool = True):
+    """
+    Text descriptors (length, words, sentences, non-letter share, links, sentiment) of prompt/response pairs.
+    A `reference` batch adds descriptor drift; rows=false leaves out the per-record descriptors.
+    """
+    body = await request.body()
+    data = await run_in_threadpool(_scan_llm, body, request.headers.get("content-type", ""), rows)
+    return {"status": "success", "data": data}
\ No newline at end of file
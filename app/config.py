@@ -11,4 +11,126 @@ ADULT_DATA_PATH = os.path.join(DATA_DIR, "adult_census.csv")
 
 # Thresholds for Risk Badge
 RISK_HIGH_THRESHOLD = 0.5  # If >50% features drift -> HIGH RISK
-RISK_MID_THRESHOLD = 0.2   # If >20% features drift -> MEDIUM RISK
\ No newline at end of file
+RISK_MID_THRESHOLD = 0.2   # If >20% features drift -> MEDIUM RISK
+
+# Upload ingestion: rows parsed per chunk when streaming CSV/Parquet/Arrow uploads
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "50000"))
+# Compact encoding of parsed uploads: downcast numbers, text columns as categories sharing the reference's dictionary
+INGEST_COMPACT = os.getenv("INGEST_COMPACT", "true").lower() == "true"
+INGEST_CATEGORY_MAX_RATIO = float(os.getenv("INGEST_CATEGORY_MAX_RATIO", "0.5"))  # Distinct values / rows above which text stays text
+
+# Reference profile cache (compiled reference-side statistics, keyed by content hash)
+PROFILE_BINS = int(os.getenv("PROFILE_BINS", "10"))
+PROFILE_CACHE_MAX_BYTES = int(os.getenv("PROFILE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PROFILE_CACHE_DISK_BYTES = int(os.getenv("PROFILE_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+PROFILE_CACHE_DIR = os.getenv("PROFILE_CACHE_DIR", os.path.join(DATA_DIR, "profiles"))
+
+# Named references (POST /api/references/{name}): compiled once and kept as memory-mapped files every worker shares
+REFERENCE_DIR = os.getenv("REFERENCE_DIR", os.path.join(DATA_DIR, "references"))
+
+# Drift engine: "evidently" (Evidently Report), "native" (built-in vectorized tests, Evidently only for HTML)
+# or "approx" (uploads streamed into KLL / frequency sketches; bounded memory, scores with error intervals)
+DRIFT_ENGINE = os.getenv("DRIFT_ENGINE", "evidently")
+DRIFT_THRESHOLD = float(os.getenv("DRIFT_THRESHOLD", "0.1"))         # Distance tests (Wasserstein, PSI)
+DRIFT_DATASET_SHARE = float(os.getenv("DRIFT_DATASET_SHARE", "0.5"))  # Share of drifted columns for dataset drift
+DRIFT_SMALL_SAMPLE = int(os.getenv("DRIFT_SMALL_SAMPLE", "1000"))     # At or below: p-value tests (KS, chi-square)
+
+# Sampled analysis of large uploads: drift is tested on a stratified sample of the current rows (target x protected
+# columns), sized so each column's distribution is within SAMPLE_ERROR of the full upload's with SAMPLE_CONFIDENCE
+# Native engine only (DRIFT_ENGINE=native)
+SAMPLE_ERROR = float(os.getenv("SAMPLE_ERROR", "0"))                 # 0 disables; 0.01 -> ~26k rows at 99% confidence
+SAMPLE_CONFIDENCE = float(os.getenv("SAMPLE_CONFIDENCE", "0.99"))
+SAMPLE_ESCALATE = os.getenv("SAMPLE_ESCALATE", "true").lower() == "true"  # Re-run on every row when the bounds straddle a decision threshold
+
+# Statistical rigor: KS p-values are corrected for testing many columns at once ("holm": family-wise error, "bh":
+# false discovery rate, "none"). RIGOR_RESAMPLES > 0 adds permutation p-values and bootstrap intervals for every
+# column and for the drift share, from up to RIGOR_MAX_ROWS rows per side
+RIGOR_CORRECTION = os.getenv("RIGOR_CORRECTION", "holm")
+RIGOR_ALPHA = float(os.getenv("RIGOR_ALPHA", "0.05"))             # Significance level; intervals at 1 - alpha
+RIGOR_RESAMPLES = int(os.getenv("RIGOR_RESAMPLES", "0"))          # 0 disables; 1000 -> p-values down to ~0.001
+RIGOR_MAX_ROWS = int(os.getenv("RIGOR_MAX_ROWS", "2000"))
+
+# Per-column statistical tests: "auto" (threads above PARALLEL_MIN_CELLS), "serial", "thread" or "process"
+PARALLEL_MODE = os.getenv("PARALLEL_MODE", "auto")
+PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_MIN_CELLS = int(os.getenv("PARALLEL_MIN_CELLS", "2000000"))  # rows x columns below which we stay serial
+
+# Lazy HTML reports (GET /api/reports/{id}): on-disk cache bounded by size, LRU eviction
+REPORT_DIR = os.getenv("REPORT_DIR", os.path.join(DATA_DIR, "reports"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+REPORT_PRERENDER = os.getenv("REPORT_PRERENDER", "false").lower() == "true"  # Render in the background after /analyze
+
+# Idempotent /api/analyze: results of identical analyses (same uploads, engine, gate and knowledge-graph settings)
+# are served from memory, and identical requests in flight share one job
+RESULT_CACHE_ENTRIES = int(os.getenv("RESULT_CACHE_ENTRIES", "256"))  # LRU bound; 0 disables the cache
+RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "900"))
+
+# Analysis job queue (POST /api/analyze -> GET /api/jobs/{id})
+JOB_MODE = os.getenv("JOB_MODE", "thread")  # "thread" or "process"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "8"))  # Waiting jobs beyond the running ones; more -> HTTP 429
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "1000"))
+
+# SQLite state store: WAL mode, one connection per thread, audit writes group-committed by a writer thread
+DB_PATH = os.getenv("DB_PATH", "modelguard.db")
+DB_BATCH_WINDOW_MS = float(os.getenv("DB_BATCH_WINDOW_MS", "2"))  # How long the writer waits to fill a batch
+DB_BATCH_MAX = int(os.getenv("DB_BATCH_MAX", "256"))               # Writes per transaction at most
+
+# GET /api/history: runs per page by default / at most (also the cap on rollup periods returned)
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "10"))
+HISTORY_MAX_PAGE = int(os.getenv("HISTORY_MAX_PAGE", "1000"))
+
+# Streaming monitors (POST /api/ingest): row-count windows summarised as fixed-size sketches on the reference grid
+MONITOR_WINDOW_ROWS = int(os.getenv("MONITOR_WINDOW_ROWS", "5000"))      # Default window size (tumbling)
+MONITOR_GRID_BINS = int(os.getenv("MONITOR_GRID_BINS", "100"))           # Reference quantile bins per numeric column
+MONITOR_MAX_CATEGORIES = int(os.getenv("MONITOR_MAX_CATEGORIES", "1000"))  # Tracked values per categorical column; the rest share one bucket
+MONITOR_HISTORY = int(os.getenv("MONITOR_HISTORY", "100"))               # Closed-window results kept per model
+MONITOR_MAX_BATCH_ROWS = int(os.getenv("MONITOR_MAX_BATCH_ROWS", "100000"))
+
+# Monitoring scheduler (/api/models): periodic drift checks of registered models against local files or directories
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))          # Checks running at once
+SCHEDULER_INTERVAL_S = float(os.getenv("SCHEDULER_INTERVAL_S", "300"))  # Default check period per model
+SCHEDULER_TICK_S = float(os.getenv("SCHEDULER_TICK_S", "1"))           # How often the scheduler looks for due checks
+SCHEDULER_DATA_DIR = os.getenv("SCHEDULER_DATA_DIR", DATA_DIR)         # Reference / current paths must be inside it
+SCHEDULER_MODELS_FILE = os.getenv("SCHEDULER_MODELS_FILE", "")         # JSON list of models registered at startup
+
+# Approximate mode (DRIFT_ENGINE=approx): sketch error bounds, as a fraction of the row count
+APPROX_RANK_ERROR = float(os.getenv("APPROX_RANK_ERROR", "0.01"))   # KLL rank error (numeric columns)
+APPROX_FREQ_ERROR = float(os.getenv("APPROX_FREQ_ERROR", "0.001"))  # Misra-Gries count error (categorical columns)
+
+# Fairness audit: opt-in intersectional slices on top of the per-column ones ("sex*race,race*relationship").
+# A flagged slice blocks deployment like a flagged column, so enabling them can change gate outcomes
+FAIRNESS_INTERSECTIONS = [tuple(s.split("*")) for s in os.getenv("FAIRNESS_INTERSECTIONS", "").split(",") if s.strip()]
+
+# LLM guardrail scanning (POST /api/analyze/llm): descriptors computed in vectorized batches, memoized per response text
+LLM_BATCH_ROWS = int(os.getenv("LLM_BATCH_ROWS", "10000"))        # Responses per descriptor batch
+LLM_MAX_RECORDS = int(os.getenv("LLM_MAX_RECORDS", "100000"))     # Records (current + reference) per request; more -> HTTP 413
+LLM_CACHE_ENTRIES = int(os.getenv("LLM_CACHE_ENTRIES", "100000"))  # Distinct responses whose descriptors are kept (LRU)
+
+# Analyst store behind /api/sql: uploads kept once per content hash (SQLite projection)
+ANALYST_DIR = os.getenv("ANALYST_DIR", os.path.join(DATA_DIR, "analyst"))
+ANALYST_MAX_DATASETS = int(os.getenv("ANALYST_MAX_DATASETS", "8"))  # Files kept, including unpublished ones
+
+# /api/sql execution limits and result cache (keyed by normalized query + versions of the tables it reads)
+SQL_TIMEOUT_S = float(os.getenv("SQL_TIMEOUT_S", "10"))                 # SQLite execution time per query
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "10000"))                  # Rows kept per result (paged responses)
+SQL_MAX_BYTES = int(os.getenv("SQL_MAX_BYTES", str(16 * 1024 * 1024)))  # Estimated result size kept per query
+SQL_PAGE_SIZE = int(os.getenv("SQL_PAGE_SIZE", "500"))
+SQL_STREAM_MAX_ROWS = int(os.getenv("SQL_STREAM_MAX_ROWS", "1000000"))  # NDJSON responses (not buffered)
+SQL_CACHE_MAX_BYTES = int(os.getenv("SQL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Observability: GET /metrics (Prometheus text format) and the opt-in slow-request sampling profiler
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))        # Requests slower than this dump a profile; 0 disables
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))  # Stack sampling period while requests are in flight
+PROFILE_TRACE_DIR = os.getenv("PROFILE_TRACE_DIR", os.path.join(DATA_DIR, "traces"))
+
+# API responses: route results are encoded with orjson (msgpack on `Accept: application/msgpack` when installed), and
+# bodies of at least COMPRESS_MIN_BYTES are compressed with brotli (when installed) or gzip, as the client accepts
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))  # Smaller bodies are sent as they are; 0 compresses everything
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))  # 0-11; low values keep dynamic responses fast
+
+# Startup: engines are built on first use; WARMUP builds them (and imports pandas/SciPy/Evidently) in the background
+# at startup, and GET /api/ready answers 503 until that is done
+WARMUP = os.getenv("WARMUP", "true").lower() == "true"
@@ -0,0 +1,146 @@
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from app.config import ANALYST_DIR, ANALYST_MAX_DATASETS
+from app.core.metrics import span
+from app.core.profile import frame_fingerprint
+
+TABLE_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class AnalystStore:
+    """
+    SQL store behind /api/sql.
+    Each uploaded dataset is kept once per content hash, as <root>/<fingerprint>.db: a SQLite projection (one
+    table `data`) built once per hash. The columnar copy is the one ReportStore already keeps for the HTML reports.
+    A logical name (reference_table, current_table) points at a fingerprint; /api/sql connections ATTACH the
+    projection and expose it through a TEMP view, so switching datasets never drops or rewrites a table.
+    publish() only queues the work: hashing and the projection run on a background thread and the
+    name flips to the new dataset once it is ready (queries keep seeing the previous one until then).
+    """
+    def __init__(self, db_engine, root=ANALYST_DIR, max_datasets=ANALYST_MAX_DATASETS):
+        self.db = db_engine
+        self.root = root
+        self.max_datasets = max_datasets
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analyst-ingest")
+        os.makedirs(self.root, exist_ok=True)
+        self.db.conn.execute('''
+            CREATE TABLE IF NOT EXISTS analyst_tables (
+                name TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                n_rows INTEGER,
+                updated_at DATETIME
+            )
+        ''')
+        self.db.conn.commit()
+        db_engine.analyst_store = self  # execute_sql attaches the published tables through this
+
+    # ------------------------------------------------------------------
+    # INGESTION (background)
+    # ------------------------------------------------------------------
+    def publish(self, name: str, df: pd.DataFrame, fingerprint: str = None):
+        """
+        Queues `df` to become queryable as `name`. Returns a Future resolving to the fingerprint.
+        `df` may be a callable returning the rows (with `fingerprint`): only called when the projection is built.
+        """
+        if not TABLE_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid table name: {name}")
+        return self._executor.submit(self._ingest, name, df, fingerprint)
+
+    def _ingest(self, name, df, fingerprint):
+        try:
+            fingerprint = fingerprint or frame_fingerprint(df)
+            n_rows = None if callable(df) else len(df)
+            if not os.path.exists(self._path(fingerprint, "db")):
+                # De-duplicated by content: a re-uploaded dataset only flips the name
+                with span("sql_upload"):
+                    df = df() if callable(df) else df
+                    n_rows = len(df)
+                    self._build_projection(fingerprint, df)
+            elif n_rows is None:
+                n_rows = self._count(fingerprint)
+            self.db._submit_write(
+                "INSERT OR REPLACE INTO analyst_tables (name, fingerprint, n_rows, updated_at) VALUES (?, ?, ?, ?)",
+                (name, fingerprint, n_rows, datetime.now())
+            ).result()
+            self._evict()
+            return fingerprint
+        except Exception as e:
+            print(f"❌ Analyst store ingest failed ({name}): {e}")
+            raise
+
+    def _build_projection(self, fingerprint, df):
+        # Scratch file, renamed into place when complete: no journal or fsync needed while loading
+        path = self._path(fingerprint, "db")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        conn = sqlite3.connect(tmp)
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            df.to_sql("data", conn, index=False, chunksize=50000)
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp, path)
+
+    def _count(self, fingerprint):
+        conn = sqlite3.connect(f"file:{self._path(fingerprint, 'db')}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT count(*) FROM data").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _evict(self):
+        """Drops files of datasets no name points at, oldest first, beyond max_datasets."""
+        live = {fp for _, fp in self.tables()}
+        files = {}
+        for fname in os.listdir(self.root):
+            fp, _, ext = fname.partition(".")
+            if ext == "db" and fp not in live:
+                files.setdefault(fp, []).append(os.path.join(self.root, fname))
+        stale = sorted(files, key=lambda fp: min(os.path.getmtime(p) for p in files[fp]))
+        for fp in stale[:max(0, len(live) + len(stale) - self.max_datasets)]:
+            for path in files[fp]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    # ------------------------------------------------------------------
+    # QUERY SIDE
+    # ------------------------------------------------------------------
+    def tables(self):
+        """[(name, fingerprint)] of every published table."""
+        return [tuple(r) for r in self.db.conn.execute("SELECT name, fingerprint FROM analyst_tables ORDER BY name").fetchall()]
+
+    def describe(self):
+        cur = self.db.conn.execute("SELECT name, fingerprint, n_rows, updated_at FROM analyst_tables ORDER BY name")
+        return [dict(zip(("name", "fingerprint", "rows", "updated_at"), r)) for r in cur.fetchall()]
+
+    def attach(self, conn, state):
+        """
+        Points `conn`'s TEMP views at the currently published datasets.
+        `state` is the per-connection {name: fingerprint} cache, so unchanged tables cost one small SELECT.
+        """
+        for name, fingerprint in self.tables():
+            if state.get(name) == fingerprint:
+                continue
+            path = self._path(fingerprint, "db")
+            if not os.path.exists(path):
+                continue
+            alias = f"analyst_{name}"
+            if name in state:
+                conn.execute(f"DROP VIEW IF EXISTS temp.{name}")
+                conn.execute(f"DETACH DATABASE {alias}")
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (f"file:{path}?mode=ro",))
+            conn.execute(f"CREATE TEMP VIEW {name} AS SELECT * FROM {alias}.data")
+            state[name] = fingerprint
+
+    def _path(self, fingerprint, ext):
+        return os.path.join(self.root, f"{fingerprint}.{ext}")
@@ -7,11 +7,12 @@ class DriftAnalyzer:
     """
     Core Logic for detecting Distribution Drift in Tabular Data.
     """
-    def __init__(self):
+    def __init__(self, report_store=None):
         self.report = Report(metrics=[
             DataDriftPreset(),
             DataQualityPreset()
         ])
+        self.report_store = report_store  # HTML is rendered lazily via GET /api/reports/{id}
 
     def run_analysis(self, ref_df: pd.DataFrame, curr_df: pd.DataFrame) -> dict:
         """
@@ -71,5 +72,5 @@ class DriftAnalyzer:
             "risk_level": risk_level,
             "risk_color": risk_color,
             "leaderboard": leaderboard,
-            "html_report": self.report.get_html()
+            "report_id": self.report_store.register(ref_df, curr_df) if self.report_store else None
         }
\ No newline at end of file
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+from app.config import DRIFT_DATASET_SHARE, DRIFT_SMALL_SAMPLE, DRIFT_THRESHOLD, PROFILE_BINS
+from app.core.native_drift import NativeDriftEngine, PSI_EPS, population_stability_index
+from app.core.profile import ks_p_value
+from app.core.sketches import DatasetSketch
+
+OTHER = "__other__"  # Mass the frequency sketch did not attribute to a tracked value
+
+
+class ApproxDriftEngine:
+    """
+    Drift from two DatasetSketches (no rows needed). Same tests and selection rules as NativeDriftEngine, except that
+    numeric columns always get KS / Wasserstein (a quantile sketch does not count distinct values);
+    every score carries `drift_score_interval`, the range the exact score is guaranteed (KS, Wasserstein)
+    or expected to first order (Jensen-Shannon, PSI) to lie in given the sketches' error bounds.
+    `drift_uncertain` marks columns whose interval straddles the threshold.
+    """
+    def __init__(self, threshold=DRIFT_THRESHOLD, p_value=0.05, dataset_drift_share=DRIFT_DATASET_SHARE, small_sample=DRIFT_SMALL_SAMPLE, bins=PROFILE_BINS):
+        self.threshold = threshold
+        self.p_value = p_value
+        self.dataset_drift_share = dataset_drift_share
+        self.small_sample = small_sample
+        self.bins = bins
+        self.native = NativeDriftEngine(threshold=threshold, p_value=p_value, small_sample=small_sample)
+
+    def run(self, ref: DatasetSketch, curr: DatasetSketch) -> dict:
+        drift_by_columns = {}
+        for col, ref_kll in ref.numeric.items():
+            if col in curr.numeric and ref_kll.n and curr.numeric[col].n:
+                drift_by_columns[col] = self.numeric_drift(col, ref, curr)
+        for col, ref_freq in ref.categorical.items():
+            if col in curr.categorical and ref_freq.n and curr.categorical[col].n:
+                drift_by_columns[col] = self.categorical_drift(col, ref_freq, curr.categorical[col])
+
+        n_drifted = sum(1 for d in drift_by_columns.values() if d["drift_detected"])
+        drift_share = n_drifted / len(drift_by_columns) if drift_by_columns else 0.0
+        return {
+            "drift_share": drift_share,
+            "dataset_drift": drift_share >= self.dataset_drift_share,
+            "number_of_drifted_columns": n_drifted,
+            "uncertain_columns": [c for c, d in drift_by_columns.items() if d["drift_uncertain"]],
+            "drift_by_columns": drift_by_columns,
+        }
+
+    def numeric_drift(self, col, ref: DatasetSketch, curr: DatasetSketch) -> dict:
+        a, b = ref.numeric[col], curr.numeric[col]
+        eps = a.rank_error + b.rank_error
+
+        # Both CDFs are step functions on the union of the retained items
+        points = np.unique(np.concatenate([a.weighted_items()[0], b.weighted_items()[0]]))
+        gap = np.abs(a.cdf(points) - b.cdf(points))
+        ks_stat = float(gap.max())
+        ks_lo, ks_hi = max(ks_stat - eps, 0.0), min(ks_stat + eps, 1.0)
+
+        # Wasserstein-1 = area between the CDFs; each CDF is off by at most its rank error everywhere
+        ref_std = max(ref.std(col), 0.001)
+        wasserstein = float(np.sum(gap[:-1] * np.diff(points))) / ref_std
+        w_err = eps * (points[-1] - points[0]) / ref_std
+
+        # PSI on reference deciles (estimated from the reference sketch)
+        cuts = np.unique(a.quantile(np.linspace(0, 1, self.bins + 1)[1:-1]))
+        ref_p = np.diff(np.concatenate([[0.0], _cdf_left(a, cuts), [1.0]]))
+        curr_p = np.diff(np.concatenate([[0.0], _cdf_left(b, cuts), [1.0]]))
+        psi = population_stability_index(ref_p, curr_p)
+        psi_err = psi_error(ref_p, curr_p, 2 * a.rank_error, 2 * b.rank_error)
+
+        if a.n <= self.small_sample:
+            score, lo, hi = (ks_p_value(d, a.n, b.n) for d in (ks_stat, ks_hi, ks_lo))
+            detected, uncertain, test = score < self.p_value, lo < self.p_value <= hi, "K-S p_value"
+        else:
+            score, lo, hi = wasserstein, max(wasserstein - w_err, 0.0), wasserstein + w_err
+            detected, uncertain, test = score >= self.threshold, lo < self.threshold <= hi, "Wasserstein distance (normed)"
+
+        return {
+            "column_name": col,
+            "column_type": "num",
+            "stattest_name": test,
+            "drift_score": float(score),
+            "drift_score_interval": [float(lo), float(hi)],
+            "drift_detected": bool(detected),
+            "drift_uncertain": bool(uncertain),
+            "ks_statistic": ks_stat,
+            "ks_p_value": ks_p_value(ks_stat, a.n, b.n),
+            "wasserstein_norm": wasserstein,
+            "psi": psi,
+            "psi_interval": [max(psi - psi_err, 0.0), psi + psi_err],
+        }
+
+    def categorical_drift(self, col, ref_freq, curr_freq) -> dict:
+        # Tracked values plus the untracked remainder of each side
+        keys = ref_freq.counts.index.union(curr_freq.counts.index, sort=False)
+        ref_counts = ref_freq.counts.reindex(keys, fill_value=0)
+        curr_counts = curr_freq.counts.reindex(keys, fill_value=0)
+        ref_counts[OTHER] = ref_freq.n - ref_counts.sum()
+        curr_counts[OTHER] = curr_freq.n - curr_counts.sum()
+        keep = (ref_counts > 0) | (curr_counts > 0)
+        ref_counts, curr_counts = ref_counts[keep], curr_counts[keep]
+
+        stats = self.native.categorical_drift(
+            [col], [(ref_counts.index.to_numpy(), ref_counts.to_numpy())], [curr_counts]
+        )[col]
+
+        ref_p = ref_counts.to_numpy() / ref_freq.n
+        curr_p = curr_counts.to_numpy() / curr_freq.n
+        psi_err = psi_error(ref_p, curr_p, ref_freq.error_bound / ref_freq.n, curr_freq.error_bound / curr_freq.n)
+        psi = stats["psi"]
+
+        # Mass spread over values neither sketch tracks is scored as one bucket, which can hide drift inside it
+        untracked = float(max(ref_counts.get(OTHER, 0) / ref_freq.n, curr_counts.get(OTHER, 0) / curr_freq.n))
+
+        if stats["stattest_name"] == "Jensen-Shannon distance":
+            lo, hi = js_interval(ref_p, curr_p, ref_freq.error_bound / ref_freq.n, curr_freq.error_bound / curr_freq.n)
+            uncertain = lo < self.threshold <= hi or (untracked > 0 and not stats["drift_detected"])
+        else:
+            # Chi-square / z-test on counts that are exact when the sketch never evicted anything
+            lo = hi = stats["drift_score"]
+            uncertain = bool(ref_freq.error_bound or curr_freq.error_bound) and stats["drift_score"] < self.p_value
+        stats.update({
+            "drift_score_interval": [float(lo), float(hi)],
+            "drift_uncertain": bool(uncertain),
+            "psi_interval": [max(psi - psi_err, 0.0), psi + psi_err],
+            "untracked_share": untracked,
+        })
+        return stats
+
+
+def _cdf_left(sketch, x):
+    """Estimated fraction of values < x (bins are [c_i, c_i+1), like bin_counts_sorted)."""
+    items, cum = sketch.weighted_items()
+    idx = np.searchsorted(items, x, side="left")
+    return np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0) / cum[-1]
+
+
+def js_interval(ref_p, curr_p, ref_err, curr_err):
+    """
+    (lo, hi) Jensen-Shannon distance for per-bin probability errors ref_err / curr_err: first-order error of the
+    divergence (d/dq_i = log(q_i / m_i) / 2), carried through the square root.
+    """
+    ref_p = np.maximum(ref_p, PSI_EPS)
+    curr_p = np.maximum(curr_p, PSI_EPS)
+    mid = (ref_p + curr_p) / 2
+    divergence = float(np.sum(ref_p * np.log(ref_p / mid) + curr_p * np.log(curr_p / mid)) / 2)
+    err = float(np.sum(np.abs(np.log(curr_p / mid))) * curr_err + np.sum(np.abs(np.log(ref_p / mid))) * ref_err) / 2
+    return float(np.sqrt(max(divergence - err, 0.0))), float(np.sqrt(max(divergence + err, 0.0)))
+
+
+def psi_error(ref_p, curr_p, ref_err, curr_err):
+    """First-order PSI error for per-bin probability errors ref_err / curr_err."""
+    ref_p = np.maximum(ref_p, PSI_EPS)
+    curr_p = np.maximum(curr_p, PSI_EPS)
+    d_curr = np.log(curr_p / ref_p) + 1 - ref_p / curr_p
+    d_ref = -np.log(curr_p / ref_p) + 1 - curr_p / ref_p
+    return float(np.sum(np.abs(d_curr)) * curr_err + np.sum(np.abs(d_ref)) * ref_err)
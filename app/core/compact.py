@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from app.config import INGEST_CATEGORY_MAX_RATIO
+
+INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """In-memory size of a DataFrame, string payloads included."""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def _int_type(lo, hi):
+    """Narrowest signed integer type holding [lo, hi] (None if even int64 cannot)."""
+    for t in INT_TYPES:
+        info = np.iinfo(t)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(t)
+    return None
+
+
+def _sorted_values(values):
+    try:
+        return list(pd.Index(values).sort_values())
+    except TypeError:
+        return list(values)  # Mixed types: order of appearance
+
+
+def _is_text(dtype):
+    return isinstance(dtype, pd.CategoricalDtype) or dtype == object or pd.api.types.is_string_dtype(dtype)
+
+
+class CompactSchema:
+    """
+    Compact dtypes inferred once from the reference and applied to both sides of an analysis.
+    - integers: the narrowest signed type holding the reference range
+    - floats: float32 when every reference value survives the round trip (counts, rounded amounts)
+    - text: category dtype whose dictionary is the reference's sorted values. The current side keeps the
+      same codes for shared values and appends the values the reference never had.
+      Columns with more than `max_category_ratio` distinct values per row (IDs, free text) stay text.
+    - bool is already one byte and is left alone
+    Encoding never changes a value: a current-side column the narrowed type cannot hold is widened instead.
+    """
+    def __init__(self, dtypes: dict):
+        self.dtypes = dtypes  # column -> target dtype (absent: kept as parsed)
+
+    @classmethod
+    def infer(cls, df: pd.DataFrame, max_category_ratio=INGEST_CATEGORY_MAX_RATIO):
+        dtypes = {}
+        for col in df.columns:
+            s = df[col]
+            if s.empty:
+                continue
+            if isinstance(s.dtype, np.dtype) and s.dtype.kind in "iu":
+                target = _int_type(int(s.min()), int(s.max()))
+                if target is not None and target != s.dtype:
+                    dtypes[col] = target
+            elif s.dtype == np.float64:
+                values = s.to_numpy()
+                with np.errstate(over="ignore"):
+                    if np.array_equal(values.astype(np.float32).astype(np.float64), values, equal_nan=True):
+                        dtypes[col] = np.dtype(np.float32)
+            elif _is_text(s.dtype):
+                values = s.dropna().unique()
+                if len(values) <= max_category_ratio * len(s):
+                    dtypes[col] = pd.CategoricalDtype(_sorted_values(values))
+        return cls(dtypes)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame({col: self._cast(df[col], self.dtypes.get(col)) for col in df.columns}, index=df.index)
+
+    @staticmethod
+    def _cast(s: pd.Series, dtype):
+        if dtype is None or s.dtype == dtype:
+            return s
+        if isinstance(dtype, pd.CategoricalDtype):
+            if not _is_text(s.dtype):
+                return s
+            new = pd.Index(s.dropna().unique()).difference(dtype.categories, sort=False)
+            if len(new):
+                dtype = pd.CategoricalDtype(list(dtype.categories) + _sorted_values(new))
+            return s.astype(dtype)
+        if not isinstance(s.dtype, np.dtype):
+            return s
+        if dtype.kind == "i" and s.dtype.kind in "iu":
+            if len(s) and not (np.iinfo(dtype).min <= s.min() and s.max() <= np.iinfo(dtype).max):
+                dtype = _int_type(int(s.min()), int(s.max())) or s.dtype
+            return s.astype(dtype)
+        if dtype == np.float32 and s.dtype == np.float64:
+            values = s.to_numpy()
+            with np.errstate(over="ignore"):
+                narrow = values.astype(np.float32)
+            if np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+                return pd.Series(narrow, index=s.index, name=s.name)
+        return s
+
+
+def compact_pair(ref_df: pd.DataFrame, curr_df: pd.DataFrame, max_category_ratio=INGEST_CATEGORY_MAX_RATIO):
+    """Encodes both sides with the reference's schema. Returns (ref, curr, {'raw_bytes', 'compact_bytes'})."""
+    raw = frame_nbytes(ref_df) + frame_nbytes(curr_df)
+    schema = CompactSchema.infer(ref_df, max_category_ratio)
+    ref_df, curr_df = schema.apply(ref_df), schema.apply(curr_df)
+    return ref_df, curr_df, {"raw_bytes": raw, "compact_bytes": frame_nbytes(ref_df) + frame_nbytes(curr_df)}
@@ -1,29 +1,103 @@
 import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import Future
+import base64
+import json
 import os
+import queue
+import threading
+import time
 
-DB_PATH = "modelguard.db"
+from app.config import DB_BATCH_MAX, DB_BATCH_WINDOW_MS, DB_PATH, HISTORY_MAX_PAGE, HISTORY_PAGE_SIZE
+from app.core.sql_runner import SQLRunner
+
+# Prepared statements: constant SQL text so sqlite3's per-connection statement cache reuses them
+SQL_LAST_ACTION = "SELECT timestamp FROM run_history WHERE triggered_action != 'NO ACTION' AND model_id IS ? ORDER BY timestamp DESC LIMIT 1"
+SQL_VERSION = "SELECT value FROM production_state WHERE key = ?"
+SQL_SEED_VERSION = "INSERT OR IGNORE INTO production_state (key, value, updated_at) VALUES (?, ?, ?)"
+SQL_INSERT_RUN = "INSERT INTO run_history (timestamp, risk_score, drift_share, revenue_at_risk, triggered_action, strategy, model_id) VALUES (?, ?, ?, ?, ?, ?, ?)"
+SQL_INSERT_CACHE_HIT = "INSERT INTO cache_hits (timestamp, result_key, run_timestamp, triggered_action, model_id) VALUES (?, ?, ?, ?, ?)"
+SQL_HISTORY_PAGE = (
+    "SELECT * FROM run_history WHERE timestamp >= ? AND (timestamp, id) < (?, ?) "
+    "ORDER BY timestamp DESC, id DESC LIMIT ?"
+)
+SQL_FEATURE_HISTORY = (
+    "SELECT r.timestamp, r.id AS run_id, d.score, d.detected FROM feature_drift d JOIN run_history r ON r.id = d.run_id "
+    "WHERE d.feature_id = (SELECT id FROM features WHERE name = ?) AND r.timestamp >= ? AND (r.timestamp, r.id) < (?, ?) "
+    "ORDER BY r.timestamp DESC, r.id DESC LIMIT ?"
+)
+SQL_RUN_FEATURES = "SELECT d.run_id, f.name, d.score, d.detected FROM feature_drift d JOIN features f ON f.id = d.feature_id WHERE d.run_id IN ({})"
+SQL_INSERT_FEATURE = "INSERT OR IGNORE INTO features (name) VALUES (?)"
+SQL_INSERT_FEATURE_DRIFT = "INSERT INTO feature_drift (feature_id, run_id, score, detected) VALUES (?, ?, ?, ?)"
+
+# Rollup periods: strftime format of the period a timestamp falls in
+ROLLUP_BUCKETS = {"hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d"}
+# Open time range bounds (timestamps are stored as 'YYYY-MM-DD HH:MM:SS.ffffff' text and compared as such)
+MIN_TIME, MAX_TIME = "0000-01-01 00:00:00", "9999-12-31 23:59:59"
+
+# WAL lets readers run alongside the single writer; NORMAL sync is durable across app crashes in WAL mode
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",      # 64 MB page cache per connection
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped reads
+)
+
+# Tables whose writes bump a counter in table_versions (lets /api/sql cache results until they change)
+VERSIONED_TABLES = ("run_history", "production_state", "features", "feature_drift", "run_rollups", "feature_rollups", "cache_hits")
 
 class DatabaseEngine:
-    def __init__(self):
-        # check_same_thread=False is required for FastAPI
-        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        self.cursor = self.conn.cursor()
+    """
+    SQLite state store.
+    - One connection per thread (and per process after a fork), so no cursor is ever shared
+    - Audit writes go through a single writer thread that group-commits whatever is queued
+    """
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._writes = queue.Queue()
+        self._writer = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+        self.analyst_store = None  # Set by AnalystStore: publishes reference_table / current_table as views
+        self.sql = SQLRunner(self)
         self._init_tables()
 
+    # ------------------------------------------------------------------
+    # CONNECTIONS
+    # ------------------------------------------------------------------
+    @property
+    def conn(self):
+        """This thread's connection (opened on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn, self._local.pid = conn, os.getpid()
+            self._local.views = {}  # Analyst views attached to this connection
+        return conn
+
+    def _connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.path, timeout=5.0, cached_statements=256, uri=True, check_same_thread=check_same_thread)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
     def _init_tables(self):
+        conn = self.conn
         # 1. Production State (Versioning)
-        self.cursor.execute('''
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS production_state (
                 key TEXT PRIMARY KEY,
                 value TEXT,
                 updated_at DATETIME
             )
         ''')
-        
+
         # 2. Run History (Audit Logs)
-        self.cursor.execute('''
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS run_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp DATETIME,
@@ -31,36 +105,212 @@ class DatabaseEngine:
                 drift_share REAL,
                 revenue_at_risk REAL,
                 triggered_action TEXT,
-                strategy TEXT
+                strategy TEXT,
+                model_id TEXT
             )
         ''')
-        
+
         # --- AUTO-MIGRATION (The Fix for your Error) ---
         # Checks if 'strategy' column exists, if not, adds it.
         try:
-            self.cursor.execute("SELECT strategy FROM run_history LIMIT 1")
+            conn.execute("SELECT strategy FROM run_history LIMIT 1")
         except sqlite3.OperationalError:
             print("⚠️ Migrating Database: Adding 'strategy' column...")
-            self.cursor.execute("ALTER TABLE run_history ADD COLUMN strategy TEXT")
-            self.conn.commit()
+            conn.execute("ALTER TABLE run_history ADD COLUMN strategy TEXT")
+            conn.commit()
         # -----------------------------------------------
+        # Runs of the scheduled models carry their model_id (NULL: the default model behind /api/analyze)
+        try:
+            conn.execute("SELECT model_id FROM run_history LIMIT 1")
+        except sqlite3.OperationalError:
+            print("⚠️ Migrating Database: Adding 'model_id' column...")
+            conn.execute("ALTER TABLE run_history ADD COLUMN model_id TEXT")
+            conn.commit()
+
+        # 3. Indexes: time-range scans, and the per-model cooldown lookup (partial: only runs that triggered an action)
+        conn.execute("CREATE INDEX IF NOT EXISTS run_history_timestamp ON run_history (timestamp)")
+        conn.execute("DROP INDEX IF EXISTS run_history_actions")  # Superseded by the per-model index
+        conn.execute("CREATE INDEX IF NOT EXISTS run_history_model_actions ON run_history (model_id, timestamp) WHERE triggered_action != 'NO ACTION'")
+
+        # 4. Per-feature drift score of every run (names interned in `features`; clustered by feature for time series)
+        conn.execute("CREATE TABLE IF NOT EXISTS features (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feature_drift (
+                feature_id INTEGER NOT NULL,
+                run_id INTEGER NOT NULL,
+                score REAL,
+                detected INTEGER,
+                PRIMARY KEY (feature_id, run_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS feature_drift_run ON feature_drift (run_id)")
+
+        # 5. Hourly / daily rollups, updated by triggers inside the inserting transaction
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS run_rollups (
+                bucket TEXT NOT NULL,
+                period TEXT NOT NULL,
+                runs INTEGER NOT NULL,
+                actions INTEGER NOT NULL,
+                sum_risk REAL, max_risk REAL,
+                sum_drift_share REAL, max_drift_share REAL,
+                sum_revenue REAL,
+                PRIMARY KEY (bucket, period)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feature_rollups (
+                bucket TEXT NOT NULL,
+                feature_id INTEGER NOT NULL,
+                period TEXT NOT NULL,
+                runs INTEGER NOT NULL,
+                detected INTEGER NOT NULL,
+                sum_score REAL, max_score REAL,
+                PRIMARY KEY (bucket, feature_id, period)
+            ) WITHOUT ROWID
+        ''')
+        if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM run_rollups) AND EXISTS (SELECT 1 FROM run_history)").fetchone()[0]:
+            print("⚠️ Migrating Database: Building run history rollups...")
+            for bucket, fmt in ROLLUP_BUCKETS.items():
+                conn.execute(f'''
+                    INSERT OR IGNORE INTO run_rollups
+                    SELECT '{bucket}', strftime('{fmt}', timestamp), count(*), sum(triggered_action != 'NO ACTION'),
+                           sum(risk_score), max(risk_score), sum(drift_share), max(drift_share), sum(revenue_at_risk)
+                    FROM run_history GROUP BY 2
+                ''')
+        for bucket, fmt in ROLLUP_BUCKETS.items():
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS run_history_rollup_{bucket} AFTER INSERT ON run_history
+                BEGIN
+                    INSERT INTO run_rollups VALUES (
+                        '{bucket}', strftime('{fmt}', NEW.timestamp), 1, NEW.triggered_action != 'NO ACTION',
+                        NEW.risk_score, NEW.risk_score, NEW.drift_share, NEW.drift_share, NEW.revenue_at_risk)
+                    ON CONFLICT (bucket, period) DO UPDATE SET
+                        runs = runs + 1, actions = actions + excluded.actions,
+                        sum_risk = sum_risk + excluded.sum_risk, max_risk = max(max_risk, excluded.max_risk),
+                        sum_drift_share = sum_drift_share + excluded.sum_drift_share, max_drift_share = max(max_drift_share, excluded.max_drift_share),
+                        sum_revenue = sum_revenue + excluded.sum_revenue;
+                END
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS feature_drift_rollup_{bucket} AFTER INSERT ON feature_drift
+                BEGIN
+                    INSERT INTO feature_rollups
+                    SELECT '{bucket}', NEW.feature_id, strftime('{fmt}', timestamp), 1, NEW.detected, NEW.score, NEW.score
+                    FROM run_history WHERE id = NEW.run_id
+                    ON CONFLICT (bucket, feature_id, period) DO UPDATE SET
+                        runs = runs + 1, detected = detected + excluded.detected,
+                        sum_score = sum_score + excluded.sum_score, max_score = max(max_score, excluded.max_score);
+                END
+            ''')
+
+        # 6. Repeated analyses answered from the result cache: audited here instead of as duplicate runs
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_hits (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME,
+                result_key TEXT,
+                run_timestamp TEXT,
+                triggered_action TEXT,
+                model_id TEXT
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_hits_timestamp ON cache_hits (timestamp)")
+
+        # 7. Table versions (bumped by triggers on every write)
+        conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)")
+        for table in VERSIONED_TABLES:
+            conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table}
+                    BEGIN UPDATE table_versions SET version = version + 1 WHERE name = '{table}'; END
+                ''')
 
         # Seed initial model version if not exists
-        self.cursor.execute("INSERT OR IGNORE INTO production_state (key, value, updated_at) VALUES ('model_version', 'v1.0.4', ?)", (datetime.now(),))
-        self.conn.commit()
+        conn.execute("INSERT OR IGNORE INTO production_state (key, value, updated_at) VALUES ('model_version', 'v1.0.4', ?)", (datetime.now(),))
+        conn.commit()
+
+    # ------------------------------------------------------------------
+    # WRITER (group commit)
+    # ------------------------------------------------------------------
+    def _submit_write(self, sql, params) -> Future:
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive() or self._writer_pid != os.getpid():
+                self._writes = queue.Queue()
+                self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+                self._writer_pid = os.getpid()
+                self._writer.start()
+        future = Future()
+        self._writes.put((sql, params, future))
+        return future
+
+    def _write_loop(self):
+        writes = self._writes
+        while True:
+            batch = [writes.get()]
+            # Collect everything that arrives within the batch window into the same transaction
+            deadline = time.monotonic() + DB_BATCH_WINDOW_MS / 1000
+            while len(batch) < DB_BATCH_MAX:
+                timeout = deadline - time.monotonic()
+                try:
+                    batch.append(writes.get(timeout=timeout) if timeout > 0 else writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            conn = self.conn
+            try:
+                with conn:  # One transaction / one fsync for the whole batch
+                    conn.execute("BEGIN")
+                    outcomes = [self._apply(conn, sql, params) for sql, params, _ in batch]
+            except Exception as e:  # The commit itself failed: nothing in the batch was written
+                outcomes = [(False, e)] * len(batch)
+            for (_, _, future), (ok, value) in zip(batch, outcomes):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    @staticmethod
+    def _apply(conn, sql, params):
+        """
+        (ok, result or exception) of one write, inside a savepoint: a failing write (constraint error...) is rolled
+        back alone, and the other requests' writes in the batch still commit.
+        A write is one statement, or a callable(conn, params) for multi-statement writes.
+        """
+        conn.execute("SAVEPOINT write")
+        try:
+            if callable(sql):
+                result = sql(conn, params)
+            else:
+                conn.execute(sql, params)
+                result = True
+        except Exception as e:
+            conn.execute("ROLLBACK TO write")
+            conn.execute("RELEASE write")
+            return False, e
+        conn.execute("RELEASE write")
+        return True, result
 
-    def check_cooldown(self, hours=24):
+    def flush(self):
+        """Blocks until every queued write is committed."""
+        if self._writer is not None and self._writer.is_alive():
+            self._submit_write("SELECT 1", ()).result()
+
+    # ------------------------------------------------------------------
+    # QUERIES
+    # ------------------------------------------------------------------
+    def check_cooldown(self, hours=24, model_id=None):
         """
-        Prevents retraining spam. Returns True if the last critical action 
-        happened within the 'hours' window.
+        Prevents retraining spam. Returns True if the last critical action
+        (of this model) happened within the 'hours' window.
         """
         try:
-            self.cursor.execute("SELECT timestamp FROM run_history WHERE triggered_action != 'NO ACTION' ORDER BY timestamp DESC LIMIT 1")
-            last_run = self.cursor.fetchone()
-            
-            if not last_run: 
+            last_run = self.conn.execute(SQL_LAST_ACTION, (model_id,)).fetchone()
+
+            if not last_run:
                 return False, None
-            
+
             last_time = datetime.fromisoformat(last_run[0])
             if datetime.now() - last_time < timedelta(hours=hours):
                 return True, last_time
@@ -68,10 +318,9 @@ class DatabaseEngine:
         except Exception:
             return False, None
 
-    def get_current_version(self):
+    def get_current_version(self, model_id=None):
         try:
-            self.cursor.execute("SELECT value FROM production_state WHERE key='model_version'")
-            res = self.cursor.fetchone()
+            res = self.conn.execute(SQL_VERSION, (_version_key(model_id),)).fetchone()
             return res[0] if res else "v1.0.0"
         except:
             return "v1.0.0"
@@ -84,25 +333,137 @@ class DatabaseEngine:
             print(f"SQL Storage Error: {e}")
 
     def execute_sql(self, query: str):
-        """Runs arbitrary SQL queries."""
+        """Runs arbitrary SQL queries (bounded by the SQLRunner limits; rows beyond SQL_MAX_ROWS are dropped)."""
         try:
-            return pd.read_sql_query(query, self.conn).to_dict(orient='records')
+            return self.sql.run(query, page_size=self.sql.max_rows)["data"]
         except Exception as e:
             return {"error": str(e)}
 
-    def log_run(self, drift_share, weighted_score, revenue_risk, action_plan):
-        """Audit Log."""
+    def seed_version(self, model_id, version):
+        """Records a model's production version unless one is already stored."""
+        self._submit_write(SQL_SEED_VERSION, (_version_key(model_id), version, datetime.now())).result()
+
+    def log_run(self, drift_share, weighted_score, revenue_risk, action_plan, wait=True, feature_scores=None, model_id=None):
+        """
+        Audit Log. Group-committed by the writer thread; wait=False returns before the commit.
+        `feature_scores` ({feature: (drift score, detected)}) is stored per run in feature_drift, in the same transaction.
+        """
         try:
-            self.cursor.execute(
-                "INSERT INTO run_history (timestamp, risk_score, drift_share, revenue_at_risk, triggered_action, strategy) VALUES (?, ?, ?, ?, ?, ?)",
-                (datetime.now(), weighted_score, drift_share, revenue_risk, action_plan['action'], action_plan.get('data_strategy', 'N/A'))
-            )
-            self.conn.commit()
+            row = (datetime.now(), weighted_score, drift_share, revenue_risk, action_plan['action'], action_plan.get('data_strategy', 'N/A'), model_id)
+            if feature_scores:
+                future = self._submit_write(_insert_run_with_features, (row, feature_scores))
+            else:
+                future = self._submit_write(SQL_INSERT_RUN, row)
+            if wait:
+                future.result()
+        except Exception as e:
+            print(f"❌ DB Log Error: {e}")
+
+    def log_cache_hit(self, result_key, result, wait=True, model_id=None):
+        """Audits a repeated analysis served from the result cache: when the served run concluded and what it decided."""
+        try:
+            row = (datetime.now(), result_key, result.get("meta", {}).get("timestamp"), result.get("automation", {}).get("action"), model_id)
+            future = self._submit_write(SQL_INSERT_CACHE_HIT, row)
+            if wait:
+                future.result()
         except Exception as e:
             print(f"❌ DB Log Error: {e}")
 
     def get_history(self):
+        """The 10 most recent runs."""
         try:
-            return pd.read_sql_query("SELECT * FROM run_history ORDER BY timestamp DESC LIMIT 10", self.conn).to_dict(orient='records')
-        except:
-            return []
\ No newline at end of file
+            return self.history_page(limit=10)["data"]
+        except Exception:
+            return []
+
+    def history_page(self, start=None, end=None, limit=HISTORY_PAGE_SIZE, cursor=None, include_features=False):
+        """
+        Runs in [start, end), newest first: {'data', 'next_cursor'}. Keyset-paginated on (timestamp, id), so a page
+        costs the same at any depth. `include_features` adds each run's per-feature drift scores.
+        """
+        lo, hi = _time_bound(start, MIN_TIME), _time_bound(end, MAX_TIME)
+        after = _decode_cursor(cursor) if cursor else (hi, -1)
+        limit = max(1, min(int(limit), HISTORY_MAX_PAGE))
+        rows = self._query(SQL_HISTORY_PAGE, (lo, *after, limit + 1))
+        page = rows[:limit]
+        if include_features and page:
+            by_run = {r["id"]: {} for r in page}
+            for run_id, name, score, detected in self.conn.execute(SQL_RUN_FEATURES.format(",".join("?" * len(by_run))), list(by_run)):
+                by_run[run_id][name] = {"score": score, "detected": bool(detected)}
+            for r in page:
+                r["features"] = by_run[r["id"]]
+        return {"data": page, "next_cursor": _encode_cursor(page[-1]["timestamp"], page[-1]["id"]) if len(rows) > limit else None}
+
+    def feature_history(self, feature, start=None, end=None, limit=HISTORY_MAX_PAGE, cursor=None):
+        """One feature's drift score per run in [start, end), newest first: {'data', 'next_cursor'}."""
+        lo, hi = _time_bound(start, MIN_TIME), _time_bound(end, MAX_TIME)
+        after = _decode_cursor(cursor) if cursor else (hi, -1)
+        limit = max(1, min(int(limit), HISTORY_MAX_PAGE))
+        rows = self._query(SQL_FEATURE_HISTORY, (feature, lo, *after, limit + 1))
+        page = rows[:limit]
+        for r in page:
+            r["detected"] = bool(r["detected"])
+        return {"data": page, "next_cursor": _encode_cursor(page[-1]["timestamp"], page[-1]["run_id"]) if len(rows) > limit else None}
+
+    def rollups(self, bucket="day", start=None, end=None, feature=None):
+        """
+        Pre-aggregated history per hour or day, oldest first. Both bounds are truncated to their bucket: `start`
+        includes its whole hour / day and `end` is exclusive, as in history_page. With `feature`: that feature's runs,
+        drift detections and scores.
+        """
+        if bucket not in ROLLUP_BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(ROLLUP_BUCKETS)}")
+        fmt = ROLLUP_BUCKETS[bucket]
+        lo, hi = _time_bound(start, MIN_TIME), _time_bound(end, MAX_TIME)
+        if feature is None:
+            return self._query(f"""
+                SELECT period, runs, actions, sum_risk / runs AS avg_risk, max_risk,
+                       sum_drift_share / runs AS avg_drift_share, max_drift_share, sum_revenue AS revenue_at_risk
+                FROM run_rollups WHERE bucket = ? AND period >= strftime('{fmt}', ?) AND period < strftime('{fmt}', ?) ORDER BY period LIMIT ?
+            """, (bucket, lo, hi, HISTORY_MAX_PAGE))
+        return self._query(f"""
+            SELECT period, runs, detected, sum_score / runs AS avg_score, max_score FROM feature_rollups
+            WHERE bucket = ? AND feature_id = (SELECT id FROM features WHERE name = ?) AND period >= strftime('{fmt}', ?) AND period < strftime('{fmt}', ?)
+            ORDER BY period LIMIT ?
+        """, (bucket, feature, lo, hi, HISTORY_MAX_PAGE))
+
+    def _query(self, sql, params):
+        cur = self.conn.execute(sql, params)
+        columns = [c[0] for c in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def _insert_run_with_features(conn, params):
+    """Writer-side: the run row, then one feature_drift row per feature (names interned first). Returns the run id."""
+    row, feature_scores = params
+    run_id = conn.execute(SQL_INSERT_RUN, row).lastrowid
+    names = list(feature_scores)
+    conn.executemany(SQL_INSERT_FEATURE, [(n,) for n in names])
+    ids = dict(conn.execute(f"SELECT name, id FROM features WHERE name IN ({','.join('?' * len(names))})", names).fetchall())
+    conn.executemany(SQL_INSERT_FEATURE_DRIFT, [
+        (ids[n], run_id, None if score is None else float(score), int(bool(detected))) for n, (score, detected) in feature_scores.items()
+    ])
+    return run_id
+
+
+def _version_key(model_id):
+    return "model_version" if model_id is None else f"model_version:{model_id}"
+
+
+def _time_bound(value, default):
+    """ISO date/datetime -> the stored timestamp text format (ValueError if unparseable)."""
+    if value in (None, ""):
+        return default
+    return str(datetime.fromisoformat(str(value)))
+
+
+def _encode_cursor(timestamp, run_id):
+    return base64.urlsafe_b64encode(json.dumps([timestamp, run_id]).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        timestamp, run_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(timestamp), int(run_id)
+    except Exception:
+        raise ValueError("Malformed cursor") from None
@@ -1,12 +1,21 @@
-import pandas as pd
+import hashlib
 import json
+import pandas as pd
 import numpy as np
 from datetime import datetime
-from scipy.stats import ks_2samp  # For Statistical Rigor (P-Values)
 
-# Evidently Imports
-from evidently.report import Report
-from evidently.metrics import DatasetDriftMetric, DataDriftTable, ColumnDriftMetric
+from app.config import (APPROX_FREQ_ERROR, APPROX_RANK_ERROR, DRIFT_DATASET_SHARE, DRIFT_ENGINE, DRIFT_THRESHOLD, FAIRNESS_INTERSECTIONS,
+                        INGEST_COMPACT, RIGOR_ALPHA, RIGOR_CORRECTION, RIGOR_MAX_ROWS, RIGOR_RESAMPLES, SAMPLE_CONFIDENCE,
+                        SAMPLE_ERROR, SAMPLE_ESCALATE)
+from app.core.approx_drift import ApproxDriftEngine
+from app.core.fairness import PROTECTED_COLUMNS, FairnessEngine, disparity_issues
+from app.core.metrics import span
+from app.core.native_drift import NativeDriftEngine
+from app.core.parallel import ColumnExecutor
+from app.core.profile import ReferenceProfile, ks_2samp_presorted  # For Statistical Rigor (P-Values)
+from app.core.resampling import ResamplingTests, adjust_p_values
+from app.core.sampling import StratifiedSampler
+from app.core.sketches import DatasetSketch
 
 # --- ENTERPRISE KNOWLEDGE GRAPH ---
 # Defines business importance and actions for specific features
@@ -20,120 +29,286 @@ FEATURE_CONFIG = {
     "education-num": {"weight": 1.5, "impact": "MEDIUM", "action": "Monitor Feature"}
 }
 
+# Decision gate thresholds; a scheduled model can override any of them
+DEFAULT_THRESHOLDS = {
+    "drift": DRIFT_THRESHOLD,                     # Native engine distance tests (Wasserstein, PSI)
+    "dataset_drift_share": DRIFT_DATASET_SHARE,
+    "target_drift": 0.1,                          # Label shift above this -> emergency rollback
+    "retrain": 60,                                # Weighted risk score for full retraining
+    "fine_tune": 20,                              # ... and for fine-tuning
+}
+
+def config_version(engine=DRIFT_ENGINE, sample_error=SAMPLE_ERROR, feature_config=None, thresholds=None):
+    """
+    Short hash of everything besides the data that shapes an analysis result: engine and its settings, decision
+    thresholds, the knowledge graph (FEATURE_CONFIG) and the fairness slices. Part of the result-cache key.
+    """
+    settings = {
+        "engine": engine, "compact": INGEST_COMPACT, "approx": [APPROX_RANK_ERROR, APPROX_FREQ_ERROR],
+        "sampling": [sample_error, SAMPLE_CONFIDENCE, SAMPLE_ESCALATE],
+        "thresholds": {**DEFAULT_THRESHOLDS, **(thresholds or {})},
+        "features": FEATURE_CONFIG if feature_config is None else feature_config,
+        "fairness": [PROTECTED_COLUMNS, FAIRNESS_INTERSECTIONS],
+        "rigor": [RIGOR_CORRECTION, RIGOR_ALPHA, RIGOR_RESAMPLES, RIGOR_MAX_ROWS],
+    }
+    return hashlib.blake2b(json.dumps(settings, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+
 class FairnessMonitor:
     """
     The Auditor: Checks for Disparate Impact on protected groups.
     Metric: Disparate Impact Ratio (DIR) < 0.8 is the standard threshold.
+    Kept for single-column checks; run_analysis audits every slice in one FairnessEngine pass.
     """
     def check_bias(self, df: pd.DataFrame, protected_col: str, target_col: str):
         if protected_col not in df.columns or target_col not in df.columns:
             return []
+        return FairnessEngine(protected_columns=[protected_col], intersections=[]).scan(df, target_col)["issues"]
 
-        # Convert target to binary (assuming >50K is the "Positive" outcome)
-        try:
-            # Flexible logic for different datasets
-            df['y_bin'] = df[target_col].apply(lambda x: 1 if str(x).strip() in ['>50K', '1', 'yes'] else 0)
-        except:
-            return []
+def build_evidently_report(ref_df: pd.DataFrame, curr_df: pd.DataFrame):
+    """Runs the Evidently drift Report (imported lazily: it is only needed for this)."""
+    from evidently.report import Report
+    from evidently.metrics import DatasetDriftMetric, DataDriftTable, ColumnDriftMetric
 
-        base_rate = df['y_bin'].mean()
-        if base_rate == 0: return []
+    metrics = [DatasetDriftMetric(), DataDriftTable()]
+    if 'class' in ref_df.columns and 'class' in curr_df.columns:
+        metrics.append(ColumnDriftMetric(column_name="class"))  # Explicitly track Target Drift
+    report = Report(metrics=metrics)
+    report.run(reference_data=ref_df, current_data=curr_df)
+    return report
 
-        issues = []
-        # Calculate positive rate for each group
-        groups = df.groupby(protected_col)['y_bin'].agg(['mean', 'count'])
-        
-        for group, stats in groups.iterrows():
-            if stats['count'] < 50: continue # Skip statistically insignificant sample sizes
-            
-            group_rate = stats['mean']
-            disparate_impact = group_rate / base_rate
-            
-            # 4/5ths Rule (80%): If a group succeeds <80% as often as the average -> Bias
-            if disparate_impact < 0.8:
-                issues.append({
-                    "group": str(group),
-                    "disparity": f"{disparate_impact:.2f}",
-                    "details": f"Group positive rate is {disparate_impact*100:.1f}% of the average."
-                })
-        
-        return issues
+def _ks_shard(ref_sorted, curr, columns, ref_counts):
+    """KS p-values for one shard of columns (runs in the ColumnExecutor)."""
+    p_values = {}
+    for j, col in enumerate(columns):
+        try:
+            stat, p_val = ks_2samp_presorted(ref_sorted[:ref_counts[j], j], curr[:, j])
+            if not np.isnan(p_val):
+                p_values[col] = p_val
+        except Exception:
+            pass
+    return p_values
+
+def feature_scores(drift_by_columns):
+    """{feature: (drift score, detected)} as kept in the run history."""
+    return {c: (d.get('drift_score'), d.get('drift_detected')) for c, d in drift_by_columns.items()}
 
 class DriftAnalyzer:
-    def __init__(self, db_engine=None):
-        self.report = Report(metrics=[
-            DatasetDriftMetric(),
-            DataDriftTable(),
-            ColumnDriftMetric(column_name="class") # Explicitly track Target Drift
-        ])
+    def __init__(self, db_engine=None, profile_cache=None, engine=DRIFT_ENGINE, executor=None, report_store=None,
+                 model_id=None, feature_config=None, thresholds=None, sample_error=SAMPLE_ERROR, escalate=SAMPLE_ESCALATE):
+        self.engine = engine  # "evidently" or "native" ("approx" analyses go through run_sketch_analysis)
+        self.executor = executor or ColumnExecutor()
+        self.report = None    # Evidently Report, only built by the evidently engine
         self.db = db_engine
-        self.fairness = FairnessMonitor()
+        self.profile_cache = profile_cache
+        self.report_store = report_store  # HTML is rendered lazily from here (GET /api/reports/{id})
+        self.fairness = FairnessEngine()
+        # Per-model knowledge graph and gate (scheduled models); None: the default model
+        self.model_id = model_id
+        self.feature_config = FEATURE_CONFIG if feature_config is None else feature_config
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        # Large uploads: drift measured on a stratified sample of the current rows (None: always every row).
+        # Native engine only: its sample bounds would not say anything about another engine's statistics
+        self.sampler = StratifiedSampler(sample_error) if sample_error and engine == "native" else None
+        self.escalate = escalate
+        # Multiple-testing correction of the KS p-values; opt-in permutation / bootstrap tests of every column
+        self.correction = RIGOR_CORRECTION
+        self.resampling = ResamplingTests(RIGOR_RESAMPLES) if RIGOR_RESAMPLES > 0 else None
 
-    def run_analysis(self, ref_df: pd.DataFrame, curr_df: pd.DataFrame):
+    def run_analysis(self, ref_df: pd.DataFrame, curr_df: pd.DataFrame, ref_profile: ReferenceProfile = None):
+        """
+        `ref_profile`: the reference already compiled (native engine; `ref_df` is then only used for the HTML report).
+        `ref_df` may also be a callable returning the rows (a stored reference), called only where rows are needed.
+        """
+        if callable(ref_df) and (self.engine != "native" or ref_profile is None):
+            ref_df = ref_df()  # Evidently and profile building read the rows
         # 1. INIT & STATE CHECK
-        in_cooldown, _ = self.db.check_cooldown() if self.db else (False, None)
-        current_version = self.db.get_current_version() if self.db else "v1.0.0"
+        with span("state_check"):
+            in_cooldown, current_version = self.model_state()
+        if ref_profile is None:
+            with span("reference_profile"):
+                ref_profile = self.profile_cache.get_or_build(ref_df) if self.profile_cache else ReferenceProfile.build(ref_df)
 
-        # 2. RUN EVIDENTLY (The Math)
-        try:
-            self.report.run(reference_data=ref_df, current_data=curr_df)
-            json_result = json.loads(self.report.json())
-        except:
-            # Fallback if 'class' column is missing
-            fallback = Report(metrics=[DatasetDriftMetric(), DataDriftTable()])
-            fallback.run(reference_data=ref_df, current_data=curr_df)
-            json_result = json.loads(fallback.json())
+        # 2-3. DRIFT MATH + RIGOR, on a stratified sample when the upload is larger than the error budget needs
+        sample = None
+        if self.sampler:
+            with span("sampling"):
+                sample = self.sampler.draw(curr_df)
+        if sample is None:
+            drift_share, drift_by_columns, target_drift, stat_significance = self._measure(ref_df, curr_df, ref_profile, self.engine)
+        else:
+            # Kolmogorov-limit p-values: scipy's exact unequal-n KS on a sample costs more than the whole native run
+            drift_share, drift_by_columns, target_drift, stat_significance = self._measure(None, sample.frame, ref_profile, "native", exact=False)
+
+        # 4. FAIRNESS AUDIT (The Ethics)
+        # One pass over the rows: per-column and intersectional slices from the same group cube
+        # Always on every row: the cube is one bincount, and small groups would fall under min_count in a sample
+        with span("fairness"):
+            fairness_issues = self.fairness.scan(curr_df, 'class')['issues']
+
+        sampling = None
+        if sample is not None:
+            sampling = self._bound_sample(sample, ref_profile, len(curr_df), drift_by_columns, fairness_issues, in_cooldown, current_version)
+            if sampling["escalated"]:
+                print(f"🔁 Sampled decision is not settled ({' / '.join(sampling['decision_range'])}): re-running on all {len(curr_df):,} rows")
+                with span("escalation"):
+                    drift_share, drift_by_columns, target_drift, stat_significance = self._measure(ref_df, curr_df, ref_profile, self.engine)
+
+        report_id = self.report_store.register(ref_df, curr_df, ref_fp=ref_profile.fingerprint) if self.report_store and ref_df is not None else None
+        result = self._conclude(len(curr_df), drift_share, drift_by_columns, target_drift, stat_significance, fairness_issues, in_cooldown, current_version, report_id)
+        if sampling:
+            result["sampling"] = sampling
+        # Permutation p-values and bootstrap intervals need the reference rows (not only its compiled profile)
+        if self.resampling and ref_df is not None:
+            with span("resampling"):
+                result["rigor"]["resampling"] = self.resampling.run(ref_df() if callable(ref_df) else ref_df, curr_df, correction=self.correction)
+        return result
+
+    def _measure(self, ref_df, curr_df, ref_profile, engine, exact=True):
+        """
+        (drift_share, drift_by_columns, target_drift, stat_significance) of `curr_df` against the reference.
+        `exact=False` (native only): Kolmogorov-limit KS p-values throughout, rigor included.
+        """
+        # 2. DRIFT MATH
+        if engine == "native":
+            with span("drift.native"):
+                summary = NativeDriftEngine(threshold=self.thresholds["drift"], dataset_drift_share=self.thresholds["dataset_drift_share"],
+                                            executor=self.executor, exact=exact).run(ref_profile, curr_df)
+            drift_share = summary['drift_share']
+            drift_by_columns = summary['drift_by_columns']
+            target_drift = drift_by_columns.get('class', {}).get('drift_score', 0.0)
+        else:
+            with span("drift.evidently"):
+                report = self._run_report(ref_df, curr_df)
+            with span("extraction"):
+                drift_share, drift_by_columns, target_drift = self._evidently_summary(report)
 
         # 3. STATISTICAL RIGOR (P-Values)
         # Verify drift with Kolmogorov-Smirnov Test (Non-parametric)
+        # Reference side comes pre-sorted from the (cached) reference profile
+        with span("ks_rigor"):
+            ks_cols = [c for c in ref_profile.numeric_columns if c in curr_df.columns]
+            # The native engine's exact p-values are reused; its Kolmogorov-limit ones are recomputed like ks_2samp
+            # unless the run asked for the limit
+            p_values = {c: drift_by_columns[c]['ks_p_value'] for c in ks_cols
+                        if c in drift_by_columns and (drift_by_columns[c].get('ks_exact') or not exact)}
+            pending = [c for c in ks_cols if c not in p_values]
+            if pending:
+                idx = [ref_profile.numeric_columns.index(c) for c in pending]
+                p_values.update(self.executor.run_sharded(
+                    _ks_shard,
+                    [ref_profile.numeric_matrix[:, idx], curr_df[pending].to_numpy(dtype=np.float64, na_value=np.nan)],
+                    [pending, ref_profile.numeric_counts[idx]],
+                ))
+
+            stat_significance = self._significant(ks_cols, p_values)
+        return drift_share, drift_by_columns, target_drift, stat_significance
+
+    def _bound_sample(self, sample, ref_profile, n_rows, drift_by_columns, fairness_issues, in_cooldown, current_version):
+        """
+        Score intervals of a sampled run and the decision at both ends of them (every score at its low-drift end,
+        then at its high-drift end). The run is escalated to all rows when the two decisions differ.
+        """
+        intervals = {c: sample.score_interval(c, d, ref_profile) for c, d in drift_by_columns.items()}
+        p_tests = {c for c, d in drift_by_columns.items() if d["stattest_name"].endswith("p_value")}  # Lower = more drift
+        cut = {c: 0.05 if c in p_tests else self.thresholds["drift"] for c in drift_by_columns}
+        uncertain = [c for c, (lo, hi) in intervals.items() if lo < cut[c] <= hi]
+
+        ends = []
+        for high in (False, True):
+            cols = {}
+            for col, d in drift_by_columns.items():
+                lo, hi = intervals[col]
+                score = (lo if high else hi) if col in p_tests else (hi if high else lo)
+                detected = score < cut[col] if col in p_tests else score >= cut[col]
+                cols[col] = {**d, "drift_score": score, "drift_detected": detected}
+            share = sum(d["drift_detected"] for d in cols.values()) / len(cols) if cols else 0.0
+            target = cols.get('class', {}).get('drift_score', 0.0)
+            weighted = self.assess_risk(n_rows, share, target, cols)[3]
+            action = self.make_decision(weighted, share, target, len(fairness_issues) > 0, in_cooldown, current_version)["action"]
+            ends.append((share, target, weighted, action))
+
+        (share_lo, target_lo, weighted_lo, action_lo), (share_hi, target_hi, weighted_hi, action_hi) = ends
+        return {
+            **sample.to_dict(),
+            "intervals": {c: [float(lo), float(hi)] for c, (lo, hi) in intervals.items()},
+            "uncertain_columns": uncertain,
+            "drift_share_interval": [share_lo, share_hi],
+            "target_drift_interval": sorted([float(target_lo), float(target_hi)]),
+            "weighted_score_interval": sorted([float(weighted_lo), float(weighted_hi)]),
+            "fairness_rows": n_rows,  # The fairness audit always sees every row
+            "decision_range": [action_lo, action_hi],
+            "escalated": self.escalate and action_lo != action_hi,
+        }
+
+    def run_sketch_analysis(self, ref_sketch: DatasetSketch, curr_sketch: DatasetSketch):
+        """Approximate analysis from two DatasetSketches: memory does not grow with the row count."""
+        # 1. INIT & STATE CHECK
+        with span("state_check"):
+            in_cooldown, current_version = self.model_state()
+
+        # 2. DRIFT MATH (scores carry error intervals)
+        with span("drift.approx"):
+            summary = ApproxDriftEngine().run(ref_sketch, curr_sketch)
+        drift_share = summary['drift_share']
+        drift_by_columns = summary['drift_by_columns']
+        target_drift = drift_by_columns.get('class', {}).get('drift_score', 0.0)
+
+        # 3. STATISTICAL RIGOR (approximate KS p-values)
+        ks_cols = [c for c, d in drift_by_columns.items() if 'ks_p_value' in d]
+        stat_significance = self._significant(ks_cols, {c: drift_by_columns[c]['ks_p_value'] for c in ks_cols})
+
+        # 4. FAIRNESS AUDIT from the sketched (group, label) counts
+        with span("fairness"):
+            fairness_issues = []
+            for p_col in PROTECTED_COLUMNS:
+                table = curr_sketch.groups.get(p_col)
+                if table:
+                    fairness_issues.extend(disparity_issues(p_col, list(table), *np.array(list(table.values())).T))
+
+        result = self._conclude(curr_sketch.n_rows, drift_share, drift_by_columns, target_drift, stat_significance, fairness_issues, in_cooldown, current_version, None)
+        result["approximation"] = {
+            "rank_error": curr_sketch.rank_error,
+            "frequency_error": curr_sketch.freq_error,
+            "uncertain_columns": summary['uncertain_columns'],
+            "intervals": {c: d['drift_score_interval'] for c, d in drift_by_columns.items()},
+        }
+        return result
+
+    def model_state(self):
+        """(in cooldown, production version) of this analyzer's model. Public for the streaming monitor's decisions."""
+        if not self.db:
+            return False, "v1.0.0"
+        return self.db.check_cooldown(model_id=self.model_id)[0], self.db.get_current_version(self.model_id)
+
+    def _significant(self, columns, p_values):
+        # Corrected over every column tested: at 0.05 each, 20 stable columns would average one false flag
+        tested = [c for c in columns if p_values.get(c) is not None]
+        adjusted = adjust_p_values([p_values[c] for c in tested], self.correction)
         stat_significance = []
-        for col in ref_df.select_dtypes(include=np.number).columns:
-            try:
-                stat, p_val = ks_2samp(ref_df[col], curr_df[col])
-                if p_val < 0.05: # Statistically Significant Drift
-                    stat_significance.append({
-                        "feature": col,
-                        "p_value": float(f"{p_val:.4e}")
-                    })
-            except: pass
+        for col, p_adj in zip(tested, adjusted):
+            if p_adj < RIGOR_ALPHA: # Statistically Significant Drift
+                stat_significance.append({
+                    "feature": col,
+                    "p_value": float(f"{p_values[col]:.4e}"),
+                    "p_adjusted": float(f"{p_adj:.4e}")
+                })
+        return stat_significance
 
-        # 4. FAIRNESS AUDIT (The Ethics)
-        fairness_issues = []
-        for p_col in ['sex', 'race', 'relationship']:
-            issues = self.fairness.check_bias(curr_df, p_col, 'class')
-            if issues:
-                for i in issues: i['feature'] = p_col
-                fairness_issues.extend(issues)
-
-        # 5. METRICS EXTRACTION
-        drift_metric = next(m for m in json_result['metrics'] if m['metric'] == 'DatasetDriftMetric')
-        drift_share = drift_metric['result']['drift_share']
-        
-        target_drift = 0.0
-        try:
-            tm = next(m for m in json_result['metrics'] if m['metric'] == 'ColumnDriftMetric' and m['result']['column_name'] == 'class')
-            target_drift = tm['result']['drift_score']
-        except: pass
+    def _conclude(self, n_rows, drift_share, drift_by_columns, target_drift, stat_significance, fairness_issues, in_cooldown, current_version, report_id):
+        # 5. RISK & DECISION
+        with span("decision"):
+            est_f1_drop, revenue_risk, leaderboard, weighted_score = self.assess_risk(n_rows, drift_share, target_drift, drift_by_columns)
+            reliability_status = "STABLE" if est_f1_drop < 0.05 else "DEGRADED"
 
-        # 6. RISK & DECISION
-        # Simulation: 0.1 target drift ~ 4% F1 Drop
-        est_f1_drop = target_drift * 0.4
-        reliability_status = "STABLE" if est_f1_drop < 0.05 else "DEGRADED"
-        
-        # Financial Risk Formula: Volume * Avg Cost ($150) * Est. Error Increase
-        revenue_risk = len(curr_df) * 150 * ((drift_share * 0.1) + est_f1_drop)
-        
-        leaderboard = self._get_enhanced_leaderboard(json_result)
-        weighted_score = self._calculate_weighted_score(leaderboard)
-        
-        decision = self._make_decision(weighted_score, drift_share, target_drift, len(fairness_issues) > 0, in_cooldown, current_version)
+            decision = self.make_decision(weighted_score, drift_share, target_drift, len(fairness_issues) > 0, in_cooldown, current_version)
 
-        # 7. LOGGING
+        # 6. LOGGING
         if self.db and not in_cooldown:
-            self.db.log_run(drift_share, weighted_score, revenue_risk, decision)
+            with span("logging"):
+                self.db.log_run(drift_share, weighted_score, revenue_risk, decision, feature_scores=feature_scores(drift_by_columns), model_id=self.model_id)
 
         return {
-            "html_report": self.report.get_html(),
+            "report_id": report_id,
             "meta": {
                 "version": current_version,
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -153,10 +328,40 @@ class DriftAnalyzer:
                 "fairness": fairness_issues    
             },
             "automation": decision,
+            "gate": {  # Inputs of the decision, so a cached result can be re-decided (refresh_decision)
+                "weighted_score": float(weighted_score),
+                "drift_share": float(drift_share),
+                "target_drift": float(target_drift),
+                "bias": len(fairness_issues) > 0
+            },
             "leaderboard": leaderboard
         }
 
-    def _make_decision(self, weighted_score, drift_share, target_drift, has_bias, in_cooldown, version):
+    def refresh_decision(self, result):
+        """
+        A cached result with its decision re-taken against the model's current cooldown and production version:
+        the drift it measured still holds, the action it took may not (e.g. a retraining started since).
+        """
+        gate = result.get("gate")
+        if gate is None:
+            return result
+        in_cooldown, current_version = self.model_state()
+        decision = self.make_decision(gate["weighted_score"], gate["drift_share"], gate["target_drift"], gate["bias"], in_cooldown, current_version)
+        return {**result, "meta": {**result["meta"], "version": current_version, "cooldown": in_cooldown}, "automation": decision}
+
+    def assess_risk(self, n_rows, drift_share, target_drift, drift_by_columns):
+        """Returns (est_f1_drop, revenue_risk, leaderboard, weighted_score). Shared with the streaming monitor."""
+        # Simulation: 0.1 target drift ~ 4% F1 Drop
+        est_f1_drop = target_drift * 0.4
+
+        # Financial Risk Formula: Volume * Avg Cost ($150) * Est. Error Increase
+        revenue_risk = n_rows * 150 * ((drift_share * 0.1) + est_f1_drop)
+
+        leaderboard = self._get_enhanced_leaderboard(drift_by_columns)
+        weighted_score = self._calculate_weighted_score(leaderboard)
+        return est_f1_drop, revenue_risk, leaderboard, weighted_score
+
+    def make_decision(self, weighted_score, drift_share, target_drift, has_bias, in_cooldown, version):
         """
         Deterministic Decision Gate.
         Priority: Cooldown -> Bias -> Target Drift -> Weighted Score.
@@ -170,24 +375,39 @@ class DriftAnalyzer:
             return {"action": "BLOCK DEPLOYMENT", "status": "CRITICAL", "color": "#ff0055", "rule": "Fairness Violation", "details": "Disparate impact detected in protected groups.", "pipeline": "Notify Legal/Compliance", "strategy": "Audit"}
 
         # 3. PRIORITY: CIRCUIT BREAKER (Target Drift)
-        if target_drift > 0.1:
+        if target_drift > self.thresholds["target_drift"]:
             return {"action": "EMERGENCY ROLLBACK", "status": "CRITICAL", "color": "#ff0055", "rule": "⛔ HARD OVERRIDE: Label Shift", "details": "Model assumptions invalidated.", "pipeline": "Kill Traffic -> Rollback", "strategy": "Human Audit"}
 
         # 4. STANDARD LOGIC
-        if weighted_score > 60:
-            return {"action": "FULL RETRAINING", "status": "CRITICAL", "color": "#ef4444", "rule": "Weighted Risk > 60", "details": "High feature drift.", "pipeline": "Airflow: Retrain_Full", "strategy": "Full History"}
-        elif weighted_score > 20:
-            return {"action": "TRIGGER FINE-TUNING", "status": "WARNING", "color": "#f59e0b", "rule": "Weighted Risk > 20", "details": "Moderate degradation.", "pipeline": "Step 1: Retrain -> Shadow", "strategy": "Recent Window"}
+        if weighted_score > self.thresholds["retrain"]:
+            return {"action": "FULL RETRAINING", "status": "CRITICAL", "color": "#ef4444", "rule": f"Weighted Risk > {self.thresholds['retrain']:g}", "details": "High feature drift.", "pipeline": "Airflow: Retrain_Full", "strategy": "Full History"}
+        elif weighted_score > self.thresholds["fine_tune"]:
+            return {"action": "TRIGGER FINE-TUNING", "status": "WARNING", "color": "#f59e0b", "rule": f"Weighted Risk > {self.thresholds['fine_tune']:g}", "details": "Moderate degradation.", "pipeline": "Step 1: Retrain -> Shadow", "strategy": "Recent Window"}
         
         return {"action": "NO ACTION", "status": "HEALTHY", "color": "#22c55e", "rule": "Nominal", "details": "Stable.", "pipeline": "Monitor", "strategy": "N/A"}
 
-    def _get_enhanced_leaderboard(self, json_result):
+    def _run_report(self, ref_df, curr_df):
+        """Runs the Evidently Report and returns it as a dict."""
+        self.report = build_evidently_report(ref_df, curr_df)
+        return self.report.as_dict()
+
+    def _evidently_summary(self, result):
+        """Pulls drift_share, per-column drift and target drift out of the Report dict."""
+        drift_share, drift_by_columns, target_drift = 0.0, {}, 0.0
+        for m in result['metrics']:
+            if m['metric'] == 'DatasetDriftMetric':
+                drift_share = m['result']['drift_share']
+            elif m['metric'] == 'DataDriftTable':
+                drift_by_columns = m['result']['drift_by_columns']
+            elif m['metric'] == 'ColumnDriftMetric' and m['result']['column_name'] == 'class':
+                target_drift = m['result']['drift_score']
+        return drift_share, drift_by_columns, target_drift
+
+    def _get_enhanced_leaderboard(self, drift_cols):
         try:
-            table = next(m for m in json_result['metrics'] if m['metric'] == 'DataDriftTable')
-            drift_cols = table['result']['drift_by_columns']
             lb = []
             for feat, det in drift_cols.items():
-                config = FEATURE_CONFIG.get(feat, {"weight": 1.0, "impact": "NORMAL", "action": "Monitor"})
+                config = {"weight": 1.0, "impact": "NORMAL", "action": "Monitor", **self.feature_config.get(feat, {})}
                 lb.append({
                     "feature": feat,
                     "score": det['drift_score'],
@@ -1,57 +1,148 @@
 import pandas as pd
 import numpy as np
 
+from app.config import FAIRNESS_INTERSECTIONS
+
+# Audited groups and the outcomes counted as positive
+PROTECTED_COLUMNS = ['sex', 'race', 'relationship']
+POSITIVE_LABELS = ['>50K', '1', 'yes']
+
+# Cubes larger than this many cells fall back to one aggregation per slice
+MAX_CUBE_CELLS = 1_000_000
+
+def factorize(series: pd.Series):
+    """(codes, labels) with -1 for missing; category columns (compact ingest) reuse their codes as they are."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.intp), series.cat.categories
+    return pd.factorize(series)
+
+def encode_target(series: pd.Series, positive_labels=POSITIVE_LABELS) -> np.ndarray:
+    """
+    1 where the outcome is positive, else 0. Labels are matched once per distinct value
+    (factorize + set membership), not once per row. Missing targets count as negative.
+    """
+    codes, uniques = factorize(series)
+    hits = pd.Index(uniques).astype(str).str.strip().isin(positive_labels)
+    return np.append(hits, False).astype(np.int8)[codes]  # code -1 (missing) -> the trailing False
+
+def disparity_issues(feature, groups, totals, positives, base_rate=None, min_count=50, threshold=0.8):
+    """
+    Disparate Impact Ratio per group from counts.
+    4/5ths Rule (80%): a group whose positive rate is < threshold x the base rate is flagged.
+    """
+    totals = np.asarray(totals, dtype=np.float64)
+    positives = np.asarray(positives, dtype=np.float64)
+    if base_rate is None:
+        base_rate = positives.sum() / totals.sum() if totals.sum() else 0.0
+    if base_rate == 0:
+        return []
+
+    issues = []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dir_ = positives / totals / base_rate
+    for group, count, di in zip(groups, totals, dir_):
+        if count < min_count: continue # Skip statistically insignificant sample sizes
+        if di < threshold:
+            issues.append({
+                "feature": feature,
+                "group": str(group),
+                "disparity": f"{di:.2f}",
+                "severity": "HIGH" if di < 0.6 else "MEDIUM",
+                "details": f"Group positive rate is {di*100:.1f}% of the average."
+            })
+    return issues
+
 class FairnessEngine:
-    def __init__(self, protected_columns=["race", "sex", "relationship"]):
+    """
+    Single-pass fairness audit.
+    - The target is encoded once (vectorized label matching)
+    - Every protected column is factorized, the codes are combined into one cell index, and a single
+      bincount over the rows builds the (count, positives) cube of all protected columns
+    - Per-column rates and intersectional slices (e.g. sex x race) are roll-ups of that small cube
+    The input DataFrame is only read, never copied or modified.
+    """
+    def __init__(self, protected_columns=PROTECTED_COLUMNS, positive_labels=POSITIVE_LABELS, intersections=None, min_count=50, threshold=0.8):
         self.protected_columns = protected_columns
+        self.positive_labels = positive_labels
+        self.intersections = FAIRNESS_INTERSECTIONS if intersections is None else intersections
+        self.min_count = min_count
+        self.threshold = threshold
+
+    def scan(self, df: pd.DataFrame, target_col="class") -> dict:
+        """Returns {'base_rate', 'slices': {slice name: DataFrame(count, positives, rate, disparity)}, 'issues'}."""
+        columns = [c for c in self.protected_columns if c in df.columns]
+        if target_col not in df.columns or not columns:
+            return {"base_rate": None, "slices": {}, "issues": []}
+
+        y = encode_target(df[target_col], self.positive_labels)
+        base_rate = y.mean() if len(y) else 0.0
+
+        # Factorize each protected column; missing values get their own (unreported) code
+        codes, labels = [], []
+        for col in columns:
+            c, uniques = factorize(df[col])
+            codes.append(np.where(c < 0, len(uniques), c))
+            labels.append(list(uniques))
+        shape = tuple(len(l) + 1 for l in labels)
+
+        slices = [(c,) for c in columns] + [tuple(s) for s in self.intersections if all(c in columns for c in s)]
+        if np.prod(shape) <= MAX_CUBE_CELLS:
+            key = np.ravel_multi_index(codes, shape)
+            counts = np.bincount(key, minlength=int(np.prod(shape))).reshape(shape)
+            positives = np.bincount(key, weights=y, minlength=int(np.prod(shape))).reshape(shape)
+            cube = lambda dims: self._roll_up(counts, positives, [columns.index(c) for c in dims])
+        else:
+            cube = lambda dims: self._aggregate([codes[columns.index(c)] for c in dims], [shape[columns.index(c)] for c in dims], y)
+
+        out, issues = {}, []
+        for dims in slices:
+            cnt, pos = cube(dims)
+            observed = tuple(slice(0, shape[columns.index(c)] - 1) for c in dims)  # Drops cells with a missing value
+            cnt, pos = cnt[observed], pos[observed]
+            dim_labels = [labels[columns.index(c)] for c in dims]
+            index = pd.MultiIndex.from_product(dim_labels, names=list(dims)) if len(dims) > 1 else pd.Index(dim_labels[0], name=dims[0])
+            table = pd.DataFrame({"count": cnt.ravel(), "positives": pos.ravel()}, index=index)
+            table = table[table["count"] > 0]
+            table["rate"] = table["positives"] / table["count"]
+            table["disparity"] = table["rate"] / base_rate if base_rate else 0.0
+
+            name = " × ".join(dims)
+            out[name] = table
+            groups = [" × ".join(map(str, g)) if isinstance(g, tuple) else g for g in table.index]
+            issues.extend(disparity_issues(name, groups, table["count"], table["positives"], base_rate, self.min_count, self.threshold))
+        return {"base_rate": float(base_rate), "slices": out, "issues": issues}
+
+    @staticmethod
+    def _roll_up(counts, positives, axes):
+        other = tuple(a for a in range(counts.ndim) if a not in axes)
+        cnt, pos = counts.sum(axis=other), positives.sum(axis=other)
+        order = np.argsort(np.argsort(axes))  # Remaining axes keep cube order; put them in slice order
+        return np.transpose(cnt, order), np.transpose(pos, order)
+
+    @staticmethod
+    def _aggregate(codes, shape, y):
+        key = np.ravel_multi_index(codes, shape)
+        size = int(np.prod(shape))
+        return np.bincount(key, minlength=size).reshape(shape), np.bincount(key, weights=y, minlength=size).reshape(shape)
 
     def run_fairness_scan(self, df: pd.DataFrame, target_col="class"):
         """
         Slices the dataset by protected groups and calculates prevalence/error rates.
         """
-        issues = []
-        metrics = {}
-        
-        # Ensure we have a binary target for calculation (assuming >50K is positive)
-        # In a real scenario, this mapping comes from the Model Registry
         if target_col not in df.columns:
             return {"status": "SKIPPED", "reason": "No target column for fairness check"}
 
-        df['target_binary'] = df[target_col].apply(lambda x: 1 if str(x).strip() in ['>50K', '1'] else 0)
-        overall_rate = df['target_binary'].mean()
-
-        for col in self.protected_columns:
-            if col not in df.columns: continue
-            
-            # Calculate positive rate per group
-            group_stats = df.groupby(col)['target_binary'].agg(['mean', 'count'])
-            
-            for group, stats in group_stats.iterrows():
-                group_rate = stats['mean']
-                count = stats['count']
-                
-                # Statistical Significance Check (Heuristic for demo)
-                if count < 50: continue # Skip small sample sizes
-                
-                # Disparate Impact Calculation
-                # If a group has < 80% of the positive outcome rate of the mean -> BIAS ALERT
-                disparity = group_rate / overall_rate if overall_rate > 0 else 0
-                
-                metric_key = f"{col}_{group}"
-                metrics[metric_key] = round(disparity, 2)
-
-                if disparity < 0.8:
-                    issues.append({
-                        "feature": col,
-                        "group": group,
-                        "disparity": f"{disparity:.2f}",
-                        "severity": "HIGH" if disparity < 0.6 else "MEDIUM",
-                        "details": f"Group receives positive outcome {disparity*100:.1f}% as often as average."
-                    })
+        result = self.scan(df, target_col)
+        metrics = {}
+        for name, table in result["slices"].items():
+            kept = table[table["count"] >= self.min_count]
+            for group, disparity in zip(kept.index, kept["disparity"].round(2)):
+                group = " × ".join(map(str, group)) if isinstance(group, tuple) else group
+                metrics[f"{name}_{group}"] = float(disparity)
 
         return {
-            "is_biased": len(issues) > 0,
-            "bias_score": 100 - (len(issues) * 15), # Simple score
-            "issues": issues,
+            "is_biased": len(result["issues"]) > 0,
+            "bias_score": 100 - (len(result["issues"]) * 15), # Simple score
+            "issues": result["issues"],
             "group_metrics": metrics
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,98 @@
+import os
+from typing import Iterator
+
+import pandas as pd
+
+from app.config import INGEST_CHUNK_ROWS
+from app.core.sketches import DatasetSketch
+
+# Columnar formats are detected by file extension; everything else is CSV.
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+
+def detect_format(filename: str) -> str:
+    """Returns 'parquet', 'arrow' or 'csv' based on the upload's file name."""
+    suffix = os.path.splitext(filename or "")[1].lower()
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    return "csv"
+
+
+def iter_file_chunks(fileobj, fmt: str = "csv", chunk_rows: int = INGEST_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Yields the file as DataFrame chunks of at most `chunk_rows` rows.
+    The file object is read incrementally, so the raw upload never has to sit in memory as one bytes buffer.
+    """
+    fileobj.seek(0)
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(fileobj).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+
+    if fmt == "arrow":
+        import pyarrow as pa
+        try:
+            reader = pa.ipc.open_file(fileobj)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            # Not a random-access IPC file, fall back to the streaming format
+            fileobj.seek(0)
+            batches = pa.ipc.open_stream(fileobj)
+        for batch in batches:
+            yield batch.to_pandas()
+        return
+
+    for chunk in pd.read_csv(fileobj, chunksize=chunk_rows):
+        yield chunk
+
+
+def iter_upload_chunks(upload, chunk_rows: int = INGEST_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Chunked reader for a FastAPI UploadFile (reads the spooled file, not `await upload.read()`)."""
+    return iter_file_chunks(upload.file, detect_format(upload.filename), chunk_rows)
+
+
+def read_upload(upload, chunk_rows: int = INGEST_CHUNK_ROWS, on_chunk=None) -> pd.DataFrame:
+    """
+    Materialises an upload as a single DataFrame from its chunks.
+    `on_chunk(chunk, offset)` is called for every chunk as it is parsed (e.g. contract validation).
+    """
+    return _concat_chunks(iter_upload_chunks(upload, chunk_rows), on_chunk)
+
+
+def read_path(path: str, chunk_rows: int = INGEST_CHUNK_ROWS, on_chunk=None) -> pd.DataFrame:
+    """read_upload for a local file (format from its extension)."""
+    with open(path, "rb") as f:
+        return _concat_chunks(iter_file_chunks(f, detect_format(path), chunk_rows), on_chunk)
+
+
+def _concat_chunks(chunk_iter, on_chunk=None) -> pd.DataFrame:
+    chunks, offset = [], 0
+    for chunk in chunk_iter:
+        if on_chunk is not None:
+            on_chunk(chunk, offset)
+        offset += len(chunk)
+        chunks.append(chunk)
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    # ignore_index keeps a RangeIndex instead of repeating chunk offsets
+    df = pd.concat(chunks, ignore_index=True)
+    del chunks
+    return df
+
+
+def sketch_upload(upload, chunk_rows: int = INGEST_CHUNK_ROWS, on_chunk=None) -> DatasetSketch:
+    """Like read_upload, but folds every chunk into a DatasetSketch instead of keeping the rows (approximate mode)."""
+    sketch, offset = DatasetSketch(), 0
+    for chunk in iter_upload_chunks(upload, chunk_rows):
+        if on_chunk is not None:
+            on_chunk(chunk, offset)
+        offset += len(chunk)
+        sketch.update(chunk)
+    return sketch
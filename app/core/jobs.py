@@ -0,0 +1,169 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.config import JOB_HISTORY, JOB_MODE, JOB_QUEUE_SIZE, JOB_TTL_SECONDS, JOB_WORKERS
+
+
+class QueueFull(Exception):
+    """Raised when the queue is at capacity (mapped to HTTP 429)."""
+
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"  # queued -> running -> succeeded | failed, or queued -> cancelled
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.future = None
+        self.on_success = None
+
+    def to_dict(self, include_result=True):
+        out = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wait_seconds": round(self.started_at - self.submitted_at, 4) if self.started_at else None,
+            "run_seconds": round(self.finished_at - self.started_at, 4) if self.finished_at and self.started_at else None,
+        }
+        if self.error:
+            out["error"] = self.error
+        if include_result and self.status == "succeeded":
+            out["result"] = self.result
+        return out
+
+
+class JobQueue:
+    """
+    Bounded executor for long-running work (drift analyses) so it stays off the event loop.
+    - max_workers jobs run at once; up to max_queue more wait; beyond that submit() raises QueueFull
+    - mode "thread" (default) or "process" (job functions and arguments must be picklable)
+    - queued jobs can be cancelled; finished jobs are kept for JOB_TTL_SECONDS / JOB_HISTORY entries
+    """
+    def __init__(self, max_workers=JOB_WORKERS, max_queue=JOB_QUEUE_SIZE, mode=JOB_MODE, initializer=None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.mode = mode
+        if mode == "process":
+            self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=initializer)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=1000)
+        self.counters = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0, "cancelled": 0}
+
+    def submit(self, kind, fn, *args, on_success=None, **kwargs) -> Job:
+        """Queues fn(*args, **kwargs). `on_success(result)` runs in this process once the job succeeds."""
+        with self._lock:
+            self._purge()
+            if self._active() >= self.max_workers + self.max_queue:
+                self.counters["rejected"] += 1
+                raise QueueFull(f"{self._active()} jobs in flight (limit {self.max_workers + self.max_queue})")
+            job = Job(kind)
+            job.on_success = on_success
+            self._jobs[job.id] = job
+            self.counters["submitted"] += 1
+
+        if self.mode == "process":
+            # No hook runs in the worker; start is observed from the future's state (see _refresh)
+            job.future = self.executor.submit(fn, *args, **kwargs)
+        else:
+            job.future = self.executor.submit(self._run, job, fn, args, kwargs)
+        job.future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        self._mark_started(job)
+        return fn(*args, **kwargs)
+
+    def _mark_started(self, job):
+        with self._lock:
+            self._start(job)
+
+    def _start(self, job):
+        if job.status == "queued":
+            job.status = "running"
+            job.started_at = time.time()
+            self._waits.append(job.started_at - job.submitted_at)
+
+    def _refresh(self):
+        # Process pools flip futures to running when a worker is about to take them
+        if self.mode == "process":
+            for job in self._jobs.values():
+                if job.status == "queued" and job.future is not None and job.future.running():
+                    self._start(job)
+
+    def _finish(self, job, future):
+        with self._lock:
+            job.finished_at = time.time()
+            if job.started_at is None and not future.cancelled():
+                self._start(job)  # Finished before a refresh saw it running
+            try:
+                job.result = future.result()
+                job.status = "succeeded"
+            except CancelledError:
+                job.status = "cancelled"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            self.counters[job.status] += 1
+
+        if job.status == "succeeded" and job.on_success is not None:
+            try:
+                job.on_success(job.result)
+            except Exception as e:
+                print(f"⚠️ Job {job.id} success hook failed: {e}")
+
+    def get(self, job_id):
+        with self._lock:
+            self._refresh()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id) -> bool:
+        """Cancels a job that has not started yet. Running jobs cannot be interrupted."""
+        job = self.get(job_id)
+        if job is None or job.future is None:
+            return False
+        return job.future.cancel()
+
+    def metrics(self):
+        with self._lock:
+            self._refresh()
+            waits = sorted(self._waits)
+            queued = sum(1 for j in self._jobs.values() if j.status == "queued")
+            running = sum(1 for j in self._jobs.values() if j.status == "running")
+            return {
+                "mode": self.mode,
+                "workers": self.max_workers,
+                "capacity": self.max_workers + self.max_queue,
+                "queue_depth": queued,
+                "running": running,
+                **self.counters,
+                "wait_seconds_avg": round(sum(waits) / len(waits), 4) if waits else 0.0,
+                "wait_seconds_p95": round(waits[int(0.95 * (len(waits) - 1))], 4) if waits else 0.0,
+                "wait_seconds_max": round(waits[-1], 4) if waits else 0.0,
+            }
+
+    def _active(self):
+        return sum(1 for j in self._jobs.values() if j.status in ("queued", "running"))
+
+    def _purge(self):
+        cutoff = time.time() - JOB_TTL_SECONDS
+        done = [jid for jid, j in self._jobs.items() if j.finished_at and j.finished_at < cutoff]
+        for jid in done:
+            del self._jobs[jid]
+        while len(self._jobs) > JOB_HISTORY:
+            oldest = next((jid for jid, j in self._jobs.items() if j.finished_at), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest]
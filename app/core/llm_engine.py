@@ -1,24 +1,226 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
-from evidently.report import Report
-from evidently.descriptors import TextLength, Sentiment
+
+from app.config import LLM_BATCH_ROWS, LLM_CACHE_ENTRIES
+from app.core.metrics import span
+
+# Per-response descriptors, defined like Evidently's TextLength, WordCount, SentenceCount,
+# NonLetterCharacterPercentage, ContainsLink and Sentiment (VADER compound) so the numbers match its reports
+DESCRIPTORS = ("text_length", "word_count", "sentence_count", "non_letter_pct", "contains_link", "sentiment")
+COUNTS = ("text_length", "word_count", "sentence_count")
+
+# Arrow (RE2) patterns. Python's unicode \s and \w are spelled out since RE2's are ASCII-only.
+_SPACE, _WORD_CHAR = r"[\t-\r\x1c-\x20\x85\pZ]", r"[\pL\pN_]"
+NOT_WORD_CHARS = r"[^a-zA-Z ]+"
+WORD = r"[a-zA-Z]+"  # After NOT_WORD_CHARS is removed only ASCII letters and spaces are left
+LETTERS_OR_SPACES = r"[\pL ]+"
+LINK = r"(?:^|" + _SPACE + r")[A-Za-z][A-Za-z0-9+.-]*://[^/?#\pZ\s]"
+# Sentence breaks: whitespace after '.' or '?', except after "e.g."- or "Mr."-like abbreviations. Evidently splits on
+# one look-behind regex; RE2 has no look-behinds, so breaks are counted and the two exceptions subtracted.
+SENTENCE_BREAK = r"[.?]" + _SPACE
+NOT_A_BREAK = (_WORD_CHAR + r"\." + _WORD_CHAR + r"[.?]" + _SPACE, r"[A-Z][a-z]\." + _SPACE)
+
+
+def response_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def vader_sentiment():
+    """VADER compound score function, or None when NLTK or its lexicon is not installed."""
+    try:
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+        analyzer = SentimentIntensityAnalyzer()
+    except (ImportError, LookupError):
+        print("⚠️ Sentiment disabled: VADER lexicon not found (python -m nltk.downloader vader_lexicon)")
+        return None
+    return lambda text: analyzer.polarity_scores(text)["compound"]
+
+
+def text_descriptors(texts, sentiment=None) -> np.ndarray:
+    """
+    (len(texts), len(DESCRIPTORS)) float64 matrix. Everything but sentiment is an Arrow compute kernel over the whole
+    batch; sentiment (NaN without an analyzer) is scored text by text.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    def numpy(values):
+        return values.to_numpy(zero_copy_only=False)
+
+    arr = pa.array(texts, type=pa.large_string())
+    length = numpy(pc.utf8_length(arr)).astype(np.float64)
+    words = numpy(pc.count_substring_regex(pc.replace_substring_regex(arr, NOT_WORD_CHARS, ""), WORD))
+    others = numpy(pc.utf8_length(pc.replace_substring_regex(arr, LETTERS_OR_SPACES, "")))
+    links = numpy(pc.match_substring_regex(arr, LINK))
+    sentences = 1 + numpy(pc.count_substring_regex(arr, SENTENCE_BREAK))
+    for pattern in NOT_A_BREAK:
+        sentences -= numpy(pc.count_substring_regex(arr, pattern))
+
+    out = np.empty((len(texts), len(DESCRIPTORS)))
+    out[:, 0] = length
+    out[:, 1] = words
+    out[:, 2] = sentences
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:, 3] = np.where(length > 0, 100 * others / length, 0.0)
+    out[:, 4] = links
+    out[:, 5] = [sentiment(t) if t else 0.0 for t in texts] if sentiment else np.nan
+    return out
+
+
+class DescriptorCache:
+    """Descriptor rows of recently seen responses, keyed by content hash. LRU bounded by entry count."""
+    def __init__(self, max_entries=LLM_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._bytes = 0  # Keys + descriptor rows (payload, not Python object overhead)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, keys):
+        """{key: row} for the keys that are cached."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._entries.get(key)
+                if row is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = row
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, keys, rows):
+        with self._lock:
+            for key, row in zip(keys, rows):
+                if key not in self._entries:
+                    self._entries[key] = row
+                    self._bytes += len(key) + row.nbytes
+            while len(self._entries) > self.max_entries:
+                key, row = self._entries.popitem(last=False)
+                self._bytes -= len(key) + row.nbytes
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
 
 class LLMEngine:
     """
     Audits Text Data for Quality and Sentiment.
     Used for the 'GenAI Guardrails' feature.
+    - Responses are deduplicated by content hash; descriptors of responses seen before come from the cache
+    - The rest are computed in batches of `batch_rows` (vectorized, no per-response Evidently report)
+    - With a reference batch, descriptor drift is tested by the native drift engine
     """
+    def __init__(self, cache=None, sentiment="vader", batch_rows=LLM_BATCH_ROWS):
+        self.cache = cache or DescriptorCache()
+        self.batch_rows = batch_rows
+        self._sentiment = sentiment
+        self._lock = threading.Lock()
+
+    @property
+    def sentiment(self):
+        """Sentiment scorer (text -> [-1, 1]); the default VADER analyzer is loaded on first use."""
+        if self._sentiment == "vader":
+            with self._lock:
+                if self._sentiment == "vader":
+                    self._sentiment = vader_sentiment()
+        return self._sentiment
+
+    def describe(self, responses):
+        """(DataFrame of DESCRIPTORS, one row per response, {'unique', 'cache_hits'})."""
+        texts = ["" if r is None else str(r) for r in responses]
+        keys = [response_key(t) for t in texts]
+        slots, first, inverse = {}, [], np.empty(len(texts), dtype=np.intp)  # first: row where each distinct text appears
+        for i, key in enumerate(keys):
+            slot = slots.get(key)
+            if slot is None:
+                slot = slots[key] = len(first)
+                first.append(i)
+            inverse[i] = slot
+
+        unique_keys = list(slots)
+        found = self.cache.get_many(unique_keys)
+        matrix = np.empty((len(unique_keys), len(DESCRIPTORS)))
+        missing = []
+        for slot, key in enumerate(unique_keys):
+            if key in found:
+                matrix[slot] = found[key]
+            else:
+                missing.append(slot)
+
+        for start in range(0, len(missing), self.batch_rows):
+            batch = missing[start:start + self.batch_rows]
+            matrix[batch] = text_descriptors([texts[first[s]] for s in batch], self.sentiment)
+            self.cache.put_many([unique_keys[s] for s in batch], matrix[batch].copy())
+
+        frame = pd.DataFrame(matrix[inverse], columns=list(DESCRIPTORS))
+        return frame, {"unique": len(unique_keys), "cache_hits": len(found)}
+
+    def scan(self, records, reference=None, include_rows=True) -> dict:
+        """
+        Descriptors of every record's `response`, a summary per descriptor and, when `reference` records are given,
+        reference-vs-current drift of each descriptor.
+        """
+        with span("llm.descriptors"):
+            current, info = self.describe([r.get("response") for r in records])
+        out = {
+            "rows": len(current),
+            "unique_responses": info["unique"],
+            "cache_hits": info["cache_hits"],
+            "summary": summarize(current),
+        }
+        if reference:
+            with span("llm.drift"):
+                ref, _ = self.describe([r.get("response") for r in reference])
+                out["drift"] = descriptor_drift(ref, current)
+        if include_rows:
+            rows = current.astype(object).where(current.notna(), None)
+            for col in COUNTS:
+                rows[col] = current[col].astype(np.int64)
+            rows["contains_link"] = current["contains_link"] > 0
+            out["data"] = rows.to_dict(orient="records")
+        return out
+
     def scan_response(self, prompt: str, response: str):
-        # Wrap data in a DataFrame for Evidently
-        data = pd.DataFrame({"response": [response]})
-        
-        # Define metrics (Text Length & Sentiment)
-        report = Report(metrics=[
-            TextLength(column_name="response"),
-            Sentiment(column_name="response")
-        ])
-        
-        # Run analysis
-        report.run(reference_data=None, current_data=data)
-        
-        # Return dictionary result
-        return report.as_dict()
\ No newline at end of file
+        """Descriptors of a single response."""
+        return self.scan([{"prompt": prompt, "response": response}])["data"][0]
+
+
+def summarize(frame: pd.DataFrame) -> dict:
+    """Mean and quantiles per descriptor (None where the descriptor is unavailable, e.g. sentiment without VADER)."""
+    summary = {}
+    for col in frame.columns:
+        values = frame[col].dropna()
+        if values.empty:
+            summary[col] = None
+            continue
+        p50, p95 = np.quantile(values, [0.5, 0.95])
+        summary[col] = {"mean": float(values.mean()), "min": float(values.min()), "p50": float(p50), "p95": float(p95), "max": float(values.max())}
+    return summary
+
+
+def descriptor_drift(ref: pd.DataFrame, curr: pd.DataFrame) -> dict:
+    """Text drift as drift of the descriptor distributions (same tests and thresholds as tabular columns)."""
+    from app.core.native_drift import NativeDriftEngine
+    from app.core.parallel import ColumnExecutor
+    from app.core.profile import ReferenceProfile
+
+    ref = ref.dropna(axis=1, how="all")  # Sentiment without an analyzer
+    return NativeDriftEngine(executor=ColumnExecutor(mode="serial")).run(ReferenceProfile.build(ref, fingerprint="llm"), curr)
@@ -0,0 +1,251 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter as Tally, deque
+from contextlib import contextmanager
+
+from app.config import PROFILE_INTERVAL_MS, PROFILE_SLOW_MS, PROFILE_TRACE_DIR
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(labels.get(l, "") for l in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {v:g}" for k, v in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) per label set."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(l, "") for l in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', '+Inf')])} {series[len(self.buckets)]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[len(self.buckets)]}")
+        return lines
+
+
+class Gauge:
+    """
+    Read at scrape time from `fn`: a number, or {label value: number} when `label` is set.
+    kind="counter" exports a running total kept elsewhere (e.g. the job queue's outcome counters).
+    """
+    def __init__(self, name, help, fn, label=None, kind="gauge"):
+        self.name, self.help, self.fn, self.label, self.kind = name, help, fn, label, kind
+
+    def render(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []  # A broken source must not take the whole scrape down
+        if self.label is None:
+            return [f"{self.name} {float(value):g}"]
+        return [f"{self.name}{_labels((self.label,), (k,))} {float(v):g}" for k, v in sorted(value.items())]
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format (GET /metrics)."""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, fn, label=None, kind="gauge"):
+        """Replaces any gauge of the same name (sources are re-bound when their owners are rebuilt)."""
+        with self._lock:
+            self._metrics[name] = Gauge(name, help, fn, label, kind)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out = []
+        for m in metrics:
+            out.append(f"# HELP {m.name} {m.help}")
+            out.append(f"# TYPE {m.name} {m.kind}")
+            out.extend(m.render())
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram("modelguard_stage_seconds", "Time spent per analysis stage.", labels=("stage",))
+HTTP_SECONDS = REGISTRY.histogram("modelguard_http_request_duration_seconds", "HTTP request latency by route.", labels=("method", "route", "status"))
+HTTP_REQUESTS = REGISTRY.counter("modelguard_http_requests_total", "HTTP requests by route and status.", labels=("method", "route", "status"))
+INGEST_BYTES = REGISTRY.histogram("modelguard_ingest_bytes", "In-memory size of both parsed uploads of an analysis, before and after compact encoding.", labels=("encoding",), buckets=(1e6, 4e6, 16e6, 64e6, 256e6, 1e9, 4e9))
+SERIALIZE_SECONDS = REGISTRY.histogram("modelguard_serialize_seconds", "Time to encode route results, by route and format.", labels=("route", "format"), buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+RESPONSE_BYTES = REGISTRY.histogram("modelguard_response_bytes", "Response body size by route, before compression (identity) and as sent.", labels=("route", "encoding"), buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 1e8))
+SCHEDULER_LAG = REGISTRY.histogram("modelguard_scheduler_lag_seconds", "Delay between a scheduled check falling due and starting.", labels=("model",))
+SCHEDULER_CHECKS = REGISTRY.counter("modelguard_scheduler_checks_total", "Scheduled drift checks by model and outcome.", labels=("model", "outcome"))
+
+
+@contextmanager
+def span(stage: str):
+    """Times the enclosed block into modelguard_stage_seconds{stage=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+class Stopwatch:
+    """Wraps a callable and accumulates the time spent in it (for a stage interleaved with another, e.g. per-chunk validation)."""
+    def __init__(self, fn):
+        self.fn = fn
+        self.seconds = 0.0
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.fn(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+class SamplingProfiler:
+    """
+    Opt-in (PROFILE_SLOW_MS > 0) statistical profiler for slow requests.
+    While at least one request is in flight, a daemon thread samples the stack of every other thread every
+    `interval_s`. A request that ends slower than `threshold_s` dumps the samples taken during it to
+    `out_dir` as folded stacks (one "thread;frame;frame count" line per stack: flamegraph.pl / speedscope input).
+    Nothing runs while no request is in flight.
+    """
+    def __init__(self, threshold_s, interval_s=PROFILE_INTERVAL_MS / 1000, out_dir=PROFILE_TRACE_DIR, max_samples=20000):
+        self.threshold_s = threshold_s
+        self.interval_s = interval_s
+        self.out_dir = out_dir
+        self._samples = deque(maxlen=max_samples)  # (sequence number, [folded stack, ...])
+        self._seq = 0
+        self._active = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.dumps = 0
+
+    def start(self):
+        """Marks a request as in flight; returns the token to pass to finish()."""
+        with self._cond:
+            self._active += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+            return self._seq
+
+    def finish(self, token, elapsed, label):
+        with self._cond:
+            self._active -= 1
+            samples = [s for seq, s in self._samples if seq > token] if elapsed >= self.threshold_s else None
+            if self._active == 0:
+                self._samples.clear()
+        if samples:
+            self._dump(samples, elapsed, label)
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while True:
+            with self._cond:
+                while self._active == 0:
+                    self._cond.wait()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    frames = []
+                    while frame is not None:
+                        frames.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                        frame = frame.f_back
+                    stacks.append(";".join([names.get(ident, str(ident))] + frames[::-1]))
+            with self._cond:
+                self._seq += 1
+                self._samples.append((self._seq, stacks))
+            time.sleep(self.interval_s)
+
+    def _dump(self, samples, elapsed, label):
+        tally = Tally(stack for stacks in samples for stack in stacks)
+        safe = "".join(c if c.isalnum() else "_" for c in label).strip("_")[:80]
+        path = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{int(elapsed * 1000)}ms_{safe}.folded")
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            with open(path, "w") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in tally.most_common())
+            self.dumps += 1
+            print(f"🐢 Slow request ({elapsed:.2f}s) {label}: profile written to {path}")
+        except OSError as e:
+            print(f"⚠️ Profile dump failed: {e}")
+
+
+PROFILER = SamplingProfiler(PROFILE_SLOW_MS / 1000) if PROFILE_SLOW_MS > 0 else None
+
+
+@contextmanager
+def profiled(label: str):
+    """Runs the block under the slow-request profiler (no-op unless PROFILE_SLOW_MS is set)."""
+    if PROFILER is None:
+        yield
+        return
+    token, start = PROFILER.start(), time.perf_counter()
+    try:
+        yield
+    finally:
+        PROFILER.finish(token, time.perf_counter() - start, label)
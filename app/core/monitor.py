@@ -0,0 +1,335 @@
+import threading
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.config import (
+    DRIFT_SMALL_SAMPLE, DRIFT_THRESHOLD, MONITOR_GRID_BINS, MONITOR_HISTORY,
+    MONITOR_MAX_CATEGORIES, MONITOR_WINDOW_ROWS,
+)
+from app.core.drift_engine import DriftAnalyzer, feature_scores
+from app.core.fairness import PROTECTED_COLUMNS, disparity_issues, encode_target
+from app.core.native_drift import NativeDriftEngine, population_stability_index
+from app.core.profile import ReferenceProfile, bin_counts_sorted, ks_p_value
+
+OTHER = "__other__"  # Bucket for categories the reference does not track
+
+
+class SketchLayout:
+    """
+    Fixed binning derived from a ReferenceProfile. Every pane of a model is counted on the same layout,
+    so panes merge by adding their count arrays.
+    - numeric: reference quantile grid (always contains the profile's PSI cuts) -> open-ended bins
+    - categorical: the reference's most frequent values + one shared bucket for everything else
+    - fairness: (group, positive label) counts for the protected columns, when the target is present
+    """
+    def __init__(self, profile: ReferenceProfile, target='class', grid_bins=MONITOR_GRID_BINS, max_categories=MONITOR_MAX_CATEGORIES):
+        self.profile = profile
+        self.target = target
+
+        self.numeric_columns = []
+        self.grids, self.ref_numeric, self.ref_std, self.ref_range = [], [], [], []
+        for col, values in profile.numeric.items():
+            if not len(values):
+                continue
+            self.numeric_columns.append(col)
+            fine = np.quantile(values, np.linspace(0, 1, grid_bins + 1))[1:-1]
+            cuts = profile.histograms[col][0] if col in profile.histograms else np.empty(0)
+            grid = np.unique(np.concatenate([fine, cuts]))
+            self.grids.append(grid)
+            self.ref_numeric.append(bin_counts_sorted(values, grid))
+            self.ref_std.append(float(np.std(values)))
+            self.ref_range.append((float(values[0]), float(values[-1])))
+        self.numeric_width = max((len(g) + 1 for g in self.grids), default=0)
+
+        self.categorical_columns = list(profile.categories)
+        self.vocab, self.ref_categorical = [], []
+        for col in self.categorical_columns:
+            values, freqs = profile.categories[col]  # value_counts order: most frequent first
+            self.vocab.append(pd.Index(values[:max_categories]))
+            self.ref_categorical.append(np.append(freqs[:max_categories], freqs[max_categories:].sum()))
+        self.categorical_width = max((len(v) + 1 for v in self.vocab), default=0)
+
+        self.protected = [c for c in PROTECTED_COLUMNS if c in self.categorical_columns] if target in profile.columns else []
+
+    def empty(self):
+        return PaneSketch(self)
+
+
+class PaneSketch:
+    """Fixed-size, mergeable summary of a run of rows (size depends on the layout, never on the row count)."""
+    def __init__(self, layout: SketchLayout):
+        self.layout = layout
+        self.n_rows = 0
+        self.numeric = np.zeros((len(layout.numeric_columns), layout.numeric_width), dtype=np.int64)
+        self.mins = np.full(len(layout.numeric_columns), np.inf)
+        self.maxs = np.full(len(layout.numeric_columns), -np.inf)
+        self.categorical = np.zeros((len(layout.categorical_columns), layout.categorical_width), dtype=np.int64)
+        self.groups = {col: np.zeros((layout.categorical_width, 2), dtype=np.int64) for col in layout.protected}
+
+    def add(self, df: pd.DataFrame):
+        layout = self.layout
+        self.n_rows += len(df)
+
+        for j, col in enumerate(layout.numeric_columns):
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            if len(values):
+                bins = np.searchsorted(layout.grids[j], values, side="right")
+                self.numeric[j, :len(layout.grids[j]) + 1] += np.bincount(bins, minlength=len(layout.grids[j]) + 1)
+                self.mins[j] = min(self.mins[j], values.min())
+                self.maxs[j] = max(self.maxs[j], values.max())
+
+        codes = {}
+        for j, col in enumerate(layout.categorical_columns):
+            if col not in df.columns:
+                continue
+            series = df[col]
+            present = series.notna().to_numpy()
+            code = layout.vocab[j].get_indexer(series)
+            code = np.where(code < 0, len(layout.vocab[j]), code)[present]  # Untracked values -> shared bucket
+            self.categorical[j] += np.bincount(code, minlength=layout.categorical_width)
+            codes[col] = (code, present)
+
+        if layout.protected and layout.target in df.columns:
+            positive = encode_target(df[layout.target]).astype(np.int64)
+            for col in layout.protected:
+                if col in codes:
+                    code, present = codes[col]
+                    np.add.at(self.groups[col], (code, positive[present]), 1)
+
+    def merge(self, other: "PaneSketch"):
+        self.n_rows += other.n_rows
+        self.numeric += other.numeric
+        np.minimum(self.mins, other.mins, out=self.mins)
+        np.maximum(self.maxs, other.maxs, out=self.maxs)
+        self.categorical += other.categorical
+        for col in self.groups:
+            self.groups[col] += other.groups[col]
+        return self
+
+
+class WindowEvaluator:
+    """
+    Drift of a merged window sketch against the reference, using only the sketch counts.
+    Same tests and thresholds as NativeDriftEngine, except that numeric columns always get KS / Wasserstein
+    (the grid does not count distinct values); numeric statistics are evaluated on the reference grid:
+    - KS: largest CDF gap at the grid edges (exact at the edges, so a slight under-estimate overall)
+    - Wasserstein: area between the CDFs, linearly interpolated within bins
+    - PSI: exact (the grid contains the profile's PSI cuts)
+    """
+    def __init__(self, threshold=DRIFT_THRESHOLD, p_value=0.05, small_sample=DRIFT_SMALL_SAMPLE):
+        self.threshold = threshold
+        self.p_value = p_value
+        self.small_sample = small_sample
+        self.native = NativeDriftEngine(threshold=threshold, p_value=p_value, small_sample=small_sample)
+
+    def run(self, sketch: PaneSketch) -> dict:
+        layout = sketch.layout
+        drift_by_columns = self.numeric_drift(sketch)
+
+        cat_cols, ref_tables, curr_tables = [], [], []
+        for j, col in enumerate(layout.categorical_columns):
+            width = len(layout.vocab[j]) + 1
+            curr = sketch.categorical[j, :width]
+            if curr.sum() == 0:
+                continue
+            labels = np.asarray(list(layout.vocab[j]) + [OTHER], dtype=object)
+            ref = layout.ref_categorical[j]
+            keep = (ref > 0) | (curr > 0)  # The shared bucket only takes part when it is used
+            cat_cols.append(col)
+            ref_tables.append((labels[keep], ref[keep]))
+            curr_tables.append(pd.Series(curr[keep], index=labels[keep]))
+        if cat_cols:
+            drift_by_columns.update(self.native.categorical_drift(cat_cols, ref_tables, curr_tables))
+
+        n_drifted = sum(1 for d in drift_by_columns.values() if d["drift_detected"])
+        return {
+            "drift_share": n_drifted / len(drift_by_columns) if drift_by_columns else 0.0,
+            "number_of_drifted_columns": n_drifted,
+            "drift_by_columns": drift_by_columns,
+        }
+
+    def numeric_drift(self, sketch: PaneSketch) -> dict:
+        layout = sketch.layout
+        results = {}
+        for j, col in enumerate(layout.numeric_columns):
+            grid = layout.grids[j]
+            ref = layout.ref_numeric[j]
+            curr = sketch.numeric[j, :len(grid) + 1]
+            n_ref, n_curr = int(ref.sum()), int(curr.sum())
+            if n_curr == 0:
+                continue
+
+            gap = np.cumsum(ref)[:-1] / n_ref - np.cumsum(curr)[:-1] / n_curr  # CDF difference at each grid edge
+            ks_stat = float(np.abs(gap).max()) if len(gap) else 0.0
+            ks_p = ks_p_value(ks_stat, n_ref, n_curr)  # Exact vs limit on max(n_ref, n_curr), as in the native engine
+
+            lo = min(layout.ref_range[j][0], sketch.mins[j])
+            hi = max(layout.ref_range[j][1], sketch.maxs[j])
+            edges = np.concatenate([[lo], grid, [hi]])
+            diff = np.concatenate([[0.0], np.abs(gap), [0.0]])
+            area = float(np.sum((diff[1:] + diff[:-1]) / 2 * np.diff(edges)))
+            wasserstein = area / max(layout.ref_std[j], 0.001)
+
+            psi = None
+            if col in layout.profile.histograms:
+                cuts, ref_bins = layout.profile.histograms[col]
+                bounds = np.concatenate([[0], np.searchsorted(grid, cuts) + 1, [len(grid) + 1]])
+                psi = population_stability_index(ref_bins, np.add.reduceat(curr, bounds[:-1]))
+
+            if n_ref <= self.small_sample:
+                score, detected, test = ks_p, ks_p < self.p_value, "K-S p_value"
+            else:
+                score, detected, test = wasserstein, wasserstein >= self.threshold, "Wasserstein distance (normed)"
+            results[col] = {
+                "column_name": col,
+                "column_type": "num",
+                "stattest_name": test,
+                "drift_score": float(score),
+                "drift_detected": bool(detected),
+                "ks_statistic": ks_stat,
+                "ks_p_value": float(np.clip(ks_p, 0, 1)),
+                "wasserstein_norm": wasserstein,
+                "psi": psi,
+            }
+        return results
+
+
+def fairness_issues(sketch: PaneSketch) -> list:
+    """Disparate impact on the window's (group, label) counts."""
+    layout = sketch.layout
+    issues = []
+    for col, counts in sketch.groups.items():
+        labels = list(layout.vocab[layout.categorical_columns.index(col)]) + [OTHER]
+        issues.extend(disparity_issues(col, labels, counts.sum(axis=1), counts[:, 1]))
+    return issues
+
+
+class ModelMonitor:
+    """
+    Rolling-window drift for one model's prediction stream.
+    Rows are counted into panes of `slide_rows`; a window is the last `window_rows / slide_rows` panes.
+    - tumbling: slide_rows == window_rows (windows do not overlap)
+    - sliding:  slide_rows < window_rows (a window closes every slide_rows rows)
+    Each window close merges the pane sketches, evaluates drift and runs the decision gate; raw rows are never kept.
+    """
+    def __init__(self, model_id, profile: ReferenceProfile, window_rows=MONITOR_WINDOW_ROWS, slide_rows=None, db_engine=None):
+        slide_rows = slide_rows or window_rows
+        if window_rows <= 0 or slide_rows <= 0 or window_rows % slide_rows:
+            raise ValueError("window_rows must be a positive multiple of slide_rows")
+        self.model_id = model_id
+        self.window_rows = window_rows
+        self.slide_rows = slide_rows
+        self.layout = SketchLayout(profile)
+        self.evaluator = WindowEvaluator()
+        self.analyzer = DriftAnalyzer(db_engine=db_engine, model_id=model_id)
+        self.db = db_engine
+
+        self.panes = deque(maxlen=window_rows // slide_rows)
+        self.open_pane = self.layout.empty()
+        self.rows_seen = 0
+        self.windows_closed = 0
+        self.history = deque(maxlen=MONITOR_HISTORY)
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self):
+        return "tumbling" if self.slide_rows == self.window_rows else "sliding"
+
+    def ingest(self, df: pd.DataFrame) -> list:
+        """Adds a micro-batch; returns the results of every window it closed (oldest first)."""
+        closed = []
+        with self._lock:
+            start = 0
+            while start < len(df):
+                take = min(self.slide_rows - self.open_pane.n_rows, len(df) - start)
+                self.open_pane.add(df.iloc[start:start + take])
+                start += take
+                self.rows_seen += take  # Counted per pane, so windows closed mid-batch know where they end
+                if self.open_pane.n_rows == self.slide_rows:
+                    closed.extend(self._close_pane())
+        return closed
+
+    def _close_pane(self):
+        self.panes.append(self.open_pane)
+        self.open_pane = self.layout.empty()
+        if len(self.panes) < self.panes.maxlen:
+            return []
+
+        window = self.layout.empty()
+        for pane in self.panes:
+            window.merge(pane)
+        if self.mode == "tumbling":
+            self.panes.clear()
+        result = self._evaluate(window)
+        self.windows_closed += 1
+        self.history.append(result)
+        return [result]
+
+    def _evaluate(self, window: PaneSketch) -> dict:
+        summary = self.evaluator.run(window)
+        drift_share, drift_by_columns = summary['drift_share'], summary['drift_by_columns']
+        target_drift = drift_by_columns.get(self.layout.target, {}).get('drift_score', 0.0)
+        issues = fairness_issues(window)
+
+        in_cooldown, version = self.analyzer.model_state()
+        est_f1_drop, revenue_risk, leaderboard, weighted_score = self.analyzer.assess_risk(window.n_rows, drift_share, target_drift, drift_by_columns)
+        decision = self.analyzer.make_decision(weighted_score, drift_share, target_drift, len(issues) > 0, in_cooldown, version)
+        if self.db and not in_cooldown:
+            self.db.log_run(drift_share, weighted_score, revenue_risk, decision, feature_scores=feature_scores(drift_by_columns), model_id=self.model_id)
+
+        return {
+            "model_id": self.model_id,
+            "window": {
+                "index": self.windows_closed,
+                "mode": self.mode,
+                "rows": window.n_rows,
+                "start_row": self.rows_seen - window.n_rows,
+                "end_row": self.rows_seen,
+                "closed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            },
+            "drift_share": drift_share,
+            "target_drift": target_drift,
+            "weighted_score": weighted_score,
+            "fairness": issues,
+            "automation": decision,
+            "leaderboard": leaderboard,
+        }
+
+    def state(self):
+        with self._lock:
+            return {
+                "model_id": self.model_id,
+                "reference": self.layout.profile.fingerprint,
+                "mode": self.mode,
+                "window_rows": self.window_rows,
+                "slide_rows": self.slide_rows,
+                "rows_seen": self.rows_seen,
+                "open_pane_rows": self.open_pane.n_rows,
+                "panes": len(self.panes),
+                "windows_closed": self.windows_closed,
+                "last_window": self.history[-1] if self.history else None,
+            }
+
+
+class MonitorRegistry:
+    """model_id -> ModelMonitor (in memory; window state restarts with the process)."""
+    def __init__(self, db_engine=None):
+        self.db = db_engine
+        self._monitors = {}
+        self._lock = threading.Lock()
+
+    def register(self, model_id, profile, window_rows=MONITOR_WINDOW_ROWS, slide_rows=None) -> ModelMonitor:
+        monitor = ModelMonitor(model_id, profile, window_rows, slide_rows, db_engine=self.db)
+        with self._lock:
+            self._monitors[model_id] = monitor
+        return monitor
+
+    def get(self, model_id):
+        with self._lock:
+            return self._monitors.get(model_id)
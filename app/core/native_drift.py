@@ -0,0 +1,250 @@
+import numpy as np
+import pandas as pd
+
+from app.config import DRIFT_DATASET_SHARE, DRIFT_SMALL_SAMPLE, DRIFT_THRESHOLD
+from app.core.parallel import ColumnExecutor
+from app.core.profile import KS_EXACT_MAX_N, ReferenceProfile, bin_counts_sorted, frequency_table, ks_p_value
+
+# Floor for empty bins so PSI stays finite (same convention as Evidently)
+PSI_EPS = 0.0001
+
+
+class NativeDriftEngine:
+    """
+    Built-in drift engine. Computes KS, Wasserstein, chi-square, z-test, Jensen-Shannon and PSI for every column
+    as batched NumPy operations against a compiled ReferenceProfile.
+
+    Test selection follows Evidently's defaults (n_values: distinct values of both sides together), so scores and
+    the thresholds tuned on them mean the same with either engine:
+    - numeric, n_values > 5: KS p-value (n_ref <= DRIFT_SMALL_SAMPLE) else normed Wasserstein distance
+    - categorical, or numeric with n_values <= 5: chi-square p-value (n_values > 2) or z-test p-value (binary)
+      when n_ref <= DRIFT_SMALL_SAMPLE, else Jensen-Shannon distance
+    PSI is reported alongside but never decides.
+    `exact=False` uses the Kolmogorov-limit KS p-value on every sample size (sampled runs: latency first).
+    """
+    def __init__(self, threshold=DRIFT_THRESHOLD, p_value=0.05, dataset_drift_share=DRIFT_DATASET_SHARE, small_sample=DRIFT_SMALL_SAMPLE, executor=None,
+                 exact=True):
+        self.executor = executor or ColumnExecutor()
+        self.exact = exact
+        self.threshold = threshold
+        self.p_value = p_value
+        self.dataset_drift_share = dataset_drift_share
+        self.small_sample = small_sample
+
+    def run(self, ref_profile: ReferenceProfile, curr_df: pd.DataFrame) -> dict:
+        """Returns {'drift_share', 'dataset_drift', 'number_of_drifted_columns', 'drift_by_columns'}."""
+        drift_by_columns = {}
+
+        num_cols = [c for c in ref_profile.numeric_columns if c in curr_df.columns]
+        if num_cols:
+            ref_matrix, ref_counts = ref_profile.numeric_matrix, ref_profile.numeric_counts
+            if num_cols != ref_profile.numeric_columns:
+                idx = [ref_profile.numeric_columns.index(c) for c in num_cols]
+                ref_matrix, ref_counts = ref_matrix[:, idx], ref_counts[idx]
+            curr = curr_df[num_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+            # Column shards are independent, so wide tables are split across cores
+            drift_by_columns.update(self.executor.run_sharded(
+                self._numeric_shard,
+                [ref_matrix, curr],
+                [num_cols, ref_counts, [ref_profile.histograms.get(c) for c in num_cols]],
+                n_rows=ref_matrix.shape[0] + curr.shape[0],
+            ))
+
+        cat_cols = [c for c in ref_profile.categories if c in curr_df.columns]
+        if cat_cols:
+            drift_by_columns.update(self.categorical_drift(
+                cat_cols,
+                [ref_profile.categories[c] for c in cat_cols],
+                [pd.Series(counts, index=values) for values, counts in map(frequency_table, (curr_df[c] for c in cat_cols))],
+            ))
+
+        n_drifted = sum(1 for d in drift_by_columns.values() if d["drift_detected"])
+        drift_share = n_drifted / len(drift_by_columns) if drift_by_columns else 0.0
+        return {
+            "drift_share": drift_share,
+            "dataset_drift": drift_share >= self.dataset_drift_share,
+            "number_of_drifted_columns": n_drifted,
+            "drift_by_columns": drift_by_columns,
+        }
+
+    # ------------------------------------------------------------------
+    # NUMERIC: one sort over the stacked [reference; current] matrix gives
+    # both empirical CDFs for every column at once.
+    # ------------------------------------------------------------------
+    def _numeric_shard(self, ref_sorted, curr, columns, ref_counts, histograms):
+        return self.numeric_drift(columns, ref_sorted, np.asarray(ref_counts), curr, histograms)
+
+    def numeric_drift(self, columns, ref_sorted, ref_counts, curr, histograms):
+        n_ref_rows = ref_sorted.shape[0]
+        curr_counts = (~np.isnan(curr)).sum(axis=0)
+
+        # Work on the transposed (columns x rows) layout so every per-column kernel runs over contiguous memory.
+        # Sorting the current block first leaves two sorted runs per column that the stable (tim)sort merges in linear time.
+        curr_sorted = np.sort(curr.T, axis=1)
+        stacked = np.concatenate([np.ascontiguousarray(ref_sorted.T), curr_sorted], axis=1)
+        order = np.argsort(stacked, axis=1, kind="stable")  # NaN sorts last
+        values = np.take_along_axis(stacked, order, axis=1)
+        del stacked
+        valid = ~np.isnan(values)
+
+        # Running counts of reference / current values; NaNs sit at the end so valid positions are a prefix
+        seen_ref = np.cumsum((order < n_ref_rows) & valid, axis=1, dtype=np.int64)
+        seen_all = np.minimum(np.arange(1, values.shape[1] + 1), (ref_counts + curr_counts)[:, None])
+        del order
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gap = np.abs(seen_ref / ref_counts[:, None] - (seen_all - seen_ref) / curr_counts[:, None])
+        del seen_ref, seen_all
+
+        # KS: only evaluate the CDF gap at the last element of each run of tied values
+        tie_end = valid.copy()
+        tie_end[:, :-1] &= values[:, :-1] != values[:, 1:]
+        ks_stat = np.where(tie_end, gap, 0.0).max(axis=1)
+        n_values = tie_end.sum(axis=1)  # Distinct values of both sides
+        del tie_end
+        en = np.maximum(np.round(ref_counts * curr_counts / np.maximum(ref_counts + curr_counts, 1)), 1)
+        # Samples scipy would test exactly (max(n1, n2) <= KS_EXACT_MAX_N) get ks_2samp's exact p-value; on larger
+        # ones its finite-n distribution gets expensive, and the Kolmogorov limit is used instead
+        from scipy.stats import kstwobign
+        ks_p = kstwobign.sf(ks_stat * np.sqrt(en))
+        exact = (np.maximum(ref_counts, curr_counts) <= KS_EXACT_MAX_N) & (ref_counts > 0) & (curr_counts > 0) & self.exact
+        for j in np.flatnonzero(exact):
+            ks_p[j] = ks_p_value(ks_stat[j], ref_counts[j], curr_counts[j])
+        ks_p = np.clip(ks_p, 0, 1)
+
+        # Wasserstein-1: area between the CDFs, normed by the reference std like Evidently
+        widths = np.diff(values, axis=1)
+        area = np.where(valid[:, 1:], gap[:, :-1] * widths, 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore"):
+            ref_std = np.nan_to_num(np.nanstd(ref_sorted, axis=0))
+        wasserstein = area / np.maximum(ref_std, 0.001)
+
+        results = {}
+        for j, col in enumerate(columns):
+            n_ref, n_curr = int(ref_counts[j]), int(curr_counts[j])
+            if n_ref == 0 or n_curr == 0:
+                continue
+            psi = None
+            if histograms[j] is not None:
+                cuts, ref_bins = histograms[j]
+                curr_bins = bin_counts_sorted(curr_sorted[j, :n_curr], cuts)
+                psi = population_stability_index(ref_bins, curr_bins)
+
+            if n_ref <= self.small_sample:
+                score, detected, test = float(ks_p[j]), bool(ks_p[j] < self.p_value), "K-S p_value"
+            else:
+                score, detected, test = float(wasserstein[j]), bool(wasserstein[j] >= self.threshold), "Wasserstein distance (normed)"
+
+            results[col] = {
+                "column_name": col,
+                "column_type": "num",
+                "stattest_name": test,
+                "drift_score": score,
+                "drift_detected": detected,
+                "ks_statistic": float(ks_stat[j]),
+                "ks_p_value": float(ks_p[j]),
+                "ks_exact": bool(exact[j]),
+                "wasserstein_norm": float(wasserstein[j]),
+                "psi": psi,
+            }
+
+        # Few distinct values: tested as categories of those values, like Evidently
+        few = [j for j, col in enumerate(columns) if col in results and n_values[j] <= 5]
+        if few:
+            tables = [np.unique(ref_sorted[:int(ref_counts[j]), j], return_counts=True) for j in few]
+            curr_tables = [pd.Series(*np.unique(curr_sorted[j, :int(curr_counts[j])], return_counts=True)[::-1]) for j in few]
+            for col, stats in self.categorical_drift([columns[j] for j in few], tables, curr_tables).items():
+                results[col] = {**results[col], **stats, "column_type": "num", "psi": results[col]["psi"]}
+        return results
+
+    # ------------------------------------------------------------------
+    # CATEGORICAL: frequency tables aligned into one padded count matrix,
+    # then chi-square, z-test, Jensen-Shannon and PSI for all columns in a single pass.
+    # ------------------------------------------------------------------
+    def categorical_drift(self, columns, ref_tables, curr_tables):
+        aligned = []
+        for (ref_values, ref_freq), curr_freq in zip(ref_tables, curr_tables):
+            ref_s = pd.Series(ref_freq, index=ref_values)
+            keys = ref_s.index.union(curr_freq.index, sort=False)
+            aligned.append((ref_s.reindex(keys, fill_value=0).to_numpy(), curr_freq.reindex(keys, fill_value=0).to_numpy()))
+
+        width = max(len(r) for r, _ in aligned)
+        ref_mat = np.zeros((len(columns), width))
+        curr_mat = np.zeros((len(columns), width))
+        mask = np.zeros((len(columns), width), dtype=bool)
+        for i, (r, c) in enumerate(aligned):
+            ref_mat[i, :len(r)] = r
+            curr_mat[i, :len(c)] = c
+            mask[i, :len(r)] = True
+
+        ref_n = ref_mat.sum(axis=1, keepdims=True)
+        curr_n = curr_mat.sum(axis=1, keepdims=True)
+        present = mask & (ref_mat + curr_mat > 0)
+        n_values = present.sum(axis=1)
+
+        # Chi-square goodness of fit of current counts against reference-scaled expectations
+        expected = ref_mat * (curr_n / np.maximum(ref_n, 1))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            terms = np.where(expected > 0, (curr_mat - expected) ** 2 / expected, np.where(curr_mat > 0, np.inf, 0.0))
+        chi_stat = np.where(present, terms, 0.0).sum(axis=1)
+        from scipy.stats import chi2, norm
+        chi_p = chi2.sf(chi_stat, np.maximum(n_values - 1, 1))
+
+        # Two-proportion z-test on the share of the first value present (binary columns; symmetric in the value)
+        first = np.argmax(present, axis=1)[:, None]
+        p_ref = np.take_along_axis(ref_mat, first, axis=1)[:, 0] / np.maximum(ref_n[:, 0], 1)
+        p_curr = np.take_along_axis(curr_mat, first, axis=1)[:, 0] / np.maximum(curr_n[:, 0], 1)
+        pooled = (p_ref * ref_n[:, 0] + p_curr * curr_n[:, 0]) / np.maximum(ref_n[:, 0] + curr_n[:, 0], 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (p_ref - p_curr) / np.sqrt(pooled * (1 - pooled) * (1 / ref_n[:, 0] + 1 / curr_n[:, 0]))
+        z_p = np.where(n_values > 1, 2 * norm.sf(np.abs(z)), 1.0)  # One value on both sides: no drift
+
+        js = jensen_shannon(ref_mat, curr_mat)
+        psi = population_stability_index(ref_mat, curr_mat, mask=mask, axis=1)
+
+        results = {}
+        for i, col in enumerate(columns):
+            if ref_n[i, 0] == 0 or curr_n[i, 0] == 0:
+                continue
+            if ref_n[i, 0] > self.small_sample:
+                score, detected, test = float(js[i]), bool(js[i] >= self.threshold), "Jensen-Shannon distance"
+            elif n_values[i] > 2:
+                score, detected, test = float(chi_p[i]), bool(chi_p[i] < self.p_value), "chi-square p_value"
+            else:
+                score, detected, test = float(z_p[i]), bool(z_p[i] < self.p_value), "Z-test p_value"
+            results[col] = {
+                "column_name": col,
+                "column_type": "cat",
+                "stattest_name": test,
+                "drift_score": score,
+                "drift_detected": detected,
+                "chi2_statistic": float(chi_stat[i]),
+                "chi2_p_value": float(chi_p[i]),
+                "jensenshannon": float(js[i]),
+                "psi": float(psi[i]),
+            }
+        return results
+
+
+def jensen_shannon(ref_counts, curr_counts):
+    """Jensen-Shannon distance (natural log, as scipy / Evidently) between the rows of two count matrices."""
+    ref_p = ref_counts / np.maximum(ref_counts.sum(axis=1, keepdims=True), 1)
+    curr_p = curr_counts / np.maximum(curr_counts.sum(axis=1, keepdims=True), 1)
+    mid = (ref_p + curr_p) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(ref_p > 0, ref_p * np.log(ref_p / mid), 0.0) + np.where(curr_p > 0, curr_p * np.log(curr_p / mid), 0.0)
+    return np.sqrt(np.maximum(terms.sum(axis=1) / 2, 0.0))
+
+
+def population_stability_index(ref_counts, curr_counts, mask=None, axis=None):
+    """PSI between two (batches of) binned count vectors."""
+    ref_counts = np.asarray(ref_counts, dtype=np.float64)
+    curr_counts = np.asarray(curr_counts, dtype=np.float64)
+    ref_p = ref_counts / np.maximum(ref_counts.sum(axis=axis, keepdims=axis is not None), 1)
+    curr_p = curr_counts / np.maximum(curr_counts.sum(axis=axis, keepdims=axis is not None), 1)
+    ref_p = np.maximum(ref_p, PSI_EPS)
+    curr_p = np.maximum(curr_p, PSI_EPS)
+    terms = (curr_p - ref_p) * np.log(curr_p / ref_p)
+    if mask is not None:
+        terms = np.where(mask, terms, 0.0)
+    total = terms.sum(axis=axis)
+    return float(total) if axis is None else total
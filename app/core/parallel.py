@@ -0,0 +1,123 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.config import PARALLEL_MIN_CELLS, PARALLEL_MODE, PARALLEL_WORKERS
+
+# Pools are expensive to start (especially processes), so they are shared per (mode, size)
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _get_pool(mode, workers):
+    with _POOLS_LOCK:
+        key = (mode, workers)
+        if key not in _POOLS:
+            cls = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+            _POOLS[key] = cls(max_workers=workers)
+        return _POOLS[key]
+
+
+class ColumnExecutor:
+    """
+    Shards per-column statistical work across cores.
+    - serial:  run in the calling thread
+    - thread:  thread pool; right for NumPy/SciPy kernels that release the GIL (sort, cumsum, ufuncs)
+    - process: process pool; column matrices are copied once into shared memory and workers attach zero-copy
+    - auto:    thread pool when the cost model says the input is big enough, serial otherwise
+    Results are merged back in column order, so every mode returns exactly what the serial path returns.
+    """
+    def __init__(self, mode=PARALLEL_MODE, max_workers=PARALLEL_WORKERS, min_cells=PARALLEL_MIN_CELLS):
+        self.mode = mode
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.min_cells = min_cells
+
+    def plan(self, n_rows, n_cols):
+        """Cost model: returns (mode, n_shards) for a rows x columns workload."""
+        if self.mode == "serial" or self.max_workers == 1 or n_cols < 2:
+            return "serial", 1
+        # Below min_cells the pool hand-off costs more than the tests themselves
+        if n_rows * n_cols < self.min_cells:
+            return "serial", 1
+        mode = "thread" if self.mode == "auto" else self.mode
+        return mode, min(self.max_workers, n_cols)
+
+    def run_sharded(self, fn, matrices, column_args=(), n_rows=None):
+        """
+        Calls fn(*matrix_blocks, *column_arg_slices) -> dict once per shard of columns and merges the dicts.
+        - matrices: 2D arrays (rows x columns) split along axis 1
+        - column_args: per-column sequences sliced alongside the matrices
+        """
+        n_cols = matrices[0].shape[1]
+        n_rows = n_rows if n_rows is not None else max(m.shape[0] for m in matrices)
+        mode, n_shards = self.plan(n_rows, n_cols)
+
+        if mode == "serial":
+            return fn(*matrices, *column_args)
+
+        bounds = np.linspace(0, n_cols, n_shards + 1).astype(int)
+        shards = [(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+        pool = _get_pool(mode, self.max_workers)
+
+        if mode == "process":
+            return self._run_processes(pool, fn, matrices, column_args, shards)
+
+        futures = [
+            pool.submit(fn, *[m[:, lo:hi] for m in matrices], *[a[lo:hi] for a in column_args])
+            for lo, hi in shards
+        ]
+        return _merge(f.result() for f in futures)
+
+    def _run_processes(self, pool, fn, matrices, column_args, shards):
+        segments = []
+        try:
+            specs = []
+            for m in matrices:
+                m = np.asfortranarray(m)  # Column slices of a Fortran buffer are contiguous
+                shm = shared_memory.SharedMemory(create=True, size=max(m.nbytes, 1))
+                segments.append(shm)
+                np.ndarray(m.shape, dtype=m.dtype, buffer=shm.buf, order="F")[:] = m
+                specs.append((shm.name, m.shape, m.dtype.str))
+
+            futures = [
+                pool.submit(_shared_memory_call, fn, specs, lo, hi, [a[lo:hi] for a in column_args])
+                for lo, hi in shards
+            ]
+            return _merge(f.result() for f in futures)
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+
+def _shared_memory_call(fn, specs, lo, hi, column_args):
+    """Process-pool entry point: attach to the shared column buffers and run one shard."""
+    segments, blocks = [], []
+    try:
+        for name, shape, dtype in specs:
+            shm = _attach(name)
+            segments.append(shm)
+            blocks.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, order="F")[:, lo:hi])
+        return fn(*blocks, *column_args)
+    finally:
+        blocks.clear()  # Views must be released before the segment can be closed
+        for shm in segments:
+            shm.close()
+
+
+def _attach(name):
+    try:
+        # The creating process owns the segment; workers must not register it with the resource tracker
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+def _merge(results):
+    merged = {}
+    for r in results:
+        merged.update(r)
+    return merged
@@ -0,0 +1,265 @@
+import hashlib
+import math
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app.config import PROFILE_BINS, PROFILE_CACHE_DIR, PROFILE_CACHE_DISK_BYTES, PROFILE_CACHE_MAX_BYTES
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Content hash of a DataFrame (column names, dtypes and values).
+    Identical data gives the same hash regardless of the upload format it came from.
+    """
+    h = hashlib.sha256()
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class ReferenceProfile:
+    """
+    Compiled, reusable reference-side statistics.
+    - numeric_matrix: one sorted column per numeric feature (NaN-padded at the end), enough for exact KS / Wasserstein
+    - histograms: reference quantile cut points + bin counts per numeric column (PSI)
+    - categories: category -> frequency table per non-numeric column (chi-square / PSI)
+    """
+    def __init__(self, fingerprint, n_rows, columns, numeric_columns, numeric_matrix, numeric_counts, histograms, categories):
+        self.fingerprint = fingerprint
+        self.n_rows = n_rows
+        self.columns = columns
+        self.numeric_columns = numeric_columns
+        self.numeric_matrix = numeric_matrix
+        self.numeric_counts = numeric_counts
+        self.histograms = histograms
+        self.categories = categories
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, fingerprint: str = None, bins: int = PROFILE_BINS):
+        numeric_columns = list(df.select_dtypes(include=np.number).columns)
+
+        # Sorting along axis 0 sorts every column at once and pushes NaN to the end
+        matrix = df[numeric_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        matrix = np.asfortranarray(np.sort(matrix, axis=0))
+        counts = (~np.isnan(matrix)).sum(axis=0)
+
+        histograms = {}
+        for j, col in enumerate(numeric_columns):
+            values = matrix[:counts[j], j]
+            if len(values):
+                histograms[col] = histogram_from_sorted(values, bins)
+
+        categories = {col: frequency_table(df[col]) for col in df.columns if col not in numeric_columns}
+
+        return cls(fingerprint or frame_fingerprint(df), len(df), list(df.columns),
+                   numeric_columns, matrix, counts, histograms, categories)
+
+    @property
+    def numeric(self):
+        """Column name -> sorted, NaN-free values (views into numeric_matrix)."""
+        return {col: self.numeric_matrix[:self.numeric_counts[j], j] for j, col in enumerate(self.numeric_columns)}
+
+    @property
+    def nbytes(self):
+        size = self.numeric_matrix.nbytes
+        size += sum(e.nbytes + c.nbytes for e, c in self.histograms.values())
+        # Object arrays only count pointers, so approximate the labels by their text length
+        size += sum(sum(len(str(v)) for v in vals) + cnt.nbytes for vals, cnt in self.categories.values())
+        return size
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)  # Atomic: readers never see a half-written profile
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        profile = cls.__new__(cls)
+        profile.__dict__.update(state)
+        return profile
+
+
+def frequency_table(series: pd.Series):
+    """
+    (values, counts) of the non-missing values, most frequent first (value_counts order).
+    Category columns are counted straight from their integer codes.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+        order = np.argsort(-counts, kind="stable")
+        order = order[counts[order] > 0]
+        return series.cat.categories.to_numpy()[order], counts[order]
+    freq = series.value_counts(dropna=True)
+    return freq.index.to_numpy(), freq.to_numpy()
+
+
+def histogram_from_sorted(values: np.ndarray, bins: int = PROFILE_BINS):
+    """
+    Quantile bins of a sorted reference column.
+    Returns the interior cut points and the counts of the open-ended bins they define,
+    so current values outside the reference range still land in the first/last bin.
+    """
+    cuts = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1))[1:-1])
+    return cuts, bin_counts_sorted(values, cuts)
+
+
+def bin_counts_sorted(values: np.ndarray, cuts: np.ndarray) -> np.ndarray:
+    """Counts of a sorted array in the bins (-inf, c1), [c1, c2), ..., [ck, inf)."""
+    positions = np.searchsorted(values, cuts, side="left")
+    return np.diff(np.concatenate([[0], positions, [len(values)]]))
+
+
+class ProfileCache:
+    """
+    Content-addressed cache of ReferenceProfiles.
+    Memory tier is an LRU bounded by bytes; every compiled profile is also persisted to
+    `spill_dir` (bounded by `max_disk_bytes`, oldest files evicted first) so it survives memory eviction and restarts.
+    """
+    def __init__(self, max_bytes=PROFILE_CACHE_MAX_BYTES, spill_dir=PROFILE_CACHE_DIR, max_disk_bytes=PROFILE_CACHE_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, df: pd.DataFrame) -> ReferenceProfile:
+        fingerprint = frame_fingerprint(df)
+
+        profile = self._get(fingerprint)
+        if profile is not None:
+            return profile
+
+        # Build outside the lock; two concurrent misses on the same data just compile it twice
+        profile = ReferenceProfile.build(df, fingerprint)
+        with self._lock:
+            self.misses += 1
+            self._put(profile)
+        self._persist(profile)
+        return profile
+
+    def _get(self, fingerprint):
+        with self._lock:
+            if fingerprint in self._entries:
+                self._entries.move_to_end(fingerprint)
+                self.hits += 1
+                return self._entries[fingerprint]
+
+        path = self._path(fingerprint)
+        if path and os.path.exists(path):
+            try:
+                profile = ReferenceProfile.load(path)
+            except Exception as e:
+                print(f"⚠️ Corrupt profile {fingerprint[:12]}: {e}")
+                return None
+            with self._lock:
+                self.disk_hits += 1
+                self._put(profile)
+            return profile
+        return None
+
+    def _put(self, profile):
+        if profile.fingerprint in self._entries:
+            return
+        self._entries[profile.fingerprint] = profile
+        self._bytes += profile.nbytes
+        # Evict least recently used, but always keep the entry just added
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.nbytes
+            self.evictions += 1
+
+    def _path(self, fingerprint):
+        return os.path.join(self.spill_dir, f"{fingerprint}.profile") if self.spill_dir else None
+
+    def _persist(self, profile):
+        if not self.spill_dir:
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            profile.save(self._path(profile.fingerprint))
+            self._trim_disk()
+        except OSError as e:
+            print(f"⚠️ Profile spill failed: {e}")
+
+    def _trim_disk(self):
+        files = [os.path.join(self.spill_dir, f) for f in os.listdir(self.spill_dir) if f.endswith(".profile")]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        while files and total > self.max_disk_bytes:
+            oldest = files.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+# scipy.stats.ks_2samp switches from the exact to the asymptotic p-value above this sample size
+KS_EXACT_MAX_N = 10000
+
+
+def ks_2samp_presorted(ref_sorted: np.ndarray, curr: np.ndarray):
+    """
+    Two-sided KS test against an already sorted, NaN-free reference.
+    Mirrors ks_2samp(method='auto') but skips re-sorting the reference on large samples.
+    """
+    from scipy.stats import ks_2samp, kstwo  # Imported on first use: scipy.stats alone takes ~1s to import
+    curr = np.asarray(curr, dtype=np.float64)
+    curr = np.sort(curr[~np.isnan(curr)])
+    n1, n2 = len(ref_sorted), len(curr)
+    if n1 == 0 or n2 == 0:
+        return np.nan, np.nan
+    if max(n1, n2) <= KS_EXACT_MAX_N:
+        res = ks_2samp(ref_sorted, curr)
+        return res.statistic, res.pvalue
+
+    data_all = np.concatenate([ref_sorted, curr])
+    cdf1 = np.searchsorted(ref_sorted, data_all, side="right") / n1
+    cdf2 = np.searchsorted(curr, data_all, side="right") / n2
+    d = float(np.max(np.abs(cdf1 - cdf2)))
+    en = n1 * n2 / (n1 + n2)
+    p_val = float(np.clip(kstwo.sf(d, np.round(en)), 0, 1))
+    return d, p_val
+
+
+def ks_p_value(stat, n1, n2):
+    """
+    Two-sided KS p-value of a statistic between samples of n1 and n2 values, for tests that only keep counts
+    (native engine, streaming windows, sketches): ks_2samp's exact distribution when max(n1, n2) <= KS_EXACT_MAX_N,
+    as ks_2samp(method='auto') picks it, else the Kolmogorov limit.
+    """
+    from scipy.stats import kstwo, kstwobign
+    from scipy.stats._stats_py import _attempt_exact_2kssamp  # ks_2samp's exact path, which only needs d, n1 and n2
+    n1, n2 = int(n1), int(n2)
+    if max(n1, n2) <= KS_EXACT_MAX_N:
+        exact, _, p = _attempt_exact_2kssamp(n1, n2, math.gcd(n1, n2), float(stat), "two-sided")
+        if not exact:  # ks_2samp's own fallback
+            p = kstwo.sf(stat, round(n1 * n2 / (n1 + n2)))
+    else:
+        p = kstwobign.sf(stat * np.sqrt(max(round(n1 * n2 / (n1 + n2)), 1)))
+    return float(np.clip(p, 0, 1))
@@ -0,0 +1,220 @@
+import json
+import os
+import pickle
+import re
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.config import INGEST_COMPACT, REFERENCE_DIR
+from app.core.compact import CompactSchema
+from app.core.profile import ReferenceProfile, frame_fingerprint
+
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+# Unreferenced objects younger than this are left alone: another worker may be about to point a name at it
+GC_GRACE_S = 60
+
+
+class StoredReference:
+    """
+    A registered reference, opened read-only from its memory-mapped files. Nothing is parsed or copied on open.
+    - `profile` is a ReferenceProfile whose sorted numeric matrix is the mapped file, so the native drift engine
+      reads the store directly
+    - `frame()` is a zero-copy pandas view of the stored rows, for the consumers that need rows (Evidently,
+      HTML reports, /api/sql)
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.fingerprint = self.meta["fingerprint"]
+        with open(os.path.join(path, "profile.pkl"), "rb") as f:
+            state = pickle.load(f)
+        state["numeric_matrix"] = np.load(os.path.join(path, "numeric.npy"), mmap_mode="r")
+        self.profile = ReferenceProfile.__new__(ReferenceProfile)
+        self.profile.__dict__.update(state)
+        self._frame = None
+        self._schema = None
+        self._lock = threading.Lock()
+
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            import pyarrow as pa
+            with self._lock:
+                if self._frame is None:
+                    table = pa.ipc.open_file(pa.memory_map(os.path.join(self.path, "data.arrow"))).read_all()
+                    self._frame = table.to_pandas(split_blocks=True)  # One block per column: views of the mapped buffers
+        return self._frame
+
+    def schema(self) -> CompactSchema:
+        """
+        The stored encoding, to apply to current uploads (same category dictionaries and narrowed numbers).
+        Read from the Arrow file's schema and dictionaries, without building the frame.
+        """
+        if self._schema is not None:
+            return self._schema
+        import pyarrow as pa
+        reader = pa.ipc.open_file(pa.memory_map(os.path.join(self.path, "data.arrow")))
+        dtypes = reader.schema.empty_table().to_pandas().dtypes  # The frame's dtypes, categories aside
+        batch = reader.get_batch(0) if reader.num_record_batches else None
+        schema = {}
+        for i, (col, dtype) in enumerate(dtypes.items()):
+            if isinstance(dtype, pd.CategoricalDtype):
+                if batch is not None:  # A file holds one dictionary per column
+                    dtype = pd.CategoricalDtype(batch.column(i).dictionary.to_pandas(), ordered=dtype.ordered)
+                schema[col] = dtype
+            elif dtype.kind in "iuf":
+                schema[col] = dtype
+        self._schema = CompactSchema(schema)
+        return self._schema
+
+    @staticmethod
+    def write(path, df: pd.DataFrame, profile: ReferenceProfile):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(os.path.join(path, "data.arrow"), "wb") as f:
+            with pa.ipc.new_file(f, table.schema) as writer:  # Uncompressed, so buffers can be mapped as they are
+                writer.write_table(table)
+        np.save(os.path.join(path, "numeric.npy"), profile.numeric_matrix)
+        state = {k: v for k, v in profile.__dict__.items() if k != "numeric_matrix"}
+        with open(os.path.join(path, "profile.pkl"), "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"fingerprint": profile.fingerprint, "rows": len(df), "columns": list(map(str, df.columns)),
+                       "created_at": datetime.now().isoformat(timespec="seconds")}, f)
+
+
+class ReferenceStore:
+    """
+    Named reference datasets, compiled once and shared by every worker process.
+    Each one is persisted as memory-mapped columnar files, so workers open it without parsing and all of
+    them read the same page-cache pages:
+        <root>/objects/<fingerprint>/data.arrow     rows (Arrow IPC, text columns as dictionaries)
+        <root>/objects/<fingerprint>/numeric.npy    sorted numeric columns of the reference profile
+        <root>/objects/<fingerprint>/profile.pkl    the rest of the profile (histograms, frequency tables)
+        <root>/objects/<fingerprint>/meta.json
+        <root>/names/<name>.json                    name -> fingerprint
+    Objects are written to a temporary directory and renamed into place, and names are replaced atomically,
+    so a reader sees either the previous reference or the complete new one.
+    """
+    def __init__(self, root=REFERENCE_DIR):
+        self.root = root
+        self._open = {}  # fingerprint -> StoredReference (immutable content, so kept for the process lifetime)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "names"), exist_ok=True)
+
+    def register(self, name: str, df: pd.DataFrame) -> dict:
+        """Stores `df` (compact-encoded like an upload) and points `name` at it."""
+        self._check_name(name)
+        if INGEST_COMPACT:
+            df = CompactSchema.infer(df).apply(df)
+        fingerprint = frame_fingerprint(df)
+
+        target = self._object_path(fingerprint)
+        try:
+            os.utime(target)  # Already stored: restarts the garbage-collection grace period of an unreferenced object
+        except FileNotFoundError:  # Not stored yet, or just removed by another worker's collect_garbage
+            tmp = os.path.join(self.root, "objects", f".tmp-{uuid.uuid4().hex}")
+            os.makedirs(tmp)
+            try:
+                StoredReference.write(tmp, df, ReferenceProfile.build(df, fingerprint))
+                os.rename(tmp, target)
+            except OSError:
+                if not os.path.exists(target):  # Else another worker stored the same content first
+                    raise
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+        self._write_atomic(self._name_path(name), json.dumps({
+            "fingerprint": fingerprint, "registered_at": datetime.now().isoformat(timespec="seconds"),
+        }).encode())
+        print(f"📌 Reference '{name}' -> {fingerprint[:12]} ({len(df):,} rows)")
+        self.collect_garbage()
+        return self.describe(name)
+
+    def get(self, name: str):
+        """The StoredReference `name` currently points at, or None."""
+        entry = self._read_name(name)
+        return self.open(entry["fingerprint"]) if entry else None
+
+    def open(self, fingerprint: str):
+        with self._lock:
+            ref = self._open.get(fingerprint)
+            if ref is None and os.path.exists(self._object_path(fingerprint)):
+                ref = self._open[fingerprint] = StoredReference(self._object_path(fingerprint))
+            return ref
+
+    def describe(self, name: str):
+        entry = self._read_name(name)
+        if entry is None:
+            return None
+        path = self._object_path(entry["fingerprint"])
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        except OSError:
+            return None
+        return {"name": name, **entry, "rows": meta["rows"], "columns": meta["columns"], "bytes": size}
+
+    def list(self):
+        return [d for d in map(self.describe, sorted(self._names())) if d]
+
+    def delete(self, name: str) -> bool:
+        try:
+            os.remove(self._name_path(name))
+        except (OSError, ValueError):
+            return False
+        self.collect_garbage()
+        return True
+
+    def collect_garbage(self, grace_s=GC_GRACE_S):
+        """Removes objects no name points at (processes that still map them keep their pages until they close)."""
+        live = {e["fingerprint"] for e in map(self._read_name, self._names()) if e}
+        cutoff = time.time() - grace_s
+        objects = os.path.join(self.root, "objects")
+        for entry in os.listdir(objects):  # Left-over temporary directories of failed registrations included
+            path = os.path.join(objects, entry)
+            if entry in live:
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+                    with self._lock:
+                        self._open.pop(entry, None)
+            except OSError:
+                pass
+
+    def _names(self):
+        return [f[:-len(".json")] for f in os.listdir(os.path.join(self.root, "names")) if f.endswith(".json")]
+
+    def _read_name(self, name):
+        try:
+            with open(self._name_path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _check_name(self, name):
+        if not NAME_PATTERN.match(name or ""):
+            raise ValueError(f"Invalid reference name: {name!r} (letters, digits, '_', '.', '-'; at most 64)")
+
+    def _name_path(self, name):
+        self._check_name(name)  # Never let a request-supplied name escape the store directory
+        return os.path.join(self.root, "names", f"{name}.json")
+
+    def _object_path(self, fingerprint):
+        return os.path.join(self.root, "objects", fingerprint)
+
+    @staticmethod
+    def _write_atomic(path, data: bytes):
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
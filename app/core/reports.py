@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+
+import pandas as pd
+
+from app.config import REPORT_CACHE_MAX_BYTES, REPORT_DIR
+from app.core.profile import frame_fingerprint
+
+REPORT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ReportStore:
+    """
+    Lazy HTML reports.
+    An analysis only registers its inputs (reference/current stored once per content hash as Parquet);
+    the Evidently HTML is rendered on first request, cached on disk and evicted least-recently-used
+    once the store grows past `max_bytes`.
+
+    Layout:
+        <root>/datasets/<fingerprint>.parquet
+        <root>/<report_id>/manifest.json
+        <root>/<report_id>/report.html   (after first render)
+    """
+    def __init__(self, root=REPORT_DIR, max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(os.path.join(self.root, "datasets"), exist_ok=True)
+
+    def register(self, ref_df: pd.DataFrame, curr_df: pd.DataFrame, ref_fp: str = None, curr_fp: str = None) -> str:
+        """
+        Stores the analysis inputs and returns the report ID (content address of the pair).
+        `ref_df` may be a callable returning the rows: only called when the dataset is not stored yet.
+        """
+        ref_fp = ref_fp or frame_fingerprint(ref_df)
+        curr_fp = curr_fp or frame_fingerprint(curr_df)
+        report_id = hashlib.sha256(f"{ref_fp}:{curr_fp}".encode()).hexdigest()[:32]
+
+        report_dir = self._dir(report_id)
+        if os.path.exists(os.path.join(report_dir, "manifest.json")):
+            self._touch(report_id)
+            return report_id
+
+        self._save_dataset(ref_fp, ref_df)
+        self._save_dataset(curr_fp, curr_df)
+        os.makedirs(report_dir, exist_ok=True)
+        self._write_atomic(os.path.join(report_dir, "manifest.json"),
+                           json.dumps({"reference": ref_fp, "current": curr_fp}).encode())
+        self.evict()
+        return report_id
+
+    def exists(self, report_id) -> bool:
+        if not REPORT_ID_PATTERN.match(report_id or ""):
+            return False  # Never let a request-supplied ID escape the store directory
+        return os.path.exists(os.path.join(self._dir(report_id), "manifest.json"))
+
+    def etag(self, report_id) -> str:
+        # Reports are content-addressed, so the ID itself identifies the rendered bytes
+        return f'"{report_id}"'
+
+    def get_html_path(self, report_id) -> str:
+        """Path of the rendered HTML, rendering it first if needed (one render per report at a time)."""
+        path = os.path.join(self._dir(report_id), "report.html")
+        if os.path.exists(path):
+            self._touch(report_id)
+            return path
+
+        with self._lock_for(report_id):
+            if not os.path.exists(path):
+                with open(os.path.join(self._dir(report_id), "manifest.json")) as f:
+                    manifest = json.load(f)
+                ref_df = pd.read_parquet(self._dataset_path(manifest["reference"]))
+                curr_df = pd.read_parquet(self._dataset_path(manifest["current"]))
+
+                from app.core.drift_engine import build_evidently_report
+                html = build_evidently_report(ref_df, curr_df).get_html()
+                self._write_atomic(path, html.encode("utf-8"))
+        with self._locks_guard:
+            self._locks.pop(report_id, None)
+
+        self.evict()
+        return path
+
+    def render_in_background(self, report_id):
+        """BackgroundTasks hook: pre-render so the first GET is served from disk."""
+        try:
+            self.get_html_path(report_id)
+        except Exception as e:
+            print(f"⚠️ Report pre-render failed ({report_id}): {e}")
+
+    def evict(self):
+        """Drops least recently used reports (and datasets no report references) until under max_bytes."""
+        reports = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name != "datasets" and os.path.isdir(path):
+                reports.append((os.path.getmtime(path), name, _dir_size(path)))
+        datasets_dir = os.path.join(self.root, "datasets")
+        total = sum(size for _, _, size in reports) + _dir_size(datasets_dir)
+        if total <= self.max_bytes:
+            return
+
+        reports.sort()
+        while reports and total > self.max_bytes:
+            _, name, size = reports.pop(0)
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            total -= size
+
+        live = set()
+        for _, name, _ in reports:
+            try:
+                with open(os.path.join(self.root, name, "manifest.json")) as f:
+                    live.update(json.load(f).values())
+            except (OSError, ValueError):
+                pass
+        for fname in os.listdir(datasets_dir):
+            if fname.rsplit(".", 1)[0] not in live:
+                try:
+                    os.remove(os.path.join(datasets_dir, fname))
+                except OSError:
+                    pass
+
+    def _save_dataset(self, fingerprint, df):
+        path = self._dataset_path(fingerprint)
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            (df() if callable(df) else df).to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+
+    def _dataset_path(self, fingerprint):
+        return os.path.join(self.root, "datasets", f"{fingerprint}.parquet")
+
+    def _dir(self, report_id):
+        return os.path.join(self.root, report_id)
+
+    def _touch(self, report_id):
+        try:
+            os.utime(self._dir(report_id))
+        except OSError:
+            pass
+
+    def _lock_for(self, report_id):
+        with self._locks_guard:
+            return self._locks.setdefault(report_id, threading.Lock())
+
+    @staticmethod
+    def _write_atomic(path, data: bytes):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, f))
+            except OSError:
+                pass
+    return total
@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+from app.config import RIGOR_ALPHA, RIGOR_MAX_ROWS, RIGOR_RESAMPLES
+from app.core.fairness import factorize
+
+CORRECTIONS = ("holm", "bh", "none")
+BINS = 20            # Reference-quantile bins per numeric column (KS is measured on the bin edges)
+TOP_CATEGORIES = 20  # Most frequent values per categorical column; the rest share one bucket
+
+
+def adjust_p_values(p_values, method="holm"):
+    """
+    p-values adjusted for testing them together: "holm" (Holm-Bonferroni, family-wise error rate),
+    "bh" (Benjamini-Hochberg, false discovery rate) or "none".
+    """
+    p = np.asarray(p_values, dtype=np.float64)
+    m = len(p)
+    if method == "none" or m == 0:
+        return p.copy()
+    order = np.argsort(p, kind="stable")
+    ranked = p[order]
+    if method == "holm":
+        adjusted = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    elif method == "bh":
+        adjusted = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError(f"Unknown correction {method!r}: expected one of {CORRECTIONS}")
+    out = np.empty(m)
+    out[order] = np.minimum(adjusted, 1.0)
+    return out
+
+
+def _weights(idx, n):
+    """(B x n) float32 matrix counting how often each row index appears in each row of `idx`: one flat bincount."""
+    b = idx.shape[0]
+    flat = (idx + (np.arange(b, dtype=np.int64) * n)[:, None]).ravel()
+    return np.bincount(flat, minlength=b * n).reshape(b, n).astype(np.float32)
+
+
+def _interval(boot, observed, alpha):
+    """
+    Bootstrap percentile interval shifted by the bootstrap's bias estimate: distances between two samples are biased
+    upward (resampling adds noise on both sides), so plain percentiles can miss the observed value. Clipped to [0, 1].
+    """
+    lo, hi = np.quantile(boot, [alpha / 2, 1 - alpha / 2], axis=0)
+    bias = np.mean(boot, axis=0) - observed
+    return np.clip(lo - bias, 0.0, 1.0), np.clip(hi - bias, 0.0, 1.0)
+
+
+class _Encoding:
+    """
+    Pooled rows (reference first) one-hot encoded as a dense (rows x bins) matrix, one block of bins per column:
+    numeric columns on reference-quantile bins plus a missing bin, categorical ones on their most frequent values
+    plus an "other" and a missing bucket. Bin counts of any weighting of the rows are then one matrix product.
+    """
+    def __init__(self, ref, curr, columns):
+        self.columns = list(columns)
+        self.ordered = []  # Numeric blocks (KS over the bins) vs categorical ones (total variation distance)
+        codes, widths = [], []
+        for col in self.columns:
+            if pd.api.types.is_numeric_dtype(ref[col]) and not pd.api.types.is_bool_dtype(ref[col]):
+                ref_values = ref[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                values = np.concatenate([ref_values, curr[col].to_numpy(dtype=np.float64, na_value=np.nan)])
+                present = ref_values[~np.isnan(ref_values)]
+                cuts = np.unique(np.quantile(present, np.linspace(0, 1, BINS + 1)[1:-1])) if len(present) else np.empty(0)
+                code = np.searchsorted(cuts, values, side="right")
+                code[np.isnan(values)] = len(cuts) + 1
+                widths.append(len(cuts) + 2)
+                self.ordered.append(True)
+            else:
+                pooled = pd.concat([ref[col], curr[col]], ignore_index=True)
+                code, _ = factorize(pooled)
+                counts = np.bincount(code[code >= 0], minlength=1)
+                keep = np.argsort(-counts, kind="stable")[:TOP_CATEGORIES]
+                lookup = np.full(len(counts) + 1, len(keep), dtype=np.intp)  # Others -> bucket len(keep)
+                lookup[keep] = np.arange(len(keep))
+                lookup[-1] = len(keep) + 1                                  # Code -1 (missing) -> last bucket
+                code = lookup[code]
+                widths.append(len(keep) + 2)
+                self.ordered.append(False)
+            codes.append(code)
+        self.widths = np.array(widths, dtype=np.intp)
+        self.starts = np.concatenate([[0], np.cumsum(self.widths)[:-1]]).astype(np.intp)
+        self.ordered = np.array(self.ordered)
+        n = len(ref) + len(curr)
+        self.matrix = np.zeros((n, int(self.widths.sum())), dtype=np.float32)
+        self.matrix[np.arange(n)[:, None], np.stack(codes, axis=1) + self.starts] = 1.0
+
+    def statistics(self, ref_counts, curr_counts):
+        """
+        (B x columns) distances between the two sides' bin shares, for each row of (B x bins) counts:
+        KS (largest CDF gap over the bins) for numeric columns, total variation distance for categorical ones.
+        """
+        ref_counts, curr_counts = np.atleast_2d(ref_counts), np.atleast_2d(curr_counts)
+        diff = self._shares(curr_counts) - self._shares(ref_counts)
+        cdf = np.cumsum(diff, axis=1, dtype=np.float64)
+        before = np.concatenate([np.zeros((len(cdf), 1)), cdf[:, self.starts[1:] - 1]], axis=1)
+        ks = np.maximum.reduceat(np.abs(cdf - np.repeat(before, self.widths, axis=1)), self.starts, axis=1)
+        tvd = 0.5 * np.add.reduceat(np.abs(diff), self.starts, axis=1)
+        return np.where(self.ordered, ks, tvd)
+
+    def _shares(self, counts):
+        rows = counts[:, :self.widths[0]].sum(axis=1, keepdims=True)  # Every row falls in one bin of each column
+        return counts / np.maximum(rows, 1)
+
+
+class ResamplingTests:
+    """
+    Permutation p-values and bootstrap intervals for every column at once. Each resample is one row of an index
+    matrix shared by all columns; its bin counts for every column come from a single (B x rows) @ (rows x bins)
+    product. `resamples` permutations plus as many bootstrap draws; deterministic for a given seed.
+    """
+    def __init__(self, resamples=RIGOR_RESAMPLES or 1000, max_rows=RIGOR_MAX_ROWS, alpha=RIGOR_ALPHA, seed=0, chunk=250):
+        self.resamples = resamples
+        self.max_rows = max_rows
+        self.alpha = alpha
+        self.seed = seed
+        self.chunk = chunk  # Resamples per matrix product: bounds the (chunk x rows) weight matrix
+
+    def run(self, ref: pd.DataFrame, curr: pd.DataFrame, columns=None, correction="holm"):
+        """Tests of `columns` (default: every shared one) of `curr` against `ref`; None when there is nothing to test."""
+        rng = np.random.default_rng(self.seed)
+        columns = [c for c in (ref.columns if columns is None else columns) if c in curr.columns]
+        if not columns or ref.empty or curr.empty:
+            return None
+        ref, curr = self._subsample(ref, rng), self._subsample(curr, rng)
+        n_ref, n_curr = len(ref), len(curr)
+        encoding = _Encoding(ref[columns], curr[columns], columns)
+        h = encoding.matrix
+        total = h.sum(axis=0)
+        observed = encoding.statistics(h[:n_ref].sum(axis=0), h[n_ref:].sum(axis=0))[0]
+
+        # Null: current rows drawn without replacement from the pooled rows (a permutation of the group labels)
+        null = np.empty((self.resamples, len(columns)))
+        for start in range(0, self.resamples, self.chunk):
+            b = min(self.chunk, self.resamples - start)
+            picks = np.argpartition(rng.random((b, n_ref + n_curr), dtype=np.float32), n_curr - 1, axis=1)[:, :n_curr]
+            curr_counts = _weights(picks, n_ref + n_curr) @ h
+            null[start:start + b] = encoding.statistics(total - curr_counts, curr_counts)
+
+        # Bootstrap: each side resampled with replacement from its own rows
+        boot = np.empty_like(null)
+        for start in range(0, self.resamples, self.chunk):
+            b = min(self.chunk, self.resamples - start)
+            ref_counts = _weights(rng.integers(0, n_ref, (b, n_ref)), n_ref) @ h[:n_ref]
+            curr_counts = _weights(rng.integers(0, n_curr, (b, n_curr)), n_curr) @ h[n_ref:]
+            boot[start:start + b] = encoding.statistics(ref_counts, curr_counts)
+
+        tol = 1e-9  # Float ties between a resample and the observed statistic count as "at least as extreme"
+        p_values = (1 + (null >= observed - tol).sum(axis=0)) / (self.resamples + 1)
+        adjusted = adjust_p_values(p_values, correction)
+        lo, hi = _interval(boot, observed, self.alpha)
+
+        # Drift share: columns beyond their own null critical value, against the same share under the null
+        critical = np.quantile(null, 1 - self.alpha, axis=0)
+        share = float(np.mean(observed > critical))
+        null_share, boot_share = (null > critical).mean(axis=1), (boot > critical).mean(axis=1)
+        share_lo, share_hi = _interval(boot_share, share, self.alpha)
+
+        return {
+            "method": "permutation",
+            "resamples": self.resamples,
+            "rows": [n_ref, n_curr],
+            "correction": correction,
+            "alpha": self.alpha,
+            "columns": {
+                col: {
+                    "test": "K-S (binned)" if encoding.ordered[i] else "TVD",
+                    "statistic": round(float(observed[i]), 6),
+                    "p_value": float(p_values[i]),
+                    "p_adjusted": float(adjusted[i]),
+                    "interval": [round(float(lo[i]), 6), round(float(hi[i]), 6)],
+                    "significant": bool(adjusted[i] < self.alpha),
+                }
+                for i, col in enumerate(columns)
+            },
+            "drift_share": {
+                "share": share,
+                "p_value": float((1 + np.sum(null_share >= share)) / (self.resamples + 1)),
+                "interval": [round(float(share_lo), 6), round(float(share_hi), 6)],
+            },
+        }
+
+    def _subsample(self, df, rng):
+        if len(df) <= self.max_rows:
+            return df
+        return df.iloc[np.sort(rng.choice(len(df), self.max_rows, replace=False))]
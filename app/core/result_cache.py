@@ -0,0 +1,137 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import RESULT_CACHE_ENTRIES, RESULT_CACHE_TTL_S
+
+ACTIVE = ("queued", "running")
+SUBMIT_WAIT_S = 300  # Safety net only: a leading request always attaches or abandons its flight
+
+
+def digest_upload(upload, block=1 << 20) -> str:
+    """Content hash of an upload's raw bytes (the spooled file is rewound for parsing)."""
+    h = hashlib.blake2b(digest_size=16)
+    upload.file.seek(0)
+    while chunk := upload.file.read(block):
+        h.update(chunk)
+    upload.file.seek(0)
+    return h.hexdigest()
+
+
+def analysis_key(reference: str, current: str, config: str) -> str:
+    """Result-cache key: both inputs' content hashes and the analysis config version."""
+    return hashlib.blake2b(json.dumps([reference, current, config]).encode(), digest_size=16).hexdigest()
+
+
+class Flight:
+    """An analysis in progress. Identical requests attach to it instead of starting their own."""
+    def __init__(self):
+        self.job = None
+        self._submitted = threading.Event()
+
+    def attach(self, job):
+        """Called by the leading request once its job is queued (or with None when it gave up)."""
+        self.job = job
+        self._submitted.set()
+
+    def wait(self, timeout=SUBMIT_WAIT_S):
+        """The job of this flight, once the leader has queued it; None if the leader failed before that."""
+        self._submitted.wait(timeout)
+        return self.job
+
+    def active(self):
+        return not self._submitted.is_set() or (self.job is not None and self.job.status in ACTIVE)
+
+
+class ResultCache:
+    """
+    Results of finished analyses, keyed by analysis_key(). LRU bounded by entry count, entries expire after `ttl_s`.
+    Also the single-flight table: lookup() makes the first of several identical requests the leader of a Flight
+    and hands that Flight to the others, so the work runs once and everybody polls the same job.
+    """
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES, ttl_s=RESULT_CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()  # key -> (stored_at, result, size)
+        self._flights = {}
+        self._bytes = 0  # JSON size of the cached results
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        """
+        (result, flight, leader):
+        - a cached result: (result, None, False)
+        - an identical analysis in progress: (None, its Flight, False); wait on it
+        - otherwise: (None, a new Flight, True); the caller runs the analysis, then attach()es its job or abandon()s
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[0] < self.ttl_s:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], None, False
+                self._drop(key)
+                self.expirations += 1
+            self._flights = {k: f for k, f in self._flights.items() if f.active()}
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.joined += 1
+                return None, flight, False
+            flight = self._flights[key] = Flight()
+            self.misses += 1
+            return None, flight, True
+
+    def abandon(self, key, flight):
+        """The leader failed before queueing a job (bad upload, full queue): waiters stop waiting."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.attach(None)
+
+    def put(self, key, result):
+        with self._lock:
+            self._flights.pop(key, None)
+            if self.max_entries <= 0:
+                return
+            if key in self._entries:
+                self._drop(key)
+            size = len(json.dumps(result, default=str))
+            self._entries[key] = (time.monotonic(), result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.joined
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "in_flight": sum(1 for f in self._flights.values() if f.active()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "joined": self.joined,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.joined) / lookups, 4) if lookups else 0.0,
+            }
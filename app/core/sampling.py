@@ -0,0 +1,138 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from app.config import SAMPLE_CONFIDENCE, SAMPLE_ERROR
+from app.core.approx_drift import js_interval
+from app.core.fairness import PROTECTED_COLUMNS, factorize
+from app.core.profile import ReferenceProfile, frequency_table, ks_p_value
+
+STRATA_COLUMNS = ("class", *PROTECTED_COLUMNS)
+
+
+def dkw_sample_size(error, confidence):
+    """Rows after which an empirical CDF is within `error` of the true one everywhere, with `confidence` (DKW inequality)."""
+    return math.ceil(math.log(2 / (1 - confidence)) / (2 * error ** 2))
+
+
+def allocate(sizes, n):
+    """Proportional share of `n` rows per stratum, rounded by largest remainder so the quotas add up to `n`."""
+    exact = sizes * (n / sizes.sum())
+    quotas = np.floor(exact).astype(np.int64)
+    short = n - int(quotas.sum())
+    if short:
+        quotas[np.argsort(quotas - exact, kind="stable")[:short]] += 1
+    return quotas
+
+
+class StratifiedSample:
+    """Rows drawn by a StratifiedSampler (`frame`, in their original order) and what is needed to bound scores measured on them."""
+    def __init__(self, frame, n_rows, strata_columns, n_strata, error, confidence):
+        self.frame = frame
+        self.n_rows = n_rows  # Rows of the full frame
+        self.strata_columns = strata_columns
+        self.n_strata = n_strata
+        self.error = error
+        self.confidence = confidence
+
+    def share_error(self, col):
+        """
+        Bound on the gap between a value's share in the sample and in the full frame. Two CDF points for any column;
+        a stratum column's shares are only off by the rounding of the quotas (under one row per stratum).
+        """
+        if col in self.strata_columns:
+            return min(2 * self.error, self.n_strata / len(self.frame))
+        return 2 * self.error
+
+    def score_interval(self, col, stats, ref_profile: ReferenceProfile):
+        """
+        (lo, hi) range of the full-frame score given the sample's. KS statistics and value shares are within their
+        bounds with the sample's confidence; Wasserstein and Jensen-Shannon errors are propagated from them (first order).
+        """
+        score, test = stats["drift_score"], stats["stattest_name"]
+        if test == "Wasserstein distance (normed)":
+            values = self.frame[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = np.sort(values[~np.isnan(values)])
+            # Pointwise band of the sample CDF (narrow in the tails where G(1 - G) is small), integrated over x
+            m = len(values)
+            cdf = np.arange(1, m) / m
+            band = np.minimum(self.error, 2 * self.error * np.sqrt(cdf * (1 - cdf)) + 1 / m)
+            ref = ref_profile.numeric[col]
+            err = float(np.sum(band * np.diff(values))) / max(float(np.std(ref)), 0.001)
+            return max(score - err, 0.0), score + err
+        if test == "K-S p_value":
+            m = int(self.frame[col].notna().sum())
+            n_ref = int(ref_profile.numeric_counts[ref_profile.numeric_columns.index(col)])
+            ks = stats["ks_statistic"]
+            return ks_p_value(min(ks + self.error, 1.0), n_ref, m), ks_p_value(max(ks - self.error, 0.0), n_ref, m)
+        if test == "Jensen-Shannon distance":
+            if col in ref_profile.categories:
+                ref_values, ref_counts = ref_profile.categories[col]
+            else:  # Numeric column with few distinct values
+                ref_values, ref_counts = np.unique(ref_profile.numeric[col], return_counts=True)
+            curr_values, curr_counts = frequency_table(self.frame[col])
+            ref_s, curr_s = pd.Series(ref_counts, index=ref_values), pd.Series(curr_counts, index=curr_values)
+            keys = ref_s.index.union(curr_s.index, sort=False)
+            ref_p = ref_s.reindex(keys, fill_value=0).to_numpy() / ref_s.sum()
+            curr_p = curr_s.reindex(keys, fill_value=0).to_numpy() / curr_s.sum()
+            lo, hi = js_interval(ref_p, curr_p, 0.0, self.share_error(col))
+            return min(lo, score), max(hi, score)
+        return score, score  # Chi-square, z-test: a valid test of the sample, not bounded against the full frame
+
+    def to_dict(self):
+        return {
+            "rows": self.n_rows,
+            "sample_rows": len(self.frame),
+            "error": self.error,
+            "confidence": self.confidence,
+            "strata_columns": list(self.strata_columns),
+            "strata": self.n_strata,
+        }
+
+
+class StratifiedSampler:
+    """
+    Stratified reservoir sampling of the current side of an analysis.
+    - The sample size follows from the error budget: every column's empirical CDF is within `error` of the
+      full frame's with probability `confidence` (DKW), whatever the row count
+    - Strata are the combinations of the target and the protected columns. Each gets its proportional share of
+      the sample, so label and group proportions (target drift, disparate impact) are kept up to rounding
+    - Within a stratum every subset of its quota is equally likely, as in a reservoir filled from that stratum.
+      The rows are in memory already, so each quota is drawn directly (Floyd's algorithm) instead of streamed
+    """
+    def __init__(self, error=SAMPLE_ERROR, confidence=SAMPLE_CONFIDENCE, strata_columns=STRATA_COLUMNS, seed=None):
+        if not 0 < error < 1 or not 0 < confidence < 1:
+            raise ValueError("sample error and confidence must be in (0, 1)")
+        self.error = error
+        self.confidence = confidence
+        self.strata_columns = strata_columns
+        self.sample_rows = dkw_sample_size(error, confidence)
+        self._rng = np.random.default_rng(seed)
+
+    def draw(self, df: pd.DataFrame):
+        """StratifiedSample of `df`, or None when `df` is not larger than the sample would be."""
+        n_rows = len(df)
+        if n_rows <= self.sample_rows:
+            return None
+
+        columns = [c for c in self.strata_columns if c in df.columns]
+        stratum = np.zeros(n_rows, dtype=np.intp)
+        if columns:
+            codes, shape = [], []
+            for col in columns:
+                c, uniques = factorize(df[col])
+                codes.append(np.where(c < 0, len(uniques), c))  # Missing values are a stratum of their own
+                shape.append(len(uniques) + 1)
+            stratum, _ = pd.factorize(np.ravel_multi_index(codes, shape))
+        sizes = np.bincount(stratum)
+        quotas = allocate(sizes, self.sample_rows)
+
+        # Row numbers grouped by stratum (radix sort on small codes), then each quota drawn from its group
+        grouped = np.argsort(stratum.astype(np.min_scalar_type(len(sizes))), kind="stable")
+        starts = np.cumsum(sizes) - sizes
+        picks = [starts[s] + self._rng.choice(sizes[s], quotas[s], replace=False, shuffle=False) for s in np.flatnonzero(quotas)]
+        keep = np.sort(grouped[np.concatenate(picks)])
+
+        frame = df.take(keep).reset_index(drop=True)
+        return StratifiedSample(frame, n_rows, columns, len(sizes), self.error, self.confidence)
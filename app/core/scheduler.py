@@ -0,0 +1,355 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from app.config import SCHEDULER_DATA_DIR, SCHEDULER_INTERVAL_S, SCHEDULER_TICK_S, SCHEDULER_WORKERS
+from app.core.drift_engine import DEFAULT_THRESHOLDS, DriftAnalyzer
+from app.core.ingest import ARROW_SUFFIXES, PARQUET_SUFFIXES, read_path
+from app.core.metrics import SCHEDULER_CHECKS, SCHEDULER_LAG
+from app.core.profile import ReferenceProfile
+
+DATA_SUFFIXES = (".csv",) + PARQUET_SUFFIXES + ARROW_SUFFIXES
+SETTLE_S = 1.0         # Files modified more recently than this are left for the next check (still being written)
+RATE_WINDOW_S = 300    # Checks/minute are measured over this trailing window
+STATS_HISTORY = 100    # Recent lags / durations kept per model
+
+
+class ModelSpec:
+    """
+    A monitored model: its reference file, where its current data lands (file or directory), how often and how
+    urgently it is checked, and its own feature knowledge graph and decision thresholds.
+    """
+    def __init__(self, model_id, reference_path, current_path, interval_s=SCHEDULER_INTERVAL_S, priority=0,
+                 deadline_s=None, features=None, thresholds=None, version=None):
+        if not model_id:
+            raise ValueError("model_id is required")
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        unknown = set(thresholds or {}) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Unknown thresholds: {', '.join(sorted(unknown))} (known: {', '.join(DEFAULT_THRESHOLDS)})")
+        self.model_id = model_id
+        self.reference_path = reference_path
+        self.current_path = current_path
+        self.interval_s = float(interval_s)
+        self.priority = int(priority)
+        self.deadline_s = self.interval_s if deadline_s is None else float(deadline_s)  # Due -> finished, at the latest
+        self.features = features
+        self.thresholds = thresholds or {}
+        self.version = version
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        return cls(**d)
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in ("model_id", "reference_path", "current_path", "interval_s", "priority",
+                                              "deadline_s", "features", "thresholds", "version")}
+
+
+class CurrentSource:
+    """
+    Where a model's current data comes from (polled; no watcher dependency).
+    - a file: analysed again whenever it changes (mtime / size)
+    - a directory: every new or modified CSV / Parquet / Arrow file, oldest first
+    """
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._seen = {}  # path -> (mtime_ns, size) when last analysed
+
+    def pending(self):
+        """[(path, signature)] not analysed yet, oldest first."""
+        if os.path.isdir(self.path):
+            names = [n for n in os.listdir(self.path) if n.lower().endswith(DATA_SUFFIXES) and not n.startswith(".")]
+            paths = [os.path.join(self.path, n) for n in names]
+        else:
+            paths = [self.path]
+
+        fresh = []
+        settled_before = (self.clock() - SETTLE_S) * 1e9
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature = (st.st_mtime_ns, st.st_size)
+            if self._seen.get(path) != signature and st.st_mtime_ns <= settled_before:
+                fresh.append((st.st_mtime_ns, path, signature))
+        fresh.sort()
+        return [(path, signature) for _, path, signature in fresh]
+
+    def mark_done(self, path, signature):
+        self._seen[path] = signature
+
+
+class ScheduledModel:
+    """Runtime state of one registered model (times are on the scheduler's monotonic clock)."""
+    def __init__(self, spec: ModelSpec, profile: ReferenceProfile, analyzer: DriftAnalyzer, source: CurrentSource, due: float):
+        self.spec = spec
+        self.profile = profile
+        self.analyzer = analyzer
+        self.source = source
+        self.due = due
+        self.running = False
+        self.outcomes = {"analysed": 0, "unchanged": 0, "failed": 0}
+        self.deadline_misses = 0
+        self.lags = deque(maxlen=STATS_HISTORY)
+        self.durations = deque(maxlen=STATS_HISTORY)
+        self.completed = deque()  # Completion times within RATE_WINDOW_S
+        self.last_result = None
+        self.last_error = None
+
+    @property
+    def deadline(self):
+        return self.due + self.spec.deadline_s
+
+    def record(self, outcome, lag, duration, finished):
+        self.outcomes[outcome] += 1
+        self.lags.append(lag)
+        self.durations.append(duration)
+        self.completed.append(finished)
+        if finished > self.deadline:
+            self.deadline_misses += 1
+
+    def to_dict(self, now, detail=False):
+        out = {
+            "model_id": self.spec.model_id,
+            "priority": self.spec.priority,
+            "interval_s": self.spec.interval_s,
+            "running": self.running,
+            "due_in_s": round(self.due - now, 3),
+            "checks": dict(self.outcomes),
+            "deadline_misses": self.deadline_misses,
+            "checks_per_minute": _per_minute(self.completed, now),
+            "lag_s": _summary(self.lags),
+            "duration_s": _summary(self.durations),
+            "last_error": self.last_error,
+        }
+        if detail:
+            out["spec"] = self.spec.to_dict()
+            out["reference"] = self.profile.fingerprint
+            out["last_result"] = self.last_result
+        return out
+
+
+class MonitoringScheduler:
+    """
+    Periodic drift checks for every registered model.
+    - A dispatcher thread wakes every tick (and whenever a check finishes or a model is registered) and starts due
+      checks on a pool of `workers` threads. A model never has two checks running at once.
+    - Due checks start by priority (highest first), then earliest deadline (due + deadline_s) first.
+    - A check analyses the oldest new current file against the reference compiled at registration (native engine);
+      with more files waiting, the model is due again at once, so one busy directory cannot hold a worker.
+    - Lag (start - due), durations, deadline misses and checks per minute are kept per model.
+    """
+    def __init__(self, db_engine=None, profile_cache=None, workers=SCHEDULER_WORKERS, tick_s=SCHEDULER_TICK_S,
+                 data_dir=SCHEDULER_DATA_DIR, clock=time.monotonic):
+        self.db = db_engine
+        self.profile_cache = profile_cache
+        self.workers = max(1, workers)
+        self.tick_s = tick_s
+        self.data_dir = data_dir
+        self.clock = clock
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="check")
+        self._models = {}
+        self._running = 0
+        self._completed = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # REGISTRATION
+    # ------------------------------------------------------------------
+    def register(self, spec: ModelSpec) -> dict:
+        """Compiles the model's reference and schedules its first check right away (replaces an existing model)."""
+        self._check_path(spec.reference_path, "reference_path")
+        self._check_path(spec.current_path, "current_path")
+        if not os.path.isfile(spec.reference_path):
+            raise ValueError("reference_path must be a file")
+
+        ref_df = read_path(spec.reference_path)
+        profile = self.profile_cache.get_or_build(ref_df) if self.profile_cache else ReferenceProfile.build(ref_df)
+        del ref_df
+        analyzer = DriftAnalyzer(db_engine=self.db, engine="native", model_id=spec.model_id, feature_config=spec.features, thresholds=spec.thresholds)
+        if spec.version and self.db:
+            self.db.seed_version(spec.model_id, spec.version)
+
+        model = ScheduledModel(spec, profile, analyzer, CurrentSource(spec.current_path), due=self.clock())
+        with self._lock:
+            self._models[spec.model_id] = model
+        print(f"🗓️ Scheduled model '{spec.model_id}' every {spec.interval_s:g}s (priority {spec.priority})")
+        self._wake.set()
+        return model.to_dict(self.clock(), detail=True)
+
+    def load(self, path):
+        """Registers every model of a JSON list of specs; a model that fails is reported and skipped."""
+        with open(path) as f:
+            specs = json.load(f)
+        for d in specs:
+            try:
+                self.register(ModelSpec.from_dict(d))
+            except Exception as e:
+                print(f"❌ Model '{d.get('model_id')}' not scheduled: {e}")
+
+    def unregister(self, model_id) -> bool:
+        with self._lock:
+            return self._models.pop(model_id, None) is not None
+
+    def check_now(self, model_id) -> bool:
+        """Makes the model due immediately."""
+        with self._lock:
+            model = self._models.get(model_id)
+            if model is None:
+                return False
+            model.due = min(model.due, self.clock())
+        self._wake.set()
+        return True
+
+    def _check_path(self, path, name):
+        if not path:
+            raise ValueError(f"{name} is required")
+        root = os.path.realpath(self.data_dir)
+        if os.path.commonpath([os.path.realpath(path), root]) != root:
+            raise ValueError(f"{name} must be inside SCHEDULER_DATA_DIR ({self.data_dir})")
+        if not os.path.exists(path):
+            raise ValueError(f"{name} does not exist: {path}")
+
+    # ------------------------------------------------------------------
+    # DISPATCH
+    # ------------------------------------------------------------------
+    def start(self):
+        """Starts the dispatcher thread (without it, checks only run through run_pending())."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            self._wake.wait(self._sleep_time())
+            self._wake.clear()
+
+    def _sleep_time(self):
+        with self._lock:
+            idle = [m.due for m in self._models.values() if not m.running]
+        return max(0.0, min([self.tick_s] + [due - self.clock() for due in idle]))
+
+    def run_pending(self) -> int:
+        """Starts as many due checks as there are free workers; returns how many were started."""
+        now = self.clock()
+        with self._lock:
+            due = [m for m in self._models.values() if not m.running and m.due <= now]
+            due.sort(key=lambda m: (-m.spec.priority, m.deadline, m.spec.model_id))
+            started = due[:self.workers - self._running]
+            for model in started:
+                model.running = True
+                self._running += 1
+        for model in started:
+            self.executor.submit(self._check, model)
+        return len(started)
+
+    def _check(self, model: ScheduledModel):
+        model_id = model.spec.model_id
+        start = self.clock()
+        lag = max(0.0, start - model.due)
+        SCHEDULER_LAG.observe(lag, model=model_id)
+        outcome, backlog = "unchanged", False
+        try:
+            pending = model.source.pending()
+            if pending:
+                path, signature = pending[0]
+                backlog = len(pending) > 1
+                try:
+                    df = read_path(path)
+                    result = model.analyzer.run_analysis(None, df, ref_profile=model.profile)
+                finally:
+                    model.source.mark_done(path, signature)  # A file that fails is not retried until it changes
+                model.last_result = {"file": path, "rows": len(df), "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **result}
+                model.last_error = None
+                outcome = "analysed"
+        except Exception as e:
+            outcome = "failed"
+            model.last_error = f"{type(e).__name__}: {e}"
+            print(f"❌ Scheduled check of '{model_id}' failed: {model.last_error}")
+        finally:
+            finished = self.clock()
+            with self._lock:
+                model.record(outcome, lag, finished - start, finished)
+                self._completed.append(finished)
+                # Fixed rate: the next slot of the model's period after now (slots missed while running are skipped)
+                if backlog:
+                    model.due = finished
+                else:
+                    model.due += model.spec.interval_s * max(1, math.ceil((finished - model.due) / model.spec.interval_s))
+                model.running = False
+                self._running -= 1
+            SCHEDULER_CHECKS.inc(model=model_id, outcome=outcome)
+            self._wake.set()
+
+    def wait_idle(self, timeout=None) -> bool:
+        """Blocks until no check is running or due (tests, shutdown)."""
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                busy = self._running or any(m.due <= self.clock() for m in self._models.values())
+            if not busy:
+                return True
+            if end is not None and time.monotonic() > end:
+                return False
+            time.sleep(0.01)
+
+    # ------------------------------------------------------------------
+    # STATS
+    # ------------------------------------------------------------------
+    def get(self, model_id):
+        with self._lock:
+            model = self._models.get(model_id)
+            return model.to_dict(self.clock(), detail=True) if model else None
+
+    def stats(self):
+        now = self.clock()
+        with self._lock:
+            models = sorted(self._models.values(), key=lambda m: (-m.spec.priority, m.spec.model_id))
+            lags = [lag for m in models for lag in m.lags]
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "models": len(models),
+                "checks_per_minute": _per_minute(self._completed, now),
+                "lag_s": _summary(lags),
+                "deadline_misses": sum(m.deadline_misses for m in models),
+                "by_model": [m.to_dict(now) for m in models],
+            }
+
+
+def _per_minute(completed: deque, now):
+    while completed and completed[0] < now - RATE_WINDOW_S:
+        completed.popleft()
+    return round(len(completed) * 60 / RATE_WINDOW_S, 3)
+
+
+def _summary(values):
+    if not values:
+        return None
+    values = np.asarray(values)
+    return {"last": round(float(values[-1]), 4), "mean": round(float(values.mean()), 4),
+            "p95": round(float(np.percentile(values, 95)), 4), "max": round(float(values.max()), 4)}
@@ -1,6 +1,9 @@
-from pydantic import BaseModel, Field, validator, ValidationError
+from pydantic import BaseModel, Field, validator
+import numpy as np
 import pandas as pd
 
+TARGET_LABELS = ['<=50K', '>50K']
+
 class AdultCensusRow(BaseModel):
     age: int = Field(..., ge=17, le=100)
     workclass: str
@@ -20,18 +23,120 @@ class AdultCensusRow(BaseModel):
 
     @validator('target')
     def validate_target(cls, v):
-        if v.strip() not in ['<=50K', '>50K']:
+        if v.strip() not in TARGET_LABELS:
             raise ValueError(f"Unknown target label: {v}")
         return v
 
-def validate_dataframe(df: pd.DataFrame, limit: int = 100):
-    errors = []
-    records = df.head(limit).to_dict(orient='records')
-    for i, record in enumerate(records):
-        try:
-            AdultCensusRow(**record)
-        except ValidationError as e:
-            errors.append(f"Row {i}: {str(e)}")
-    if errors:
-        return False, errors
+class ContractReport:
+    """Per-column violation counts plus a few offending row indices (0-based row numbers in the upload)."""
+    def __init__(self, sample_size: int = 5):
+        self.sample_size = sample_size
+        self.n_rows = 0
+        self.violations = {}
+
+    def add(self, column, reason, rows: np.ndarray):
+        if len(rows) == 0:
+            return
+        entry = self.violations.setdefault(column, {"reason": reason, "count": 0, "rows": []})
+        entry["count"] += int(len(rows))
+        room = self.sample_size - len(entry["rows"])
+        if room > 0:
+            entry["rows"].extend(int(r) for r in rows[:room])
+
+    @property
+    def is_valid(self):
+        return not self.violations
+
+    def errors(self):
+        return [
+            f"{col}: {v['count']} of {self.n_rows} rows {v['reason']} (e.g. rows {', '.join(map(str, v['rows']))})"
+            for col, v in self.violations.items()
+        ]
+
+
+class ColumnarContract:
+    """
+    A pydantic row model compiled once into vectorized column checks:
+    integer coercion + range masks for int fields, presence for str fields,
+    set membership for enumerated columns. Runs over whole frames or streamed chunks.
+    """
+    def __init__(self, model, allowed_values=None):
+        self.checks = []
+        for field in model.__fields__.values():
+            info = field.field_info
+            self.checks.append({
+                "column": field.alias,
+                "integer": isinstance(field.type_, type) and issubclass(field.type_, int),
+                "ge": info.ge, "gt": info.gt, "le": info.le, "lt": info.lt,
+                "allowed": (allowed_values or {}).get(field.alias),
+            })
+
+    def check(self, df: pd.DataFrame, report: ContractReport = None, offset: int = 0) -> ContractReport:
+        """Validates every row of `df`; `offset` is the row number of its first row in the full upload."""
+        report = report or ContractReport()
+        n = len(df)
+        report.n_rows += n
+        rows = np.arange(offset, offset + n)
+
+        for chk in self.checks:
+            col = chk["column"]
+            if col not in df.columns:
+                report.add(col, "missing (column not found)", rows)
+                continue
+            series = df[col]
+
+            if chk["integer"]:
+                values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                bad_type = ~np.isfinite(values)
+                report.add(col, "not a valid integer", rows[bad_type])
+                values = np.trunc(values)  # pydantic v1 truncates floats when coercing to int
+                out_of_range = np.zeros(n, dtype=bool)
+                with np.errstate(invalid="ignore"):
+                    if chk["ge"] is not None: out_of_range |= values < chk["ge"]
+                    if chk["gt"] is not None: out_of_range |= values <= chk["gt"]
+                    if chk["le"] is not None: out_of_range |= values > chk["le"]
+                    if chk["lt"] is not None: out_of_range |= values >= chk["lt"]
+                report.add(col, f"out of range {_bounds(chk)}", rows[out_of_range & ~bad_type])
+                continue
+
+            missing = series.isna().to_numpy()
+            report.add(col, "missing", rows[missing])
+
+            if chk["allowed"] is not None:
+                # Check the distinct values once, then broadcast through the factorized codes
+                codes, uniques = pd.factorize(series)
+                ok = np.array([str(u).strip() in chk["allowed"] for u in uniques], dtype=bool)
+                unknown = (codes >= 0) & ~ok[np.maximum(codes, 0)] if len(uniques) else np.zeros(n, dtype=bool)
+                report.add(col, f"not in {chk['allowed']}", rows[unknown])
+
+        return report
+
+    def streaming(self, sample_size: int = 5):
+        """Chunk callback for app.core.ingest: validates each chunk as it is parsed."""
+        return StreamingValidator(self, sample_size)
+
+
+class StreamingValidator:
+    def __init__(self, contract, sample_size=5):
+        self.contract = contract
+        self.report = ContractReport(sample_size)
+
+    def __call__(self, chunk: pd.DataFrame, offset: int):
+        self.contract.check(chunk, self.report, offset)
+
+
+def _bounds(chk):
+    lo = f"[{chk['ge']}" if chk["ge"] is not None else (f"({chk['gt']}" if chk["gt"] is not None else "(-inf")
+    hi = f"{chk['le']}]" if chk["le"] is not None else (f"{chk['lt']})" if chk["lt"] is not None else "inf)")
+    return f"{lo}, {hi}"
+
+
+ADULT_CENSUS_CONTRACT = ColumnarContract(AdultCensusRow, allowed_values={"class": TARGET_LABELS})
+
+
+def validate_dataframe(df: pd.DataFrame, sample_size: int = 5):
+    """Validates the full frame against the Adult Census contract. Returns (is_valid, errors)."""
+    report = ADULT_CENSUS_CONTRACT.check(df, ContractReport(sample_size))
+    if not report.is_valid:
+        return False, report.errors()
     return True, None
@@ -0,0 +1,163 @@
+import importlib
+import threading
+import time
+
+from app.config import DRIFT_ENGINE, REPORT_PRERENDER, SCHEDULER_MODELS_FILE
+
+# Imported by warm_up() so the first request does not pay for them (Evidently only when it will be used)
+WARMUP_MODULES = ["pandas", "scipy.stats", "pyarrow.compute", "app.core.drift_engine", "app.core.monitor", "app.core.schemas", "app.core.ingest"]
+if DRIFT_ENGINE == "evidently" or REPORT_PRERENDER:
+    WARMUP_MODULES += ["evidently.report", "evidently.metrics"]
+
+
+class Services:
+    """
+    The engines behind the API, each built on first use instead of at import, so the app starts (and answers
+    liveness probes) before pandas, SciPy and Evidently are loaded. warm_up() builds everything ahead of the
+    first request; `ready` is set once it has run (or right away when warm-up is disabled).
+    """
+    NAMES = ("db", "profile_cache", "references", "report_store", "monitors", "analyst_store", "job_queue", "result_cache", "llm", "scheduler")
+
+    def __init__(self, job_initializer=None):
+        self.job_initializer = job_initializer
+        self._built = {}
+        self._lock = threading.RLock()
+        self.ready = threading.Event()
+        self.warmup_error = None
+        self.timings = {}  # warm-up step -> seconds
+
+    def _get(self, name):
+        engine = self._built.get(name)
+        if engine is None:
+            with self._lock:
+                engine = self._built.get(name)
+                if engine is None:
+                    engine = self._built[name] = getattr(self, f"_build_{name}")()
+        return engine
+
+    def peek(self, name):
+        """The engine if it has been built, else None (never builds it)."""
+        return self._built.get(name)
+
+    def reset(self, *names):
+        """Drops built engines (all by default); they are rebuilt on next use."""
+        with self._lock:
+            for name in names or self.NAMES:
+                self._built.pop(name, None)
+
+    # ------------------------------------------------------------------
+    # ENGINES
+    # ------------------------------------------------------------------
+    @property
+    def db(self):
+        return self._get("db")
+
+    @property
+    def profile_cache(self):
+        return self._get("profile_cache")
+
+    @property
+    def references(self):
+        return self._get("references")
+
+    @property
+    def report_store(self):
+        return self._get("report_store")
+
+    @property
+    def monitors(self):
+        return self._get("monitors")
+
+    @property
+    def analyst_store(self):
+        return self._get("analyst_store")
+
+    @property
+    def job_queue(self):
+        return self._get("job_queue")
+
+    @property
+    def result_cache(self):
+        return self._get("result_cache")
+
+    @property
+    def llm(self):
+        return self._get("llm")
+
+    @property
+    def scheduler(self):
+        return self._get("scheduler")
+
+    def _build_db(self):
+        from app.core.database import DatabaseEngine
+        return DatabaseEngine()
+
+    def _build_profile_cache(self):
+        from app.core.profile import ProfileCache
+        return ProfileCache()
+
+    def _build_references(self):
+        from app.core.reference_store import ReferenceStore
+        return ReferenceStore()
+
+    def _build_report_store(self):
+        from app.core.reports import ReportStore
+        return ReportStore()
+
+    def _build_monitors(self):
+        from app.core.monitor import MonitorRegistry
+        return MonitorRegistry(db_engine=self.db)
+
+    def _build_analyst_store(self):
+        from app.core.analyst_store import AnalystStore
+        return AnalystStore(self.db)
+
+    def _build_job_queue(self):
+        from app.core.jobs import JobQueue
+        return JobQueue(initializer=self.job_initializer)
+
+    def _build_result_cache(self):
+        from app.core.result_cache import ResultCache
+        return ResultCache()
+
+    def _build_llm(self):
+        from app.core.llm_engine import LLMEngine
+        return LLMEngine()
+
+    def _build_scheduler(self):
+        from app.core.scheduler import MonitoringScheduler
+        scheduler = MonitoringScheduler(db_engine=self.db, profile_cache=self.profile_cache)
+        if SCHEDULER_MODELS_FILE:
+            scheduler.load(SCHEDULER_MODELS_FILE)
+        scheduler.start()
+        return scheduler
+
+    # ------------------------------------------------------------------
+    # LIFECYCLE
+    # ------------------------------------------------------------------
+    def warm_up(self):
+        """Imports the heavy modules and builds every engine, timing each step. A failure is kept in `warmup_error`."""
+        try:
+            for module in WARMUP_MODULES:
+                start = time.perf_counter()
+                importlib.import_module(module)
+                self.timings[f"import {module}"] = time.perf_counter() - start
+            for name in self.NAMES:
+                start = time.perf_counter()
+                self._get(name)
+                self.timings[f"build {name}"] = time.perf_counter() - start
+            print(f"🔥 Warm-up done in {sum(self.timings.values()):.2f}s")
+        except Exception as e:
+            self.warmup_error = f"{type(e).__name__}: {e}"
+            print(f"❌ Warm-up failed: {self.warmup_error}")
+        finally:
+            self.ready.set()
+
+    def shutdown(self):
+        """Stops the job workers and the scheduler (those that were built); a later use builds fresh ones."""
+        queue, scheduler = self.peek("job_queue"), self.peek("scheduler")
+        self.reset("job_queue", "scheduler")
+        if queue is not None:
+            queue.executor.shutdown(wait=False, cancel_futures=True)
+        if scheduler is not None:
+            scheduler.stop()
@@ -0,0 +1,299 @@
+import base64
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import SQL_CACHE_MAX_BYTES, SQL_MAX_BYTES, SQL_MAX_ROWS, SQL_PAGE_SIZE, SQL_STREAM_MAX_ROWS, SQL_TIMEOUT_S
+
+# Authorizer actions a read-only query may perform
+READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+# Functions whose result is not determined by the tables read: such queries are never cached
+VOLATILE_FUNCTIONS = {"random", "randomblob", "changes", "total_changes", "last_insert_rowid"}
+CLOCK_FUNCTIONS = {"date", "time", "datetime", "julianday", "strftime", "unixepoch", "timediff"}
+
+PROGRESS_STEPS = 1000  # VM instructions between two timeout checks
+FETCH_ROWS = 1000      # Rows per fetch / per streamed chunk
+
+# String literals and quoted identifiers are kept verbatim; comments and whitespace runs become one space
+_TOKENS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])|(?:\s|--[^\n]*|/\*.*?(?:\*/|$))+""", re.S)
+
+
+class CursorExpired(Exception):
+    """Raised when a page cursor belongs to an older version of the data (mapped to HTTP 410)."""
+
+
+def normalize_query(query: str) -> str:
+    """Query text with comments and insignificant whitespace removed (cache key; case is kept, it names the columns)."""
+    return _TOKENS.sub(lambda m: m.group(1) or " ", query).strip().rstrip(";").strip()
+
+
+class SQLRunner:
+    """
+    Bounded execution of /api/sql queries.
+    - Timeout: a progress handler aborts the statement once it has run for `timeout_s`
+    - Caps: at most `max_rows` rows / ~`max_bytes` are kept per result; `truncated` says whether rows were left out
+    - Pagination: results are served in pages; `next_cursor` is an opaque (result key, offset) token
+    - Cache: read-only results are cached under (normalized query, version of every table read). Versions are the
+      analyst store fingerprints and the trigger-maintained counters in `table_versions`, so a result stays cached
+      until one of its tables changes. Queries reading anything unversioned, writing, or calling volatile
+      functions always run.
+    """
+    def __init__(self, db_engine, timeout_s=SQL_TIMEOUT_S, max_rows=SQL_MAX_ROWS, max_bytes=SQL_MAX_BYTES, page_size=SQL_PAGE_SIZE, cache_max_bytes=SQL_CACHE_MAX_BYTES):
+        self.db = db_engine
+        self.timeout_s = timeout_s
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.page_size = page_size
+        self.cache_max_bytes = cache_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # PAGED RESULTS
+    # ------------------------------------------------------------------
+    def run(self, query: str, cursor: str = None, page_size: int = None) -> dict:
+        """
+        Returns {'columns', 'data' (one page of row dicts), 'next_cursor', 'truncated', 'cached'}.
+        Raises sqlite3.Error for invalid or timed-out queries, ValueError for a malformed cursor, CursorExpired.
+        """
+        page_size = max(1, min(page_size or self.page_size, self.max_rows))
+        conn = self.db.conn
+        plan = self._plan(conn, query, self._attach(conn, self.db._local.views))
+
+        offset = 0
+        if cursor:
+            key, offset = _decode_cursor(cursor)
+            if key != plan["key"]:
+                raise CursorExpired("The data changed since this cursor was issued; run the query again")
+
+        result = self._get(plan["key"]) if plan["cacheable"] else None
+        cached = result is not None
+        if result is None:
+            result = self._execute(conn, query, plan["readonly"])
+            if plan["cacheable"]:
+                self._put(plan["key"], result)
+
+        columns, rows = result["columns"], result["rows"]
+        page = rows[offset:offset + page_size]
+        end = offset + len(page)
+        return {
+            "columns": columns,
+            "data": [dict(zip(columns, row)) for row in page],
+            "next_cursor": _encode_cursor(plan["key"], end) if end < len(rows) else None,
+            "truncated": result["truncated"],
+            "cached": cached,
+        }
+
+    def _execute(self, conn, query, readonly):
+        deadline = time.monotonic() + self.timeout_s
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+        try:
+            cur = conn.execute(query)
+            columns = [c[0] for c in cur.description] if cur.description else []
+            rows, nbytes, truncated = [], 0, False
+            key_bytes = sum(len(c) + 4 for c in columns)
+            for row in cur:
+                if len(rows) >= self.max_rows or nbytes >= self.max_bytes:
+                    truncated = True
+                    break
+                rows.append(row)
+                nbytes += key_bytes + _row_bytes(row)
+            cur.close()
+            if not readonly:
+                conn.commit()
+            return {"columns": columns, "rows": rows, "truncated": truncated, "nbytes": nbytes}
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise self._timeout_error(e) from None
+        finally:
+            conn.set_progress_handler(None, 0)
+
+    # ------------------------------------------------------------------
+    # STREAMING (NDJSON)
+    # ------------------------------------------------------------------
+    def stream(self, query: str, max_rows=SQL_STREAM_MAX_ROWS):
+        """
+        Prepares `query` (raising sqlite3.Error right away if it is invalid) and returns a generator of NDJSON chunks:
+        one object per row, then a {"_summary": {...}} line. Rows are never buffered beyond one chunk.
+        Runs on its own connection, since a streaming response is iterated from several threadpool threads.
+        The time limit counts SQLite execution only, not the time the client takes to read.
+        """
+        conn = self.db._connect(check_same_thread=False)
+        try:
+            plan = self._plan(conn, query, self._attach(conn, {}))
+        except Exception:
+            conn.close()
+            raise
+        cached = self._get(plan["key"]) if plan["cacheable"] else None
+        if cached is not None and not cached["truncated"]:
+            conn.close()
+            rows = cached["rows"]
+            return self._stream_rows(cached["columns"], (rows[i:i + FETCH_ROWS] for i in range(0, len(rows), FETCH_ROWS)), lambda: None)
+        return self._stream_query(conn, query, plan["readonly"], max_rows)
+
+    def _stream_query(self, conn, query, readonly, max_rows):
+        budget = [self.timeout_s]
+        deadline = [0.0]
+        conn.set_progress_handler(lambda: time.monotonic() > deadline[0], PROGRESS_STEPS)
+
+        def timed(fn, *args):
+            start = time.monotonic()
+            deadline[0] = start + budget[0]
+            try:
+                return fn(*args)
+            finally:
+                budget[0] -= time.monotonic() - start
+
+        try:
+            cur = timed(conn.execute, query)
+        except sqlite3.Error as e:
+            conn.close()
+            raise self._timeout_error(e) from None
+
+        def batches():
+            sent = 0
+            while sent < max_rows:
+                batch = timed(cur.fetchmany, min(FETCH_ROWS, max_rows - sent))
+                if not batch:
+                    return
+                sent += len(batch)
+                yield batch
+            if timed(cur.fetchone) is not None:
+                raise OverflowError(f"Row limit of {max_rows} reached")
+
+        def close():
+            if not readonly:
+                conn.commit()
+            conn.close()
+
+        columns = [c[0] for c in cur.description] if cur.description else []
+        return self._stream_rows(columns, batches(), close)
+
+    def _stream_rows(self, columns, batches, close):
+        rows, error, truncated = 0, None, False
+        try:
+            for batch in batches:
+                rows += len(batch)
+                yield "".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in batch)
+        except OverflowError:
+            truncated = True
+        except sqlite3.Error as e:
+            error = str(self._timeout_error(e))
+        finally:
+            close()
+        yield json.dumps({"_summary": {"columns": columns, "rows": rows, "truncated": truncated, "error": error}}) + "\n"
+
+    def _timeout_error(self, e):
+        """SQLite reports a progress-handler abort as 'interrupted'."""
+        return sqlite3.OperationalError(f"Query exceeded the {self.timeout_s:g}s time limit") if str(e) == "interrupted" else e
+
+    # ------------------------------------------------------------------
+    # PLANNING (tables read -> cache key)
+    # ------------------------------------------------------------------
+    def _attach(self, conn, views):
+        """Points the analyst views of `conn` at the published datasets; returns {view name: fingerprint}."""
+        if self.db.analyst_store is not None:
+            self.db.analyst_store.attach(conn, views)
+        return views
+
+    def _plan(self, conn, query, views):
+        """
+        Prepares the query under an authorizer (EXPLAIN: nothing runs) to learn what it reads and whether it
+        writes, then derives its cache key from the versions of those tables.
+        """
+        reads, flags = set(), {"readonly": True, "volatile": False}
+        clock = "now" in query.lower()
+
+        def authorizer(action, arg1, arg2, db_name, source):
+            if action == sqlite3.SQLITE_READ:
+                reads.add((db_name, arg1))
+            elif action == sqlite3.SQLITE_FUNCTION:
+                name = (arg2 or "").lower()
+                flags["volatile"] |= name in VOLATILE_FUNCTIONS or (clock and name in CLOCK_FUNCTIONS)
+            elif action not in READ_ACTIONS:
+                flags["readonly"] = False
+            return sqlite3.SQLITE_OK
+
+        normalized = normalize_query(query)
+        conn.set_authorizer(authorizer)
+        try:
+            explained = normalized if normalized[:7].upper() == "EXPLAIN" else f"EXPLAIN {query}"
+            conn.execute(explained).close()
+        finally:
+            conn.set_authorizer(None)
+
+        known = dict(conn.execute("SELECT name, version FROM table_versions").fetchall())
+        versions, cacheable = {}, flags["readonly"] and not flags["volatile"]
+        for db_name, table in reads:
+            if db_name == "temp" and table in views:
+                continue  # The view itself; its rows are read (and versioned) through the attached projection
+            if db_name and db_name.startswith("analyst_") and db_name[len("analyst_"):] in views:
+                name = db_name[len("analyst_"):]
+                versions[name] = views[name]
+            elif db_name in ("main", None) and table in known:
+                versions[table] = known[table]
+            else:
+                cacheable = False
+        key = hashlib.sha1(json.dumps([normalized, sorted(versions.items())]).encode()).hexdigest()
+        return {"key": key, "cacheable": cacheable, "readonly": flags["readonly"]}
+
+    # ------------------------------------------------------------------
+    # RESULT CACHE (LRU bounded by bytes)
+    # ------------------------------------------------------------------
+    def _get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def _put(self, key, result):
+        with self._lock:
+            if key in self._entries or result["nbytes"] > self.cache_max_bytes:
+                return
+            self._entries[key] = result
+            self._bytes += result["nbytes"]
+            while self._bytes > self.cache_max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= old["nbytes"]
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.cache_max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _row_bytes(row):
+    """Rough JSON size of a row's values."""
+    return sum(len(v) + 2 if isinstance(v, (str, bytes)) else 8 for v in row)
+
+
+def _encode_cursor(key, offset):
+    return base64.urlsafe_b64encode(f"{key}:{offset}".encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        key, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return key, int(offset)
+    except Exception:
+        raise ValueError("Malformed cursor") from None
@@ -1,9 +1,28 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from app.api.routes import router
+from app.api.routes import router, services
+from app.api.middleware import CompressionMiddleware, MetricsMiddleware
+from app.core.metrics import REGISTRY
+from app.config import WARMUP
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up runs beside the server so /api/health answers at once; /api/ready waits for it
+    if WARMUP:
+        threading.Thread(target=services.warm_up, name="warmup", daemon=True).start()
+    else:
+        services.ready.set()
+    yield
+    services.shutdown()
 
-app = FastAPI(title="ModelGuard AI", version="1.0")
+app = FastAPI(title="ModelGuard AI", version="1.0", lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)  # Inside the metrics one: latencies include compression
+app.add_middleware(MetricsMiddleware)
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
@@ -13,4 +32,9 @@ app.include_router(router, prefix="/api")
 
 @app.get("/")
 def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
\ No newline at end of file
+    return templates.TemplateResponse("index.html", {"request": request})
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (text exposition format 0.0.4)."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
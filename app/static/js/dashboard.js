@@ -45,7 +45,7 @@ document.getElementById('analyzeForm').addEventListener('submit', async (e) => {
 
     try {
         const response = await fetch('/api/analyze', { method: 'POST', body: formData });
-        const result = await response.json();
+        let result = await response.json();
         
         // --- 1. HANDLE DATA CONTRACT VIOLATION ---
         if (response.status === 400) {
@@ -57,17 +57,25 @@ document.getElementById('analyzeForm').addEventListener('submit', async (e) => {
             return;
         }
 
-        if (result.status === 'success') {
+        if (response.status === 429) {
+            throw new Error("Analysis queue is busy, please retry shortly.");
+        }
+
+        // --- 2. WAIT FOR THE QUEUED ANALYSIS JOB ---
+        if (result.status === 'queued') {
+            result = await waitForJob(result.status_url);
+        }
+
+        if (result.status === 'succeeded') {
             setTimeout(() => {
                 processingState.style.display = 'none';
                 iframe.classList.remove('hidden');
                 iframe.style.display = 'block';
                 
-                // Inject HTML Report
-                const iframeDoc = iframe.contentDocument || iframe.contentWindow.document;
-                iframeDoc.open();
-                iframeDoc.write(result.data.html_report);
-                iframeDoc.close();
+                // Load HTML Report (rendered lazily by the server)
+                if (result.data.report_id) {
+                    iframe.src = `/api/reports/${result.data.report_id}`;
+                }
                 
                 // Update Enterprise Dashboard
                 updateDashboard(result.data);
@@ -75,7 +83,7 @@ document.getElementById('analyzeForm').addEventListener('submit', async (e) => {
                 btn.disabled = false;
             }, 1000); 
         } else {
-            throw new Error(result.message || "Analysis Failed");
+            throw new Error((result.job && result.job.error) || result.detail || "Analysis Failed");
         }
     } catch (err) {
         console.error(err);
@@ -86,6 +94,17 @@ document.getElementById('analyzeForm').addEventListener('submit', async (e) => {
     }
 });
 
+async function waitForJob(statusUrl) {
+    // Poll the job until it leaves the queue
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 500));
+        const res = await fetch(statusUrl);
+        const job = await res.json();
+        if (!res.ok) throw new Error(job.detail || "Job lookup failed");
+        if (job.status !== 'queued' && job.status !== 'running') return job;
+    }
+}
+
 // ==========================================
 // 3. ENTERPRISE VISUALIZATION
 // ==========================================
@@ -139,12 +158,12 @@ function updateDashboard(data) {
 
     // P-Values Logic
     console.log("--------------------------------");
-    console.log("📈 Statistical Significance (KS-Test p < 0.05)");
+    console.log("📈 Statistical Significance (KS-Test, adjusted p < 0.05)");
     if(data.rigor.p_values.length === 0) {
         console.log("No statistically significant drift detected.");
     } else {
         data.rigor.p_values.forEach(p => {
-            console.log(`Feature: ${p.feature.padEnd(20)} | p-value: ${p.p_value}`);
+            console.log(`Feature: ${p.feature.padEnd(20)} | p-value: ${p.p_value} | adjusted: ${p.p_adjusted}`);
         });
     }
     console.groupEnd();
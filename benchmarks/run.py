@@ -0,0 +1,320 @@
+"""
+Offline benchmark suite: times every analysis stage on synthetic data and compares against a stored baseline.
+
+    python -m benchmarks.run                                   # run, print, write benchmarks/results/latest.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json   # ... and exit 1 on a regression
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json   # re-record every stage in one run (never by hand)
+    python -m benchmarks.run --rows 50000 --columns 40 --stages "drift.*"
+
+Each stage reports the median / best wall time over --repeat runs and the peak Python-heap allocation of one
+extra run (tracemalloc; includes NumPy and pandas buffers). Best times are also stored relative to a fixed
+calibration workload, and comparisons use those ratios, so a baseline recorded on one machine remains
+meaningful on a faster or slower one.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+DECISION = {"action": "NO ACTION", "data_strategy": "N/A"}
+
+
+# ----------------------------------------------------------------------
+# STAGES: name -> setup(ctx) returning the zero-argument callable to time
+# ----------------------------------------------------------------------
+def _calibration(ctx):
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal(1_000_000)
+    frame = pd.DataFrame({"key": rng.integers(0, 1000, 1_000_000), "value": values})
+    return lambda: (np.sort(values), frame.groupby("key")["value"].mean(), sum(i * i for i in range(300_000)))
+
+
+def _validate(ctx):
+    from app.core.schemas import validate_dataframe
+    _, curr = ctx.pair("adult_census")
+    return lambda: validate_dataframe(curr)
+
+
+def _compact(ctx):
+    from app.core.compact import compact_pair
+    ref, curr = ctx.pair("adult_census")
+    return lambda: compact_pair(ref, curr)
+
+
+def _fairness_scan(ctx):
+    from app.core.fairness import FairnessEngine
+    _, curr = ctx.pair("adult_census")
+    return lambda: FairnessEngine(intersections=[("sex", "race")]).scan(curr, "class")
+
+
+def _fairness_report(ctx):
+    from app.core.fairness import FairnessEngine
+    _, curr = ctx.pair("adult_census")
+    return lambda: FairnessEngine().run_fairness_scan(curr, "class")
+
+
+def _llm_descriptors(ctx):
+    import numpy as np
+    from app.core.llm_engine import LLMEngine
+    rng = np.random.default_rng(ctx.seed)
+    vocab = np.array("the model answer is not good fine. great? see https://example.com thanks, sorry I cannot help 42".split())
+    texts = [" ".join(rng.choice(vocab, n)) for n in rng.integers(1, 60, ctx.rows)]
+    # A fresh engine per run: every response is a cache miss (sentiment off, it depends on the NLTK install)
+    return lambda: LLMEngine(sentiment=None).describe(texts)
+
+
+def _drift(engine, dataset):
+    def setup(ctx):
+        from app.core.drift_engine import DriftAnalyzer
+        ref, curr = ctx.pair(dataset)
+        return lambda: DriftAnalyzer(engine=engine).run_analysis(ref, curr)
+    return setup
+
+
+def _drift_sampled(ctx):
+    from app.core.drift_engine import DriftAnalyzer
+    ref, curr = ctx.pair("adult_census")
+    return lambda: DriftAnalyzer(engine="native", sample_error=0.02).run_analysis(ref, curr)
+
+
+def _drift_approx(ctx):
+    from app.core.drift_engine import DriftAnalyzer
+    from app.core.sketches import DatasetSketch
+    ref, curr = ctx.pair("adult_census")
+    return lambda: DriftAnalyzer().run_sketch_analysis(DatasetSketch().update(ref), DatasetSketch().update(curr))
+
+
+def _rigor_resampling(ctx):
+    """Permutation p-values and bootstrap intervals for 100 columns, 1000 resamples each."""
+    from app.core.resampling import ResamplingTests
+    from benchmarks.synthetic import drift_pair
+    ref, curr = drift_pair("adult_census", ctx.rows, seed=ctx.seed, columns=100)
+    return lambda: ResamplingTests(resamples=1000).run(ref, curr)
+
+
+def _db_writes(ctx):
+    from app.core.database import DatabaseEngine
+    db = DatabaseEngine(path=os.path.join(ctx.workdir, f"bench_{time.monotonic_ns()}.db"))
+
+    def run(threads=4, per_thread=100):
+        def worker():
+            for _ in range(per_thread):
+                db.log_run(0.1, 0.2, 1000.0, DECISION)
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+    return run
+
+
+def _api_analyze(ctx, cached=False):
+    from fastapi.testclient import TestClient
+    from app.api.routes import services
+    from app.main import app
+    client = TestClient(app)
+    ref, curr = ctx.pair("adult_census")
+    files = {"reference_file": ("reference.csv", ref.to_csv(index=False).encode()), "current_file": ("current.csv", curr.to_csv(index=False).encode())}
+
+    def run():
+        if not cached:
+            services.result_cache.clear()  # Every run is a full analysis (the warm-up run would be answered from cache)
+        response = client.post("/api/analyze", files=files)
+        response.raise_for_status()
+        if response.status_code == 200:
+            return response.json()
+        url = response.json()["status_url"]
+        while True:
+            job = client.get(url).json()
+            if job["status"] not in ("queued", "running"):
+                if job["status"] != "succeeded":
+                    raise RuntimeError(f"analysis job {job['status']}: {job['job'].get('error')}")
+                return job
+            time.sleep(0.005)
+    return run
+
+
+def _serialize_sql_page(ctx):
+    from app.api.responses import encoded_response
+    _, curr = ctx.pair("adult_census")
+    columns = list(curr.columns)
+    # Rows as /api/sql returns them: one dict per row of plain Python values
+    page = {"status": "success", "columns": columns, "data": [dict(zip(columns, row)) for row in curr.astype(object).itertuples(index=False)]}
+    return lambda: encoded_response(page)
+
+
+def _startup_import(ctx):
+    # A fresh interpreter each run (module caching would make a second import free); env carries the tmp paths
+    cmd = [sys.executable, "-c", "import app.main"]
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(BENCH_DIR))
+    return lambda: subprocess.run(cmd, check=True, capture_output=True, env=env, cwd=os.path.dirname(BENCH_DIR))
+
+
+STAGES = {
+    "calibration": _calibration,
+    "startup.import": _startup_import,
+    "validate.adult_census": _validate,
+    "compact.adult_census": _compact,
+    "fairness.scan.adult_census": _fairness_scan,
+    "fairness.report.adult_census": _fairness_report,
+    "llm.descriptors": _llm_descriptors,
+    "drift.native.adult_census": _drift("native", "adult_census"),
+    "drift.native.housing": _drift("native", "housing"),
+    "drift.native.forest_cover": _drift("native", "forest_cover"),
+    "drift.evidently.adult_census": _drift("evidently", "adult_census"),
+    "drift.approx.adult_census": _drift_approx,
+    "drift.sampled.adult_census": _drift_sampled,
+    "rigor.resampling.100cols": _rigor_resampling,
+    "db.writes": _db_writes,
+    "api.analyze.adult_census": _api_analyze,
+    "api.analyze.cached": lambda ctx: _api_analyze(ctx, cached=True),
+    "api.serialize.sql_page": _serialize_sql_page,
+}
+
+
+class Context:
+    """Shared, lazily generated inputs (one drift pair per dataset)."""
+    def __init__(self, rows, columns, seed, workdir):
+        self.rows, self.columns, self.seed, self.workdir = rows, columns, seed, workdir
+        self._pairs = {}
+
+    def pair(self, name):
+        if name not in self._pairs:
+            from benchmarks.synthetic import drift_pair
+            kwargs = {"bias": 0.3} if name == "adult_census" else {}
+            self._pairs[name] = drift_pair(name, self.rows, seed=self.seed, columns=self.columns, **kwargs)
+        return self._pairs[name]
+
+
+# ----------------------------------------------------------------------
+# MEASUREMENT
+# ----------------------------------------------------------------------
+def measure(fn, repeat, memory=True):
+    fn()  # Warm-up: imports, lazy initialisation, first-touch allocations
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    result = {"seconds": statistics.median(times), "min_seconds": min(times), "runs": repeat}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_suite(rows, columns, repeat, patterns, seed=0, quiet=False):
+    workdir = tempfile.mkdtemp(prefix="modelguard-bench-")
+    # Module-level singletons (routes, caches) read these at import: keep them out of the working tree
+    for var, sub in (("DB_PATH", "modelguard.db"), ("ANALYST_DIR", "analyst"), ("PROFILE_CACHE_DIR", "profiles"), ("REPORT_DIR", "reports")):
+        os.environ.setdefault(var, os.path.join(workdir, sub))
+    ctx = Context(rows, columns, seed, workdir)
+
+    selected = [n for n in STAGES if n != "calibration" and any(fnmatch.fnmatch(n, p) for p in patterns)]
+    calibrate = STAGES["calibration"](ctx)
+    results = {"calibration": measure(calibrate, repeat)}
+    for name in selected:
+        results[name] = measure(STAGES[name](ctx), repeat)
+        if not quiet:
+            r = results[name]
+            print(f"⏱️  {name:<32} {r['seconds'] * 1000:>10.1f} ms   peak {r['peak_mb']:>8.1f} MB")
+
+    # Calibrated before and after the stages; best-of-N times are the least disturbed by other load
+    results["calibration"]["min_seconds"] = min(results["calibration"]["min_seconds"], measure(calibrate, repeat, memory=False)["min_seconds"])
+    for r in results.values():
+        r["relative"] = round(r["min_seconds"] / results["calibration"]["min_seconds"], 4)
+    return {"meta": _meta(rows, columns, repeat, seed), "results": results}
+
+
+def _meta(rows, columns, repeat, seed):
+    import numpy, pandas
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BENCH_DIR).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "rows": rows, "columns": columns, "repeat": repeat, "seed": seed,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit,
+        "python": platform.python_version(), "numpy": numpy.__version__, "pandas": pandas.__version__,
+        "platform": platform.platform(), "cpu_count": os.cpu_count(),
+    }
+
+
+# ----------------------------------------------------------------------
+# BASELINE COMPARISON
+# ----------------------------------------------------------------------
+def compare(current, baseline, time_tolerance=0.3, memory_tolerance=0.2, min_seconds=0.005):
+    """
+    Returns a list of regression messages (empty = pass). A stage regresses when its calibration-relative time
+    exceeds the baseline by more than `time_tolerance`, or its peak memory by more than `memory_tolerance`.
+    Stages faster than `min_seconds` in both runs are too noisy to time and only their memory is compared.
+    """
+    for key in ("rows", "columns", "seed"):
+        if current["meta"].get(key) != baseline["meta"].get(key):
+            raise ValueError(f"Baseline was recorded with {key}={baseline['meta'].get(key)}, this run used {current['meta'].get(key)}")
+
+    regressions = []
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None or name == "calibration":
+            continue
+        if max(cur["min_seconds"], base["min_seconds"]) >= min_seconds and cur["relative"] > base["relative"] * (1 + time_tolerance):
+            regressions.append(f"{name}: {cur['relative'] / base['relative']:.2f}x slower than baseline ({cur['min_seconds'] * 1000:.1f} ms vs {base['min_seconds'] * 1000:.1f} ms)")
+        if cur["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance) and cur["peak_mb"] - base["peak_mb"] > 1:
+            regressions.append(f"{name}: peak memory {cur['peak_mb']:.1f} MB vs {base['peak_mb']:.1f} MB baseline")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="rows per side of each drift pair")
+    parser.add_argument("--columns", type=int, default=None, help="pad every dataset with noise columns up to this width")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="*", default=["*"], help="glob patterns of stages to run")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "latest.json"))
+    parser.add_argument("--baseline", help="compare against this results file; exit 1 on a regression")
+    parser.add_argument("--save-baseline", help="also write the results to this file")
+    parser.add_argument("--time-tolerance", type=float, default=0.3)
+    parser.add_argument("--memory-tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.rows, args.columns, args.repeat, args.stages, seed=args.seed)
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+        if regressions:
+            print("\n❌ PERFORMANCE REGRESSION")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print(f"\n✅ No regression against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
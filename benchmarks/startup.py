@@ -0,0 +1,91 @@
+"""
+Startup-time breakdown: where `import app.main` spends its time, and what the warm-up then loads.
+
+    python -m benchmarks.startup              # import + warm-up breakdown
+    python -m benchmarks.startup --top 25
+
+Both run in fresh interpreters (`python -X importtime`), so nothing imported by this script is counted.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+WARMUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from app.main import services
+imported = time.perf_counter() - start
+services.warm_up()
+print(json.dumps({"import app.main": imported, **services.timings}))
+"""
+
+
+def _python(code, workdir, importtime=False):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    for var, sub in (("DB_PATH", "modelguard.db"), ("ANALYST_DIR", "analyst"), ("PROFILE_CACHE_DIR", "profiles"), ("REPORT_DIR", "reports")):
+        env.setdefault(var, os.path.join(workdir, sub))
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}")
+    return proc
+
+
+def import_breakdown(module="app.main", workdir=None):
+    """
+    {'total_seconds', 'by_package': {top-level package: self seconds}, 'modules': [(name, self s, cumulative s)]}
+    parsed from -X importtime (microseconds; a module's cumulative time includes the imports it triggers).
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="modelguard-startup-")
+    stderr = _python(f"import {module}", workdir, importtime=True).stderr
+    modules, by_package, total = [], defaultdict(float), 0.0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        entry = (name, int(self_us) / 1e6, int(cumulative_us) / 1e6)
+        modules.append(entry)
+        by_package[name.split(".")[0]] += entry[1]
+        if name == module:
+            total = entry[2]
+    return {"total_seconds": total, "by_package": dict(by_package), "modules": modules}
+
+
+def warmup_breakdown(workdir=None):
+    """Seconds per warm-up step (Services.timings), after a timed `import app.main`."""
+    workdir = workdir or tempfile.mkdtemp(prefix="modelguard-startup-")
+    return json.loads(_python(WARMUP_SCRIPT, workdir).stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list (by cumulative time)")
+    args = parser.parse_args(argv)
+
+    imports = import_breakdown(args.module)
+    print(f"📦 import {args.module}: {imports['total_seconds'] * 1000:.0f} ms")
+    print("\n   by package (self time)")
+    for package, seconds in sorted(imports["by_package"].items(), key=lambda kv: -kv[1])[:10]:
+        print(f"   {package:<40} {seconds * 1000:>8.1f} ms")
+    print(f"\n   slowest {args.top} modules (cumulative)")
+    for name, _, cumulative in sorted(imports["modules"], key=lambda m: -m[2])[:args.top]:
+        print(f"   {name:<40} {cumulative * 1000:>8.1f} ms")
+
+    steps = warmup_breakdown()
+    print(f"\n🔥 warm-up (lazy engines and heavy imports): {sum(v for k, v in steps.items() if k != 'import app.main') * 1000:.0f} ms")
+    for step, seconds in steps.items():
+        print(f"   {step:<40} {seconds * 1000:>8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Deterministic synthetic datasets shaped like the ones scripts/download_data.py fetches from OpenML,
+so benchmarks and tests run offline.
+
+Every generator takes `drift` (0 = reference distribution, 1 = the full injected shift) and a `seed`;
+`drift_pair` returns (reference, current) with the current side drifted. `columns` pads a frame with
+`noise_###` columns up to that width; every other noise column drifts too.
+"""
+import numpy as np
+import pandas as pd
+
+# Columns each generator shifts when drift > 0 (besides the drifting noise columns)
+DRIFTED_COLUMNS = {
+    "adult_census": ["age", "capital-gain", "hours-per-week", "class"],
+    "housing": ["MedInc", "MedHouseVal"],
+    "forest_cover": ["Elevation", "Horizontal_Distance_To_Roadways", "class"],
+}
+
+EDUCATION = [  # (label, education-num, share)
+    ("Preschool", 1, 0.002), ("1st-4th", 2, 0.005), ("5th-6th", 3, 0.01), ("7th-8th", 4, 0.02),
+    ("9th", 5, 0.016), ("10th", 6, 0.028), ("11th", 7, 0.037), ("12th", 8, 0.013),
+    ("HS-grad", 9, 0.323), ("Some-college", 10, 0.223), ("Assoc-voc", 11, 0.042), ("Assoc-acdm", 12, 0.033),
+    ("Bachelors", 13, 0.164), ("Masters", 14, 0.054), ("Prof-school", 15, 0.017), ("Doctorate", 16, 0.013),
+]
+WORKCLASS = {"Private": 0.74, "Self-emp-not-inc": 0.08, "Local-gov": 0.065, "State-gov": 0.04, "Self-emp-inc": 0.035, "Federal-gov": 0.03, "Without-pay": 0.01}
+MARITAL = {"Married-civ-spouse": 0.46, "Never-married": 0.33, "Divorced": 0.14, "Separated": 0.03, "Widowed": 0.03, "Married-spouse-absent": 0.01}
+OCCUPATION = {
+    "Prof-specialty": 0.13, "Craft-repair": 0.13, "Exec-managerial": 0.13, "Adm-clerical": 0.12, "Sales": 0.12,
+    "Other-service": 0.10, "Machine-op-inspct": 0.06, "Transport-moving": 0.05, "Handlers-cleaners": 0.04,
+    "Farming-fishing": 0.03, "Tech-support": 0.03, "Protective-serv": 0.02, "Priv-house-serv": 0.01, "Armed-Forces": 0.01,
+}
+RACE = {"White": 0.855, "Black": 0.096, "Asian-Pac-Islander": 0.031, "Amer-Indian-Eskimo": 0.01, "Other": 0.008}
+COUNTRY = {"United-States": 0.9, "Mexico": 0.02, "Philippines": 0.01, "Germany": 0.01, "Canada": 0.01, "India": 0.01, "Other": 0.04}
+
+
+def _choice(rng, table: dict, n):
+    labels, p = zip(*table.items())
+    p = np.asarray(p) / np.sum(p)
+    return np.asarray(labels, dtype=object)[rng.choice(len(labels), n, p=p)]
+
+
+def _pad(df, columns, rng, drift):
+    """Adds noise_### columns until the frame has `columns` columns; odd ones shift by 0.5 sd x drift."""
+    extra = max(0, (columns or 0) - df.shape[1])
+    if extra:
+        noise = rng.standard_normal((len(df), extra))
+        noise[:, 1::2] += 0.5 * drift
+        df = pd.concat([df, pd.DataFrame(noise, columns=[f"noise_{i:03d}" for i in range(extra)])], axis=1)
+    return df
+
+
+def adult_census(n_rows, seed=0, drift=0.0, bias=0.0, columns=None) -> pd.DataFrame:
+    """
+    Adult Census shape (passes ADULT_CENSUS_CONTRACT). `bias` in [0, 1) scales the positive rate of
+    women and non-white groups by (1 - bias), i.e. a disparate impact ratio of about 1 - bias.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_rows
+    age = np.clip(17 + rng.gamma(3.0, 7.0, n) + 10 * drift, 17, 90).astype(np.int64)
+    edu = rng.choice(len(EDUCATION), n, p=np.array([e[2] for e in EDUCATION]) / sum(e[2] for e in EDUCATION))
+    sex = np.where(rng.random(n) < 0.67, "Male", "Female").astype(object)
+    married = rng.random(n) < 0.46
+    relationship = np.where(
+        married, np.where(sex == "Male", "Husband", "Wife"),
+        _choice(rng, {"Not-in-family": 0.5, "Own-child": 0.3, "Unmarried": 0.15, "Other-relative": 0.05}, n),
+    ).astype(object)
+    race = _choice(rng, RACE, n)
+    hours = np.clip(np.round(rng.normal(40 + 5 * drift, 12, n)), 1, 99).astype(np.int64)
+    gain = np.where(rng.random(n) < 0.08 + 0.1 * drift, np.round(rng.lognormal(8.5, 1.0, n)), 0).astype(np.int64)
+    loss = np.where(rng.random(n) < 0.05, np.round(rng.normal(1900, 300, n)).clip(0), 0).astype(np.int64)
+    edu_num = np.array([e[1] for e in EDUCATION])[edu]
+
+    # Outcome: logistic in age, education, hours and capital gain; drift raises the base rate (label shift)
+    logit = -7.5 + 0.045 * np.minimum(age, 60) + 0.33 * edu_num + 0.03 * hours + 0.8 * (gain > 0) + 0.9 * married + 1.2 * drift
+    p = 1 / (1 + np.exp(-logit))
+    p = np.where((sex == "Female") | (race != "White"), p * (1 - bias), p)
+
+    df = pd.DataFrame({
+        "age": age,
+        "workclass": _choice(rng, WORKCLASS, n),
+        "fnlwgt": np.round(rng.lognormal(12.0, 0.45, n)).astype(np.int64),
+        "education": np.array([e[0] for e in EDUCATION], dtype=object)[edu],
+        "education-num": edu_num,
+        "marital-status": np.where(married, "Married-civ-spouse", _choice(rng, {k: v for k, v in MARITAL.items() if k != "Married-civ-spouse"}, n)).astype(object),
+        "occupation": _choice(rng, OCCUPATION, n),
+        "relationship": relationship,
+        "race": race,
+        "sex": sex,
+        "capital-gain": gain,
+        "capital-loss": loss,
+        "hours-per-week": hours,
+        "native-country": _choice(rng, COUNTRY, n),
+        "class": np.where(rng.random(n) < p, ">50K", "<=50K").astype(object),
+    })
+    return _pad(df, columns, rng, drift)
+
+
+def housing(n_rows, seed=0, drift=0.0, columns=None) -> pd.DataFrame:
+    """California Housing shape: 9 numeric columns; drift raises incomes and prices (inflation)."""
+    rng = np.random.default_rng(seed)
+    n = n_rows
+    income = rng.lognormal(1.25, 0.45, n) * (1 + 0.3 * drift)
+    rooms = np.clip(rng.normal(5.4, 1.4, n), 1, None)
+    df = pd.DataFrame({
+        "MedInc": income,
+        "HouseAge": rng.integers(1, 53, n).astype(np.float64),
+        "AveRooms": rooms,
+        "AveBedrms": np.clip(rooms * rng.normal(0.2, 0.03, n), 0.3, None),
+        "Population": np.round(rng.lognormal(7.0, 0.7, n)),
+        "AveOccup": np.clip(rng.lognormal(1.05, 0.3, n), 0.7, None),
+        "Latitude": rng.uniform(32.5, 42.0, n),
+        "Longitude": rng.uniform(-124.3, -114.3, n),
+        "MedHouseVal": np.clip(0.42 * income + rng.normal(0.3, 0.6, n) + 0.5 * drift, 0.15, 5.0),
+    })
+    return _pad(df, columns, rng, drift)
+
+
+def forest_cover(n_rows, seed=0, drift=0.0, columns=None) -> pd.DataFrame:
+    """Covertype shape: 10 numeric + 44 one-hot columns and a 7-class target driven by elevation."""
+    rng = np.random.default_rng(seed)
+    n = n_rows
+    elevation = np.round(rng.normal(2960 + 200 * drift, 280, n))
+    df = pd.DataFrame({
+        "Elevation": elevation,
+        "Aspect": rng.integers(0, 361, n),
+        "Slope": np.round(np.clip(rng.gamma(3.0, 4.7, n), 0, 66)),
+        "Horizontal_Distance_To_Hydrology": np.round(rng.gamma(1.5, 180, n)),
+        "Vertical_Distance_To_Hydrology": np.round(rng.normal(46, 58, n)),
+        "Horizontal_Distance_To_Roadways": np.round(rng.gamma(2.0, 1175 * (1 + 0.4 * drift), n)),
+        "Hillshade_9am": np.clip(np.round(rng.normal(212, 27, n)), 0, 254),
+        "Hillshade_Noon": np.clip(np.round(rng.normal(223, 20, n)), 0, 254),
+        "Hillshade_3pm": np.clip(np.round(rng.normal(143, 38, n)), 0, 254),
+        "Horizontal_Distance_To_Fire_Points": np.round(rng.gamma(2.0, 990, n)),
+    })
+    wilderness = rng.choice(4, n, p=[0.45, 0.05, 0.44, 0.06])
+    soil = rng.integers(0, 40, n)
+    onehot = {f"Wilderness_Area{i + 1}": (wilderness == i).astype(np.int64) for i in range(4)}
+    onehot.update({f"Soil_Type{i + 1}": (soil == i).astype(np.int64) for i in range(40)})
+    df = pd.concat([df, pd.DataFrame(onehot)], axis=1)
+    bands = np.digitize(elevation + rng.normal(0, 120, n), [2400, 2650, 2850, 3000, 3150, 3350])
+    df["class"] = (bands + 1).astype(str)
+    return _pad(df, columns, rng, drift)
+
+
+GENERATORS = {"adult_census": adult_census, "housing": housing, "forest_cover": forest_cover}
+
+
+def drift_pair(name, n_rows, seed=0, drift=1.0, columns=None, **kwargs):
+    """(reference, current): same generator, different seeds, current drifted by `drift`."""
+    generate = GENERATORS[name]
+    return generate(n_rows, seed=seed, drift=0.0, columns=columns, **kwargs), generate(n_rows, seed=seed + 1, drift=drift, columns=columns, **kwargs)
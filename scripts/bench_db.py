@@ -0,0 +1,96 @@
+"""
+Concurrency benchmark for the SQLite state store.
+Runs N reader threads (get_history / check_cooldown) against M writer threads (log_run)
+for a fixed duration and prints throughput, comparing the pooled WAL engine with the
+previous single shared connection.
+
+    python scripts/bench_db.py --readers 8 --writers 4 --seconds 5
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SQL_INSERT_RUN, DatabaseEngine  # noqa: E402
+
+DECISION = {"action": "NO ACTION", "data_strategy": "N/A"}
+
+
+class SharedConnectionEngine(DatabaseEngine):
+    """The previous layout: one connection shared by every thread, serialised by a lock so it does not crash."""
+    def __init__(self, path):
+        self._shared = sqlite3.connect(path, check_same_thread=False)
+        self._shared_lock = threading.RLock()
+        super().__init__(path=path)
+
+    @property
+    def conn(self):
+        return self._shared
+
+    def log_run(self, drift_share, weighted_score, revenue_risk, action_plan, wait=True, feature_scores=None, model_id=None):
+        with self._shared_lock:
+            self._shared.execute(SQL_INSERT_RUN, (datetime.now(), weighted_score, drift_share, revenue_risk, action_plan["action"], "N/A", model_id))
+            self._shared.commit()
+
+    def get_history(self):
+        with self._shared_lock:
+            return super().get_history()
+
+    def check_cooldown(self, hours=24):
+        with self._shared_lock:
+            return super().check_cooldown(hours)
+
+
+def run(engine, readers, writers, seconds):
+    counts = {"reads": 0, "writes": 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def reader():
+        n = 0
+        while time.monotonic() < stop:
+            engine.get_history()
+            engine.check_cooldown()
+            n += 2
+        with lock:
+            counts["reads"] += n
+
+    def writer():
+        n = 0
+        while time.monotonic() < stop:
+            engine.log_run(0.1, 0.2, 1.0, DECISION)
+            n += 1
+        with lock:
+            counts["writes"] += n
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {k: v / seconds for k, v in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"📊 {args.readers} readers / {args.writers} writers, {args.seconds:.0f}s each")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in (("shared connection", SharedConnectionEngine), ("pooled WAL", lambda p: DatabaseEngine(path=p))):
+            engine = factory(os.path.join(tmp, f"{name.replace(' ', '_')}.db"))
+            rates = run(engine, args.readers, args.writers, args.seconds)
+            print(f"  {name:<18} reads/s {rates['reads']:>10.0f}   writes/s {rates['writes']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import os
+
+import pandas as pd
+
+from app.core.analyst_store import AnalystStore
+from app.core.database import DatabaseEngine
+
+
+def test_published_tables_are_queryable_views_and_deduplicated(tmp_path):
+    db = DatabaseEngine(path=str(tmp_path / "state.db"))
+    store = AnalystStore(db, root=str(tmp_path / "analyst"))
+
+    first = pd.DataFrame({"occupation": ["Tech", "Sales", "Tech"], "age": [30, 40, 50]})
+    fp = store.publish("current_table", first).result()
+    assert db.execute_sql("SELECT occupation, count(*) AS n FROM current_table GROUP BY occupation ORDER BY n DESC")[0] == {"occupation": "Tech", "n": 2}
+
+    # Same content under another name: no new files, both names point at one projection
+    assert store.publish("reference_table", first.copy()).result() == fp
+    assert os.listdir(tmp_path / "analyst") == [f"{fp}.db"]
+
+    # Re-publishing a name switches the view for connections that already attached the old dataset
+    store.publish("current_table", pd.DataFrame({"occupation": ["Craft"], "age": [22]})).result()
+    assert db.execute_sql("SELECT count(*) AS n FROM current_table") == [{"n": 1}]
+    assert db.execute_sql("SELECT count(*) AS n FROM reference_table") == [{"n": 3}]
+    assert {t["name"] for t in store.describe()} == {"current_table", "reference_table"}
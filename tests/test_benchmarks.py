@@ -0,0 +1,45 @@
+import copy
+
+import pytest
+
+from app.core.native_drift import NativeDriftEngine
+from app.core.profile import ReferenceProfile
+from app.core.fairness import FairnessEngine
+from app.core.schemas import validate_dataframe
+from benchmarks.run import compare, run_suite
+from benchmarks.synthetic import DRIFTED_COLUMNS, adult_census, drift_pair
+
+
+def test_generators_are_deterministic_and_inject_known_drift_and_bias():
+    ref, curr = drift_pair("adult_census", 3000, seed=7, bias=0.5, columns=20)
+    assert ref.equals(adult_census(3000, seed=7, bias=0.5, columns=20))
+    assert validate_dataframe(ref) == (True, None) and curr.shape == (3000, 20)
+
+    drifted = NativeDriftEngine().run(ReferenceProfile.build(ref), curr)["drift_by_columns"]
+    detected = {c for c, d in drifted.items() if d["drift_detected"]}
+    assert set(DRIFTED_COLUMNS["adult_census"]) | {"noise_001", "noise_003"} <= detected
+    assert "noise_000" not in detected and "education" not in detected
+
+    issues = {i["feature"] + ":" + i["group"] for i in FairnessEngine().scan(ref, "class")["issues"]}
+    assert "sex:Female" in issues
+
+
+def test_suite_writes_comparable_results(tmp_path, monkeypatch):
+    for var in ("DB_PATH", "ANALYST_DIR", "PROFILE_CACHE_DIR", "REPORT_DIR"):
+        monkeypatch.setenv(var, str(tmp_path / var))
+    results = run_suite(rows=500, columns=None, repeat=1, patterns=["validate.*", "fairness.scan.*"], quiet=True)
+    assert set(results["results"]) == {"calibration", "validate.adult_census", "fairness.scan.adult_census"}
+    assert compare(results, results) == []
+
+    slower = copy.deepcopy(results)
+    stage = slower["results"]["fairness.scan.adult_census"]
+    stage["min_seconds"] = max(stage["min_seconds"], 0.01) * 2
+    stage["relative"] *= 2
+    stage["peak_mb"] += 10
+    regressions = compare(slower, results)
+    assert len(regressions) == 2 and all(r.startswith("fairness.scan.adult_census") for r in regressions)
+
+    other = copy.deepcopy(results)
+    other["meta"]["rows"] = 1000
+    with pytest.raises(ValueError):
+        compare(other, results)
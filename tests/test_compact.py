@@ -0,0 +1,47 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from app.core.compact import CompactSchema, compact_pair
+from app.core.fairness import FairnessEngine
+from app.core.native_drift import NativeDriftEngine
+from app.core.profile import ReferenceProfile
+from benchmarks.synthetic import drift_pair
+
+
+def _parsed(df):
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)))
+
+
+def test_both_sides_share_the_reference_dictionary_and_keep_every_value():
+    ref = pd.DataFrame({"n": [1, 2, 3, 4], "x": [0.5, 1.0, 2.0, np.nan], "y": [0.1, 0.2, 0.3, 0.4], "c": ["b", "a", "b", None], "id": ["u1", "u2", "u3", "u4"]})
+    curr = pd.DataFrame({"n": [1, 70000, 3, 4], "x": [0.5, 0.5, 0.5, 0.5], "y": [0.1, 0.1, 0.1, 0.1], "c": ["a", "z", "b", "b"], "id": ["u9", "u8", "u7", "u6"]})
+    schema = CompactSchema.infer(ref)
+    r, c = schema.apply(ref), schema.apply(curr)
+
+    assert r["n"].dtype == np.int8 and c["n"].dtype == np.int32  # Widened, not clipped
+    assert r["x"].dtype == np.float32 and r["y"].dtype == np.float64  # 0.1 has no exact float32 form
+    assert list(r["c"].cat.categories) == ["a", "b"] and list(c["c"].cat.categories) == ["a", "b", "z"]
+    assert (c["c"].cat.codes[c["c"] == "b"] == r["c"].cat.codes[r["c"] == "b"].iloc[0]).all()
+    assert r["c"].isna().iloc[3] and r["id"].dtype == ref["id"].dtype  # Unique per row: stays text
+    assert c["n"].tolist() == curr["n"].tolist() and c["c"].astype(object).tolist() == curr["c"].tolist()
+
+
+def test_compact_frames_give_the_same_drift_and_fairness_results():
+    ref, curr = map(_parsed, drift_pair("adult_census", 4000, bias=0.3))
+    small_ref, small_curr, footprint = compact_pair(ref, curr)
+    assert footprint["compact_bytes"] * 4 < footprint["raw_bytes"]
+
+    raw = NativeDriftEngine().run(ReferenceProfile.build(ref), curr)
+    compact = NativeDriftEngine().run(ReferenceProfile.build(small_ref), small_curr)
+    assert raw == compact
+
+    issues = lambda df: sorted((i["feature"], i["group"], i["disparity"]) for i in FairnessEngine().scan(df, "class")["issues"])
+    assert issues(curr) == issues(small_curr) and issues(curr)
+
+
+def test_profile_counts_categories_from_codes_in_value_counts_order():
+    ref = pd.Series(["a", "b", "b", "c", "c", "c", None], dtype=pd.CategoricalDtype(["a", "b", "c", "unused"]))
+    values, counts = ReferenceProfile.build(pd.DataFrame({"col": ref})).categories["col"]
+    assert list(values) == ["c", "b", "a"] and list(counts) == [3, 2, 1]
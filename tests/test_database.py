@@ -0,0 +1,113 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from app.core.database import SQL_INSERT_CACHE_HIT, SQL_LAST_ACTION, DatabaseEngine
+
+
+def test_concurrent_log_runs_are_group_committed_and_readable(tmp_path):
+    db = DatabaseEngine(path=str(tmp_path / "state.db"))
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def worker(i):
+        db.log_run(0.1, 0.2, 1000.0 * i, {"action": "NO ACTION", "data_strategy": "N/A"})
+        db.get_history()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # log_run waits for its commit, so every row is visible to any other connection
+    other = DatabaseEngine(path=str(tmp_path / "state.db"))
+    assert other.conn.execute("SELECT count(*) FROM run_history").fetchone()[0] == 20
+    assert len(other.get_history()) == 10
+
+    done = threading.Event()
+    conns = []
+    threading.Thread(target=lambda: (conns.append(db.conn), done.set())).start()
+    done.wait(5)
+    assert conns[0] is not db.conn  # One connection per thread
+
+
+def _log(db, risk, action="NO ACTION", **features):
+    db.log_run(0.5, risk, 1000.0, {"action": action, "data_strategy": "N/A"}, feature_scores=features or None)
+
+
+def test_history_is_keyset_paginated_with_feature_scores(tmp_path):
+    db = DatabaseEngine(path=str(tmp_path / "state.db"))
+    for i in range(25):
+        _log(db, float(i), age=(i / 100, i % 2 == 0), income=(0.01, False))
+
+    page = db.history_page(limit=10, include_features=True)
+    assert [r["risk_score"] for r in page["data"]] == [float(i) for i in range(24, 14, -1)]
+    assert page["data"][0]["features"]["age"] == {"score": 0.24, "detected": True}
+
+    seen = [r["id"] for r in page["data"]]
+    while page["next_cursor"]:
+        page = db.history_page(limit=10, cursor=page["next_cursor"])
+        seen += [r["id"] for r in page["data"]]
+    assert len(seen) == len(set(seen)) == 25
+
+    series = db.feature_history("age", limit=5)
+    assert [r["score"] for r in series["data"]] == [0.24, 0.23, 0.22, 0.21, 0.20] and series["next_cursor"]
+    assert db.history_page(end="2000-01-01")["data"] == []
+    with pytest.raises(ValueError):
+        db.history_page(cursor="not-a-cursor")
+
+
+def test_rollups_follow_inserts_and_are_backfilled(tmp_path):
+    path = str(tmp_path / "state.db")
+    db = DatabaseEngine(path=path)
+    _log(db, 10.0, age=(0.2, True))
+    _log(db, 30.0, action="FULL RETRAINING", age=(0.4, False))
+
+    [day] = db.rollups("day")
+    assert (day["runs"], day["actions"], day["avg_risk"], day["max_risk"]) == (2, 1, 20.0, 30.0)
+    [hour] = db.rollups("hour", feature="age")
+    assert (hour["runs"], hour["detected"], hour["max_score"]) == (2, 1, 0.4)
+    with pytest.raises(ValueError):
+        db.rollups("week")
+
+    # `end` is exclusive, like history_page's: a range ending on a day does not include it
+    today = date.fromisoformat(day["period"])
+    assert db.rollups("day", start=today, end=today) == []
+    assert db.rollups("day", start=today, end=today + timedelta(days=1)) == [day]
+    assert db.rollups("hour", start=hour["period"], end=hour["period"], feature="age") == []
+
+    # A database created before the rollups existed gets them built from its history on open
+    db.conn.execute("DELETE FROM run_rollups")
+    db.conn.commit()
+    assert DatabaseEngine(path=path).rollups("day") == [day]
+
+
+def test_cooldown_uses_the_partial_index(tmp_path):
+    db = DatabaseEngine(path=str(tmp_path / "state.db"))
+    plan = " ".join(row[-1] for row in db.conn.execute("EXPLAIN QUERY PLAN " + SQL_LAST_ACTION, (None,)))
+    assert "run_history_model_actions" in plan
+    _log(db, 10.0, action="FULL RETRAINING")
+    assert db.check_cooldown(hours=1)[0] is True
+    assert db.check_cooldown(hours=1, model_id="churn")[0] is False  # Cooldown is per model
+
+
+def test_a_failing_write_does_not_fail_its_batch(tmp_path):
+    db = DatabaseEngine(path=str(tmp_path / "state.db"))
+    db.conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, text TEXT NOT NULL)")
+    db.conn.commit()
+    # The writer is held on a first batch while the next one queues up, so these writes share one transaction
+    release, busy = threading.Event(), threading.Event()
+    held = db._submit_write(lambda conn, _: busy.set() or release.wait(5), ())
+    busy.wait(5)
+    futures = [db._submit_write("INSERT INTO notes (text) VALUES (?)", (text,)) for text in ("a", None, "b")]
+    futures.append(db._submit_write(lambda conn, _: conn.execute("INSERT INTO notes (id, text) VALUES (1, 'dup')"), ()))
+    futures.append(db._submit_write(SQL_INSERT_CACHE_HIT, ("2026-01-01", "key", "t", "NO ACTION", None)))
+    release.set()
+
+    assert held.result() and futures[0].result() and futures[2].result() and futures[4].result()
+    for failed in (futures[1], futures[3]):
+        with pytest.raises(Exception):
+            failed.result()
+    assert [r[0] for r in db.conn.execute("SELECT text FROM notes ORDER BY id")] == ["a", "b"]
+    assert db.conn.execute("SELECT count(*) FROM cache_hits").fetchone()[0] == 1
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from app.core.drift_engine import FairnessMonitor
+from app.core.fairness import FairnessEngine, encode_target
+
+
+def _frame(n=20_000, seed=21):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "sex": rng.choice(["Male", "Female"], n),
+        "race": rng.choice(["White", "Black", "Asian"], n, p=[0.7, 0.2, 0.1]),
+    })
+    rate = np.where(df["sex"] == "Male", 0.3, 0.25) * np.where(df["race"] == "Black", 0.5, 1.0)
+    df["class"] = np.where(rng.random(n) < rate, " >50K", "<=50K")
+    df.loc[::50, "race"] = None
+    return df
+
+
+def test_scan_matches_groupby_and_leaves_input_untouched():
+    df = _frame()
+    before = df.copy()
+    result = FairnessEngine(intersections=[("race", "sex")]).scan(df)
+    assert df.equals(before)
+
+    y = pd.Series(encode_target(df["class"]), index=df.index)
+    expected = y.groupby([df["race"], df["sex"]]).agg(["sum", "count"])
+    table = result["slices"]["race × sex"]
+    assert (table["count"].to_numpy() == expected.loc[table.index, "count"].to_numpy()).all()
+    assert (table["positives"].to_numpy() == expected.loc[table.index, "sum"].to_numpy()).all()
+    assert result["base_rate"] == y.mean()
+
+
+def test_intersectional_slice_is_flagged_and_single_column_api_still_works():
+    df = _frame()
+    issues = FairnessEngine(intersections=[("sex", "race")]).scan(df)["issues"]
+    assert {"feature": "sex × race", "group": "Female × Black"}.items() <= next(
+        i for i in issues if i["group"] == "Female × Black").items()
+    assert all("×" not in i["feature"] for i in FairnessEngine().scan(df)["issues"])  # Intersections are opt-in
+
+    race_issues = FairnessMonitor().check_bias(df, "race", "class")
+    assert [i["group"] for i in race_issues] == ["Black"]
+    assert "y_bin" not in df.columns
+
+    # No positive outcome at all: disparities are reported as 0 (not NaN) and nothing is flagged
+    none = FairnessEngine().run_fairness_scan(df.assign(**{"class": "<=50K"}))
+    assert none["group_metrics"] and set(none["group_metrics"].values()) == {0.0} and not none["is_biased"]
@@ -0,0 +1,24 @@
+import io
+
+import pandas as pd
+
+from app.core.ingest import detect_format, iter_file_chunks
+
+
+def _frame(n=250):
+    return pd.DataFrame({"age": range(n), "class": [">50K" if i % 3 else "<=50K" for i in range(n)]})
+
+
+def test_csv_is_read_in_chunks():
+    buf = io.BytesIO(_frame().to_csv(index=False).encode())
+    chunks = list(iter_file_chunks(buf, "csv", chunk_rows=100))
+    assert [len(c) for c in chunks] == [100, 100, 50]
+    assert pd.concat(chunks, ignore_index=True).equals(_frame())
+
+
+def test_parquet_upload_matches_csv():
+    buf = io.BytesIO()
+    _frame().to_parquet(buf, index=False)
+    assert detect_format("ref.parquet") == "parquet"
+    df = pd.concat(iter_file_chunks(buf, "parquet", chunk_rows=100), ignore_index=True)
+    assert df["age"].tolist() == list(range(250))
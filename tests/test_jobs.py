@@ -0,0 +1,39 @@
+import threading
+import time
+
+import pytest
+
+from app.core.jobs import JobQueue, QueueFull
+
+
+def _wait(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while queue.get(job_id).status in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+def test_queue_rejects_when_full_and_cancels_waiting_jobs():
+    gate = threading.Event()
+    queue = JobQueue(max_workers=1, max_queue=1, mode="thread")
+    running = queue.submit("test", gate.wait)
+    waiting = queue.submit("test", gate.wait)
+
+    with pytest.raises(QueueFull):
+        queue.submit("test", gate.wait)
+
+    assert queue.cancel(waiting.id)
+    assert queue.get(waiting.id).status == "cancelled"
+    assert not queue.cancel(running.id)  # Already running
+
+    gate.set()
+    assert _wait(queue, running.id).status == "succeeded"
+    metrics = queue.metrics()
+    assert metrics["rejected"] == 1 and metrics["cancelled"] == 1 and metrics["queue_depth"] == 0
+
+
+def test_failures_are_reported_on_the_job():
+    queue = JobQueue(max_workers=1, max_queue=1, mode="thread")
+    job = queue.submit("test", lambda: 1 / 0)
+    assert _wait(queue, job.id).status == "failed"
+    assert "division" in queue.get(job.id).error
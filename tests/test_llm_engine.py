@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.core.llm_engine import DESCRIPTORS, DescriptorCache, LLMEngine, text_descriptors
+from app.main import app
+
+TEXTS = [
+    "Hello world. This is a test? Yes! visit http://x.com now",
+    "Mr. Smith went to Washington. He said hi, e.g. twice. Then left.",
+    "ünïcode 123 ok_ fin. next",
+    "see www.a.com or https://a.b/c?d",
+    "",
+]
+
+
+def test_descriptors_match_evidently_features():
+    from evidently.features.contains_link_feature import ContainsLink
+    from evidently.features.non_letter_character_percentage_feature import NonLetterCharacterPercentage
+    from evidently.features.sentence_count_feature import SentenceCount
+    from evidently.features.word_count_feature import WordCount
+
+    features = (WordCount(column_name="r"), SentenceCount(column_name="r"), NonLetterCharacterPercentage(column_name="r"), ContainsLink(column_name="r"))
+    matrix = text_descriptors(TEXTS[:-1], sentiment=lambda t: 0.5)
+    for text, row in zip(TEXTS, matrix):
+        expected = [len(text)] + [float(f.apply(text)) for f in features] + [0.5]
+        assert np.allclose(row, expected), text
+
+
+def test_identical_responses_are_described_once():
+    scored = []
+    engine = LLMEngine(cache=DescriptorCache(max_entries=3), sentiment=lambda t: scored.append(t) or 0.0, batch_rows=2)
+
+    frame, info = engine.describe(TEXTS[:3] * 4)
+    assert info == {"unique": 3, "cache_hits": 0} and len(frame) == 12 and list(frame.columns) == list(DESCRIPTORS)
+    assert frame.iloc[:3].to_numpy().tolist() == frame.iloc[9:].to_numpy().tolist()
+
+    _, info = engine.describe([TEXTS[0], TEXTS[3]])
+    assert info["cache_hits"] == 1 and sorted(scored) == sorted(TEXTS[:4])
+    assert engine.cache.stats()["entries"] == 3 and engine.cache.stats()["evictions"] == 1
+
+
+def test_llm_route_scans_batches_with_reference_drift():
+    client = TestClient(app)
+    short = [{"prompt": "q", "response": "Fine."} for _ in range(200)]
+    long = [{"prompt": "q", "response": " ".join(["A much longer answer."] * (i % 7 + 3))} for i in range(200)]
+
+    data = client.post("/api/analyze/llm?rows=false", json={"records": long, "reference": short}).json()["data"]
+    assert data["rows"] == 200 and data["unique_responses"] == 7 and "data" not in data
+    assert data["drift"]["drift_by_columns"]["text_length"]["drift_detected"]
+    assert data["summary"]["sentence_count"]["max"] == 9
+
+    single = client.post("/api/analyze/llm", json={"prompt": "q", "response": TEXTS[0]}).json()["data"]
+    assert single["data"][0]["word_count"] == 10 and single["data"][0]["contains_link"] is True
+
+    jsonl = "\n".join(json.dumps(r) for r in short[:3])
+    assert client.post("/api/analyze/llm", content=jsonl, headers={"content-type": "application/x-ndjson"}).json()["data"]["rows"] == 3
+    assert client.post("/api/analyze/llm", json=["not a record"]).status_code == 400
@@ -0,0 +1,48 @@
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsRegistry, SamplingProfiler, span
+from app.main import app
+
+
+def test_histograms_render_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo.", labels=("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, route='/a"b')
+    registry.gauge("demo_depth", "Depth.", lambda: {"queued": 2}, label="state")
+    text = registry.render()
+    assert 'demo_seconds_bucket{route="/a\\"b",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/a\\"b",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/a\\"b"} 3' in text
+    assert '# TYPE demo_depth gauge\ndemo_depth{state="queued"} 2' in text
+
+
+def test_metrics_endpoint_reports_routes_and_stages():
+    with span("unit_test_stage"):
+        pass
+    client = TestClient(app)
+    client.get("/api/jobs/does-not-exist")
+    body = client.get("/metrics").text
+    assert 'modelguard_http_requests_total{method="GET",route="/api/jobs/{job_id}",status="404"}' in body
+    assert 'modelguard_stage_seconds_count{stage="unit_test_stage"} 1' in body
+    assert "# TYPE modelguard_jobs_total counter" in body
+
+
+def test_profiler_dumps_folded_stacks_for_slow_requests_only(tmp_path):
+    profiler = SamplingProfiler(threshold_s=0.05, interval_s=0.002, out_dir=str(tmp_path))
+
+    token = profiler.start()
+    profiler.finish(token, 0.001, "GET /fast")
+    assert not os.path.exists(tmp_path) or not os.listdir(tmp_path)
+
+    token, start = profiler.start(), time.perf_counter()
+    while time.perf_counter() - start < 0.1:
+        sum(range(1000))
+    profiler.finish(token, time.perf_counter() - start, "POST /slow")
+    (dump,) = os.listdir(tmp_path)
+    assert dump.endswith("POST__slow.folded")
+    assert any("test_profiler_dumps_folded_stacks_for_slow_requests_only" in line for line in open(tmp_path / dump))
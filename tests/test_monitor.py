@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.monitor import ModelMonitor
+from app.core.native_drift import NativeDriftEngine
+from app.core.profile import ReferenceProfile
+
+
+def _frame(rng, n, shift=0):
+    return pd.DataFrame({
+        "age": rng.integers(17, 90, n) + shift,
+        "hours-per-week": rng.normal(40, 8, n).round(),
+        "sex": rng.choice(["Male", "Female"], n),
+        "class": rng.choice(["<=50K", ">50K"], n, p=[0.75, 0.25]),
+    })
+
+
+def test_window_results_do_not_depend_on_batch_boundaries():
+    rng = np.random.default_rng(3)
+    profile = ReferenceProfile.build(_frame(rng, 5000))
+    stream = _frame(rng, 3000, shift=4)
+
+    whole = ModelMonitor("a", profile, window_rows=1000, slide_rows=250)
+    pieces = ModelMonitor("b", profile, window_rows=1000, slide_rows=250)
+    closed_whole = whole.ingest(stream)
+    closed_pieces = []
+    for start in range(0, len(stream), 333):
+        closed_pieces += pieces.ingest(stream.iloc[start:start + 333])
+
+    assert len(closed_whole) == len(closed_pieces) == 9  # First window at row 1000, then every 250 rows
+    for a, b in zip(closed_whole, closed_pieces):
+        assert a["drift_share"] == b["drift_share"]
+        assert a["leaderboard"] == b["leaderboard"]
+
+
+def test_tumbling_windows_do_not_overlap_and_rejects_bad_slide():
+    rng = np.random.default_rng(4)
+    profile = ReferenceProfile.build(_frame(rng, 2000))
+    monitor = ModelMonitor("m", profile, window_rows=500)
+    assert [w["window"]["rows"] for w in monitor.ingest(_frame(rng, 1200))] == [500, 500]
+    assert monitor.state()["open_pane_rows"] == 200
+
+    with pytest.raises(ValueError):
+        ModelMonitor("m", profile, window_rows=500, slide_rows=300)
+
+
+def test_windows_report_the_rows_they_cover():
+    rng = np.random.default_rng(6)
+    profile = ReferenceProfile.build(_frame(rng, 2000))
+    span = lambda windows: [[w["window"]["start_row"], w["window"]["end_row"]] for w in windows]
+    tumbling = ModelMonitor("t", profile, window_rows=500)
+    assert span(tumbling.ingest(_frame(rng, 1200))) == [[0, 500], [500, 1000]]
+    assert span(tumbling.ingest(_frame(rng, 800))) == [[1000, 1500], [1500, 2000]]
+    sliding = ModelMonitor("s", profile, window_rows=500, slide_rows=250)
+    assert span(sliding.ingest(_frame(rng, 1000))) == [[0, 500], [250, 750], [500, 1000]]
+
+
+def test_sketch_drift_tracks_the_exact_engine():
+    rng = np.random.default_rng(5)
+    ref, curr = _frame(rng, 20000), _frame(rng, 5000, shift=6)
+    profile = ReferenceProfile.build(ref)
+    window = ModelMonitor("m", profile, window_rows=5000).ingest(curr)[0]
+    exact = NativeDriftEngine().run(profile, curr)["drift_by_columns"]
+
+    scores = {row["feature"]: row["score"] for row in window["leaderboard"]}
+    assert scores["age"] == pytest.approx(exact["age"]["drift_score"], rel=0.05)
+    assert scores["sex"] == pytest.approx(exact["sex"]["drift_score"])  # Categorical counts are exact
+    assert window["automation"]["action"] != "COOLDOWN"
+
+    # Small reference: KS p-values, with the native engine's choice between the exact and the limit distribution
+    ref, curr = _frame(rng, 800), _frame(rng, 400, shift=3)
+    profile = ReferenceProfile.build(ref)
+    window = ModelMonitor("m", profile, window_rows=400).ingest(curr)[0]
+    exact = NativeDriftEngine().run(profile, curr)["drift_by_columns"]
+    scores = {row["feature"]: row["score"] for row in window["leaderboard"]}
+    assert exact["age"]["stattest_name"] == "K-S p_value" and scores["age"] == pytest.approx(exact["age"]["drift_score"])
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp, kstwobign, wasserstein_distance
+
+from app.core.native_drift import NativeDriftEngine
+from app.core.profile import ReferenceProfile
+
+
+def _frames():
+    rng = np.random.default_rng(7)
+    ref = pd.DataFrame({
+        "age": rng.integers(17, 90, 4000),
+        "hours-per-week": rng.normal(40, 8, 4000).round(),
+        "sex": rng.choice(["Male", "Female"], 4000),
+    })
+    curr = pd.DataFrame({
+        "age": rng.integers(25, 95, 3000),
+        "hours-per-week": rng.normal(40, 8, 3000).round(),
+        "sex": rng.choice(["Male", "Female"], 3000, p=[0.5, 0.5]),
+    })
+    curr.loc[::11, "hours-per-week"] = np.nan
+    return ref, curr
+
+
+def test_numeric_statistics_match_scipy():
+    ref, curr = _frames()
+    result = NativeDriftEngine().run(ReferenceProfile.build(ref), curr)
+    for col in ["age", "hours-per-week"]:
+        a, b = ref[col].dropna(), curr[col].dropna()
+        stats = result["drift_by_columns"][col]
+        assert np.isclose(stats["ks_statistic"], ks_2samp(a, b).statistic)
+        assert np.isclose(stats["ks_p_value"], ks_2samp(a, b).pvalue) and stats["ks_exact"]  # max(n1, n2) <= 10000
+        assert np.isclose(stats["wasserstein_norm"], wasserstein_distance(a, b) / np.std(a))
+
+
+def test_drift_share_flags_shifted_columns():
+    ref, curr = _frames()
+    result = NativeDriftEngine().run(ReferenceProfile.build(ref), curr)
+    assert result["drift_by_columns"]["age"]["drift_detected"]
+    assert not result["drift_by_columns"]["hours-per-week"]["drift_detected"]
+    assert result["drift_share"] == result["number_of_drifted_columns"] / 3
+
+
+def test_test_selection_and_scores_match_evidently():
+    from evidently.calculations.stattests.registry import _get_default_stattest
+    from evidently.core import ColumnType
+    rng = np.random.default_rng(3)
+    for n_ref in (800, 4000):  # Both sides of DRIFT_SMALL_SAMPLE
+        ref = pd.DataFrame({
+            "age": rng.integers(17, 90, n_ref), "children": rng.integers(0, 4, n_ref),
+            "sex": rng.choice(["Male", "Female"], n_ref), "race": rng.choice(["A", "B", "C"], n_ref),
+        })
+        curr = pd.DataFrame({
+            "age": rng.integers(20, 90, 1500), "children": rng.integers(0, 5, 1500),
+            "sex": rng.choice(["Male", "Female"], 1500, p=[0.6, 0.4]), "race": rng.choice(["A", "B", "C"], 1500, p=[0.5, 0.3, 0.2]),
+        })
+        result = NativeDriftEngine().run(ReferenceProfile.build(ref), curr)["drift_by_columns"]
+        for col in ref.columns:
+            kind = ColumnType.Numerical if col in ("age", "children") else ColumnType.Categorical
+            test = _get_default_stattest(ref[col], curr[col], kind)
+            score, detected = test.func(ref[col], curr[col], kind, 0.05 if test.name in ("ks", "chisquare", "z") else 0.1)
+            assert result[col]["stattest_name"] == test.display_name
+            assert np.isclose(result[col]["drift_score"], score, rtol=1e-6, atol=1e-9) and result[col]["drift_detected"] == detected
+
+
+def test_rigor_keeps_scipy_p_values_above_the_exact_limit():
+    from app.core.drift_engine import DriftAnalyzer
+    rng = np.random.default_rng(5)
+    ref = pd.DataFrame({"x": rng.normal(0, 1, 12000), "y": rng.normal(0, 1, 12000)})
+    curr = pd.DataFrame({"x": rng.normal(0.1, 1, 3000), "y": rng.normal(0, 1, 3000)})
+    analyzer = DriftAnalyzer(engine="native")
+    drift_by_columns = analyzer._measure(ref, curr, ReferenceProfile.build(ref), "native")[1]
+    assert not drift_by_columns["x"]["ks_exact"]  # n1 = 12000: scipy uses its asymptotic p-value, so the engine may too
+    analyzer.correction = "none"
+    rigor = {s["feature"]: s["p_value"] for s in analyzer._measure(ref, curr, ReferenceProfile.build(ref), "native")[3]}
+    assert np.isclose(rigor["x"], float(f"{ks_2samp(ref['x'], curr['x']).pvalue:.4e}"))
+
+    # Sampled runs take the Kolmogorov limit below the exact limit too, rigor included (no exact unequal-n KS)
+    _, limit, _, significant = analyzer._measure(None, curr.assign(x=curr["x"] + 0.1), ReferenceProfile.build(ref.iloc[:5000]), "native", exact=False)
+    assert not limit["x"]["ks_exact"]
+    assert np.isclose(limit["x"]["ks_p_value"], kstwobign.sf(limit["x"]["ks_statistic"] * np.sqrt(round(5000 * 3000 / 8000))))
+    assert {s["feature"]: s["p_value"] for s in significant}["x"] == float(f"{limit['x']['ks_p_value']:.4e}")
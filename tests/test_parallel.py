@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from app.core.native_drift import NativeDriftEngine
+from app.core.parallel import ColumnExecutor
+from app.core.profile import ReferenceProfile
+
+
+def test_small_inputs_stay_serial():
+    assert ColumnExecutor(mode="thread", max_workers=4, min_cells=10_000).plan(100, 20) == ("serial", 1)
+    assert ColumnExecutor(mode="thread", max_workers=4, min_cells=10_000).plan(1000, 20) == ("thread", 4)
+
+
+def test_sharded_modes_match_serial():
+    rng = np.random.default_rng(3)
+    cols = [f"f{i}" for i in range(12)]
+    ref = pd.DataFrame(rng.normal(size=(2000, 12)), columns=cols)
+    curr = pd.DataFrame(rng.normal(0.1, size=(1500, 12)), columns=cols)
+    profile = ReferenceProfile.build(ref)
+
+    serial = NativeDriftEngine(executor=ColumnExecutor(mode="serial")).run(profile, curr)
+    for mode in ["thread", "process"]:
+        executor = ColumnExecutor(mode=mode, max_workers=3, min_cells=0)
+        assert NativeDriftEngine(executor=executor).run(profile, curr) == serial
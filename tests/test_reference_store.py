@@ -0,0 +1,89 @@
+import io
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.compact import compact_pair
+from app.core.drift_engine import DriftAnalyzer
+from app.core.profile import ReferenceProfile
+from app.core.reference_store import ReferenceStore
+from app.core.reports import ReportStore
+from app.main import app
+from benchmarks.synthetic import adult_census, drift_pair
+
+
+def test_stored_reference_is_mapped_and_measures_like_the_upload(tmp_path):
+    ref, curr = drift_pair("adult_census", 3000, seed=4)
+    store = ReferenceStore(str(tmp_path))
+    info = store.register("census", ref)
+    assert info["rows"] == 3000 and info["columns"] == list(ref.columns) and info["bytes"] > 0
+
+    stored = ReferenceStore(str(tmp_path)).get("census")  # As another worker process would open it
+    assert isinstance(stored.profile.numeric_matrix, np.memmap)
+    ref_c, curr_c, _ = compact_pair(ref, curr)
+    assert stored.fingerprint == info["fingerprint"] == ReferenceProfile.build(ref_c).fingerprint
+    assert stored.schema().apply(curr).equals(curr_c) and stored._frame is None  # The schema comes from the Arrow file
+    assert stored.frame().equals(ref_c)
+    assert stored.schema().dtypes == {c: t for c, t in ref_c.dtypes.items() if isinstance(t, pd.CategoricalDtype) or t.kind in "iuf"}
+
+    analyzer = DriftAnalyzer(engine="native")
+    expected = analyzer._measure(None, curr_c, ReferenceProfile.build(ref_c), "native")
+    assert analyzer._measure(None, curr_c, stored.profile, "native") == expected
+
+    # The native engine only needs the profile: the rows are built when the report first stores them, not again
+    analyzer.report_store, built = ReportStore(str(tmp_path / "reports")), []
+    rows = lambda: built.append(1) or stored.frame()
+    first = analyzer.run_analysis(rows, curr_c, stored.profile)
+    assert analyzer.run_analysis(rows, curr_c, stored.profile)["report_id"] == first["report_id"] and built == [1]
+
+
+def test_names_share_objects_and_unreferenced_ones_are_collected(tmp_path, monkeypatch):
+    ref = adult_census(500, seed=1)
+    store = ReferenceStore(str(tmp_path))
+    a, b = store.register("a", ref), store.register("b", ref)
+    assert a["fingerprint"] == b["fingerprint"] and len(os.listdir(tmp_path / "objects")) == 1
+    assert [d["name"] for d in store.list()] == ["a", "b"]
+
+    store.register("a", adult_census(500, seed=2))
+    assert store.delete("b") and not store.delete("b") and store.get("b") is None
+    assert len(os.listdir(tmp_path / "objects")) == 2  # Within the grace period
+    store.collect_garbage(grace_s=0)
+    assert os.listdir(tmp_path / "objects") == [store.describe("a")["fingerprint"]]
+
+    # Collected by another worker between the lookup and the touch: stored again instead of failing
+    utime = os.utime
+    monkeypatch.setattr(os, "utime", lambda path, *args: shutil.rmtree(path) or utime(path, *args))
+    assert store.register("a", adult_census(500, seed=2))["rows"] == 500
+    monkeypatch.undo()
+    with pytest.raises(ValueError):
+        store.register("../escape", ref)
+
+
+def test_analyze_with_a_named_reference(tmp_path, monkeypatch):
+    from app.api.routes import services
+    monkeypatch.setitem(services._built, "references", ReferenceStore(str(tmp_path)))
+    client = TestClient(app)
+    ref, curr = drift_pair("adult_census", 800, seed=3)
+
+    upload = {"reference_file": ("ref.csv", ref.to_csv(index=False), "text/csv")}
+    assert client.post("/api/references/census", files=upload).json()["data"]["rows"] == 800
+    assert client.post("/api/references/bad name", files=upload).status_code == 400
+    assert [d["name"] for d in client.get("/api/references").json()["data"]] == ["census"]
+
+    current = {"current_file": ("curr.csv", io.BytesIO(curr.to_csv(index=False).encode()), "text/csv")}
+    assert client.post("/api/analyze?reference=unknown", files=current).status_code == 404
+    assert client.post("/api/analyze", files=current).status_code == 400
+    current["current_file"][1].seek(0)
+    job = client.post("/api/analyze?reference=census", files=current).json()
+    deadline = time.monotonic() + 60
+    while (response := client.get(job["status_url"]).json())["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert response["status"] == "succeeded" and response["data"]["leaderboard"]
+
+    assert client.delete("/api/references/census").status_code == 200
+    assert client.get("/api/references/census").status_code == 404
@@ -0,0 +1,31 @@
+import os
+
+from fastapi.testclient import TestClient
+
+from app.core.reports import ReportStore
+from app.main import app
+from benchmarks.synthetic import drift_pair
+
+
+def test_report_etags_are_matched_exactly_and_evicted_reports_are_404(tmp_path, monkeypatch):
+    from app.api.routes import services
+    store = ReportStore(str(tmp_path))
+    monkeypatch.setitem(services._built, "report_store", store)
+    ref, curr = drift_pair("adult_census", 200, seed=2)
+    report_id = store.register(ref, curr)
+    with open(os.path.join(tmp_path, report_id, "report.html"), "w") as f:
+        f.write("<html>report</html>")  # As rendered
+    client = TestClient(app)
+
+    response = client.get(f"/api/reports/{report_id}")
+    etag = response.headers["etag"]
+    assert response.status_code == 200 and response.text == "<html>report</html>"
+    for header in (etag, f'"other", W/{etag}', "*"):
+        assert client.get(f"/api/reports/{report_id}", headers={"if-none-match": header}).status_code == 304
+    for header in (f'"{report_id[:-1]}"', f'"x{report_id}x"', report_id):  # Substrings and unquoted IDs are other tags
+        assert client.get(f"/api/reports/{report_id}", headers={"if-none-match": header}).status_code == 200
+
+    def evicted(_):
+        raise FileNotFoundError(report_id)
+    monkeypatch.setattr(store, "get_html_path", evicted)
+    assert client.get(f"/api/reports/{report_id}").status_code == 404
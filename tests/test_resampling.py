@@ -0,0 +1,58 @@
+import numpy as np
+
+from app.core.drift_engine import DriftAnalyzer
+from app.core.resampling import ResamplingTests, adjust_p_values
+from benchmarks.synthetic import drift_pair
+
+
+def test_holm_and_benjamini_hochberg_match_their_step_definitions():
+    p = np.random.default_rng(3).random(12) ** 3
+    m, order = len(p), np.argsort(p)
+    ranked = p[order]
+    holm = [max(min(1.0, (m - j) * ranked[j]) for j in range(i + 1)) for i in range(m)]
+    bh = [min(min(1.0, m * ranked[j] / (j + 1)) for j in range(i, m)) for i in range(m)]
+    assert np.allclose(adjust_p_values(p, "holm")[order], holm)
+    assert np.allclose(adjust_p_values(p, "bh")[order], bh)
+    assert np.array_equal(adjust_p_values(p, "none"), p) and len(adjust_p_values([], "bh")) == 0
+
+    # Twenty columns at p = 0.01..0.2: each is below 0.05 on its own, none survives Holm
+    analyzer = DriftAnalyzer(engine="native")
+    p_values = {f"c{i}": 0.01 * (i + 1) for i in range(20)}
+    assert analyzer._significant(list(p_values), p_values) == []
+    analyzer.correction = "none"
+    assert [s["feature"] for s in analyzer._significant(list(p_values), p_values)] == ["c0", "c1", "c2", "c3"]
+
+
+def test_permutation_p_values_flag_drifted_columns_and_hold_their_level():
+    ref, curr = drift_pair("adult_census", 3000, seed=5, columns=30)
+    tests = ResamplingTests(resamples=1000, max_rows=1500)
+    result = tests.run(ref, curr)
+    assert result == tests.run(ref, curr) and result["rows"] == [1500, 1500]  # Seeded
+    columns = result["columns"]
+    assert columns["age"]["significant"] and columns["class"]["significant"] and columns["class"]["test"] == "TVD"
+    assert all(c["p_adjusted"] >= c["p_value"] for c in columns.values())
+    assert all(c["interval"][0] <= c["interval"][1] for c in columns.values())
+
+    # Odd noise columns shift, even ones do not: the permutation null keeps false positives near the level
+    noise = [c for c in columns if c.startswith("noise_")]
+    stable = np.array([columns[c]["p_value"] for c in noise[0::2]])
+    assert all(columns[c]["significant"] for c in noise[1::2]) and not any(columns[c]["significant"] for c in noise[0::2])
+    assert np.mean(stable < 0.05) <= 0.25
+    assert result["drift_share"]["p_value"] < 0.01
+    assert result["drift_share"]["interval"][0] <= result["drift_share"]["share"] <= result["drift_share"]["interval"][1]
+
+    same = ResamplingTests(resamples=200).run(ref, ref.sample(frac=1.0, random_state=0))
+    assert not any(c["significant"] for c in same["columns"].values()) and same["drift_share"]["p_value"] > 0.05
+
+
+def test_analysis_reports_resampling_only_when_the_reference_rows_are_there():
+    ref, curr = drift_pair("adult_census", 1500, seed=6)
+    analyzer = DriftAnalyzer(engine="native")
+    assert "resampling" not in analyzer.run_analysis(ref, curr)["rigor"]  # Off by default (RIGOR_RESAMPLES=0)
+
+    analyzer.resampling = ResamplingTests(resamples=200)
+    rigor = analyzer.run_analysis(ref, curr)["rigor"]
+    assert set(rigor["resampling"]["columns"]) == set(ref.columns)
+    assert all(p["p_adjusted"] >= p["p_value"] for p in rigor["p_values"])
+    from app.core.profile import ReferenceProfile
+    assert "resampling" not in analyzer.run_analysis(None, curr, ref_profile=ReferenceProfile.build(ref))["rigor"]
@@ -0,0 +1,77 @@
+import gzip
+import json
+import zlib
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api import responses
+from app.api.middleware import CompressionMiddleware, accepted_encodings
+from app.api.responses import EncodedRoute, encode_json
+
+
+def test_numpy_and_pandas_values_are_encoded_natively():
+    frame = pd.DataFrame({"x": [1.5, np.nan], "label": ["a", None], "when": pd.to_datetime(["2024-01-02", None])})
+    payload = {
+        "scores": np.array([0.25, np.nan]), "count": np.int64(3), "flag": np.bool_(True), "half": np.float16(0.5),
+        "series": pd.Series([1, 2], dtype="int8"), "frame": frame, "at": pd.Timestamp("2024-01-02 03:04:05"),
+        "missing": pd.NaT, "tags": {"b"}, "price": Decimal("1.5"), 7: "int key",
+    }
+    assert json.loads(encode_json(payload)) == {
+        "scores": [0.25, None], "count": 3, "flag": True, "half": 0.5, "series": [1, 2],
+        "frame": {"x": [1.5, None], "label": ["a", None], "when": ["2024-01-02T00:00:00", None]},
+        "at": "2024-01-02T03:04:05", "missing": None, "tags": ["b"], "price": 1.5, "7": "int key",
+    }
+    plain = {"status": "success", "data": [{"a": 1, "b": "x", "c": [0.1, None]}], "nested": {"ok": True}}
+    assert json.loads(encode_json(plain)) == jsonable_encoder(plain)
+
+
+def _app(minimum_size):
+    router = APIRouter(route_class=EncodedRoute)
+
+    @router.post("/queued", status_code=202)
+    async def queued():
+        return {"status": "queued", "values": np.arange(3)}
+
+    @router.get("/rows")
+    def rows(n: int = 10):
+        return {"data": [{"i": i, "text": "row"} for i in range(n)]}
+
+    @router.get("/stream")
+    def stream():
+        return StreamingResponse((json.dumps({"i": i}) + "\n" for i in range(50)), media_type="application/x-ndjson")
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+    app.include_router(router, prefix="/api")
+    return app
+
+
+def test_routes_skip_jsonable_encoder_and_bodies_are_compressed_above_the_threshold(monkeypatch):
+    client = TestClient(_app(minimum_size=500))
+    response = client.post("/api/queued")
+    assert response.status_code == 202 and response.json() == {"status": "queued", "values": [0, 1, 2]}
+    assert "content-encoding" not in response.headers  # Under the threshold
+
+    big = client.get("/api/rows?n=200", headers={"accept-encoding": "gzip"})
+    assert big.headers["content-encoding"] == "gzip" and "Accept-Encoding" in big.headers["vary"]
+    assert int(big.headers["content-length"]) < len(big.content) and len(big.json()["data"]) == 200
+    refused = client.get("/api/rows?n=200", headers={"accept-encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in refused.headers
+    assert accepted_encodings("br;q=0.5, gzip;q=0, *") == {"br", "*"}
+
+    # Streamed bodies are compressed chunk by chunk; the stream stays one valid gzip member
+    with client.stream("GET", "/api/stream", headers={"accept-encoding": "gzip"}) as stream:
+        raw = b"".join(stream.iter_raw())
+    assert stream.headers["content-encoding"] == "gzip" and "content-length" not in stream.headers
+    assert len(gzip.decompress(raw).splitlines()) == 50 and zlib.decompressobj(31).decompress(raw[:40])
+
+    # msgpack is only offered when the package is installed; JSON otherwise
+    monkeypatch.setattr(responses, "msgpack", None)
+    response = client.get("/api/rows", headers={"accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/json" and response.headers["vary"].startswith("Accept")
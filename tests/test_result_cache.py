@@ -0,0 +1,82 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core.result_cache import ResultCache
+from app.main import app
+from benchmarks.synthetic import drift_pair
+
+
+class _Job:
+    def __init__(self, status="queued"):
+        self.status = status
+
+
+def test_lru_ttl_and_single_flight():
+    cache = ResultCache(max_entries=2, ttl_s=60)
+    result, flight, leader = cache.lookup("a")
+    assert result is None and leader
+    assert cache.lookup("a")[1:] == (flight, False)  # Identical request while the leader is still parsing
+    job = _Job()
+    flight.attach(job)
+    assert cache.lookup("a")[1].wait() is job
+
+    cache.put("a", {"score": 1})
+    assert cache.lookup("a") == ({"score": 1}, None, False)
+    cache.put("b", {"score": 2})
+    cache.lookup("a")
+    cache.put("c", {"score": 3})  # "b" is the least recently used
+    assert cache.lookup("b")[2] and cache.lookup("a")[0] == {"score": 1}
+
+    # A leader that fails releases its waiters; a failed job does not hold the key
+    _, flight, _ = cache.lookup("d")
+    cache.abandon("d", flight)
+    assert flight.wait() is None and cache.lookup("d")[2]
+    _, flight, _ = cache.lookup("e")
+    flight.attach(_Job("failed"))
+    assert cache.lookup("e")[2]
+
+    cache.ttl_s = 0
+    assert cache.lookup("a")[2]
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["evictions"] == 1 and stats["joined"] == 2 and stats["entries"] == 1
+
+
+def test_identical_analyses_share_one_job_then_hit_the_cache(monkeypatch):
+    from app.api.routes import services
+    monkeypatch.setitem(services._built, "result_cache", ResultCache())
+    client = TestClient(app)
+    ref, curr = drift_pair("adult_census", 1200, seed=11)
+    files = {"reference_file": ("ref.csv", ref.to_csv(index=False)), "current_file": ("curr.csv", curr.to_csv(index=False))}
+    db = services.db
+
+    # Every worker busy: both identical submissions are still queued when the second one arrives
+    release = threading.Event()
+    blockers = [services.job_queue.submit("block", release.wait, 30) for _ in range(services.job_queue.max_workers)]
+    first, second = client.post("/api/analyze", files=files).json(), client.post("/api/analyze", files=files).json()
+    release.set()
+    assert second["job_id"] == first["job_id"] and second["deduplicated"]
+    while (job := client.get(first["status_url"]).json())["status"] in ("queued", "running"):
+        time.sleep(0.02)
+    assert job["status"] == "succeeded" and all(b.future.result() for b in blockers)
+
+    db.flush()
+    runs = db.conn.execute("SELECT count(*) FROM run_history").fetchone()[0]
+    start = time.perf_counter()
+    hit = client.post("/api/analyze", files=files)
+    assert hit.status_code == 200 and time.perf_counter() - start < 0.5
+    served = hit.json()["data"]
+    assert hit.json()["cached"] and {k: v for k, v in served.items() if k not in ("meta", "automation")} == \
+        {k: v for k, v in job["data"].items() if k not in ("meta", "automation")}
+    # The decision is re-taken against the model's current state: the served run's action started a cooldown
+    assert job["data"]["automation"]["action"] != "NO ACTION"
+    assert served["meta"]["cooldown"] and served["automation"]["action"] == "COOLDOWN"
+
+    # The repeat is audited as a cache hit, not as another run
+    db.flush()
+    assert db.conn.execute("SELECT count(*) FROM run_history").fetchone()[0] == runs
+    hits = db.conn.execute("SELECT run_timestamp, triggered_action FROM cache_hits ORDER BY id DESC LIMIT 1").fetchone()
+    assert list(hits) == [job["data"]["meta"]["timestamp"], "COOLDOWN"]
+    assert client.post("/api/analyze?sample_error=0.5", files=files).status_code == 202  # Another config: not a hit
+    assert services.result_cache.stats()["hits"] == 1
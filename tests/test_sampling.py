@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from app.core.drift_engine import DriftAnalyzer
+from app.core.fairness import FairnessEngine
+from app.core.profile import ReferenceProfile
+from app.core.sampling import StratifiedSampler, dkw_sample_size
+from benchmarks.synthetic import adult_census
+
+
+def test_strata_proportions_are_kept():
+    df = adult_census(60_000, seed=3, bias=0.4)
+    sampler = StratifiedSampler(error=0.02, confidence=0.95, seed=1)
+    assert sampler.sample_rows == dkw_sample_size(0.02, 0.95) == 4612
+    assert sampler.draw(df.iloc[:4000]) is None
+
+    sample = sampler.draw(df)
+    assert len(sample.frame) == sampler.sample_rows and sample.n_rows == 60_000
+    assert sample.strata_columns == ["class", "sex", "race", "relationship"]
+    # Every (label, group) cell keeps its share up to one row per stratum
+    full = df.groupby(["class", "sex", "race"]).size() / len(df)
+    drawn = sample.frame.groupby(["class", "sex", "race"]).size().reindex(full.index, fill_value=0) / len(sample.frame)
+    assert np.abs(full - drawn).max() <= sample.n_strata / len(sample.frame)
+    assert sample.frame.equals(StratifiedSampler(0.02, 0.95, seed=1).draw(df).frame)
+    with pytest.raises(ValueError):
+        StratifiedSampler(error=0)
+
+
+def test_sampled_scores_are_bounded_and_fairness_is_exact():
+    ref, curr = adult_census(20_000, seed=1), adult_census(80_000, seed=2, drift=0.3, bias=0.4)
+    profile = ReferenceProfile.build(ref)
+    full = DriftAnalyzer(engine="native", sample_error=0)
+    exact = full._measure(None, curr, profile, "native")[1]
+
+    analyzer = DriftAnalyzer(engine="native", sample_error=0.02)
+    analyzer.sampler = StratifiedSampler(0.02, seed=4)
+    result = analyzer.run_analysis(ref, curr, profile)
+    sampling = result["sampling"]
+    assert sampling["rows"] == 80_000 and sampling["sample_rows"] == 6623 and sampling["fairness_rows"] == 80_000
+    for col, (lo, hi) in sampling["intervals"].items():
+        assert lo <= exact[col]["drift_score"] <= hi, col
+    assert result["rigor"]["fairness"] == full.run_analysis(ref, curr, profile)["rigor"]["fairness"]
+    assert not sampling["escalated"] and sampling["decision_range"] == [result["automation"]["action"]] * 2
+
+    # Evidently's statistics are not bounded by the sample: that engine always reads every row
+    assert DriftAnalyzer(engine="evidently", sample_error=0.02).sampler is None
+
+
+def test_unsettled_decisions_escalate_to_every_row():
+    ref, curr = adult_census(20_000, seed=1), adult_census(80_000, seed=2, drift=0.3)
+    profile = ReferenceProfile.build(ref)
+    analyzer = DriftAnalyzer(engine="native", sample_error=0.02)
+    analyzer.fairness = FairnessEngine(protected_columns=[])  # Bias would decide before the weighted score
+    analyzer.sampler = StratifiedSampler(0.02, seed=4)
+    lo, hi = analyzer.run_analysis(ref, curr, profile)["sampling"]["weighted_score_interval"]
+
+    analyzer.thresholds["fine_tune"] = (lo + hi) / 2  # Somewhere inside the sampled score's range
+    analyzer.sampler = StratifiedSampler(0.02, seed=4)
+    result = analyzer.run_analysis(ref, curr, profile)
+    assert result["sampling"]["escalated"] and len(set(result["sampling"]["decision_range"])) == 2
+
+    full = DriftAnalyzer(engine="native", sample_error=0, thresholds=analyzer.thresholds)
+    full.fairness = analyzer.fairness
+    expected = full.run_analysis(ref, curr, profile)
+    assert result["leaderboard"] == expected["leaderboard"] and result["automation"] == expected["automation"]
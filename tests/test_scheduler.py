@@ -0,0 +1,98 @@
+import os
+import time
+
+import pytest
+
+from app.core.database import DatabaseEngine
+from app.core.scheduler import ModelSpec, MonitoringScheduler
+from benchmarks.synthetic import drift_pair
+
+
+def _write(df, path, age=10):
+    df.to_csv(path, index=False)
+    past = time.time() - age  # Older than SETTLE_S: not a file still being written
+    os.utime(path, (past, past))
+    return str(path)
+
+
+def _drain(scheduler, timeout=30):
+    """Runs due checks one worker round at a time until nothing is due or running."""
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        started = scheduler.run_pending()
+        if not started and scheduler.stats()["running"] == 0:
+            return
+        time.sleep(0.01)
+    raise TimeoutError
+
+
+def test_checks_run_by_priority_then_deadline_and_are_logged_per_model(tmp_path):
+    ref, curr = drift_pair("adult_census", 1500, seed=5)
+    ref_path = _write(ref, tmp_path / "ref.csv")
+    db = DatabaseEngine(path=str(tmp_path / "state.db"))
+    scheduler = MonitoringScheduler(db_engine=db, workers=1, data_dir=str(tmp_path))
+
+    order = []
+    specs = [
+        ModelSpec("relaxed", ref_path, _write(curr, tmp_path / "a.csv"), interval_s=60, deadline_s=50),
+        ModelSpec("urgent", ref_path, _write(curr, tmp_path / "b.csv"), interval_s=60, priority=5),
+        ModelSpec("tight", ref_path, _write(curr, tmp_path / "c.csv"), interval_s=60, deadline_s=5,
+                  features={"age": {"weight": 7.0}}, thresholds={"retrain": 99}, version="v2.1"),
+    ]
+    for spec in specs:
+        scheduler.register(spec)
+        model = scheduler._models[spec.model_id]
+        run = model.analyzer.run_analysis
+        model.analyzer.run_analysis = lambda *a, _id=spec.model_id, _run=run, **k: (order.append(_id), _run(*a, **k))[1]
+    _drain(scheduler)
+
+    assert order == ["urgent", "tight", "relaxed"]
+    runs = dict(db.conn.execute("SELECT model_id, count(*) FROM run_history GROUP BY model_id").fetchall())
+    assert runs == {"urgent": 1, "tight": 1, "relaxed": 1}
+
+    tight = scheduler.get("tight")
+    assert tight["checks"]["analysed"] == 1 and tight["lag_s"]["last"] >= 0
+    assert tight["last_result"]["meta"]["version"] == "v2.1" and tight["last_result"]["rows"] == 1500
+    assert {row["feature"]: row["weight"] for row in tight["last_result"]["leaderboard"]}.get("age") == 7.0
+    assert scheduler._models["tight"].analyzer.thresholds["retrain"] == 99
+
+    # Nothing new: a manual check finds the file unchanged and is not logged
+    assert scheduler.check_now("tight") and not scheduler.check_now("missing")
+    _drain(scheduler)
+    assert scheduler.get("tight")["checks"]["unchanged"] == 1
+    assert db.conn.execute("SELECT count(*) FROM run_history").fetchone()[0] == 3
+    stats = scheduler.stats()
+    assert stats["models"] == 3 and stats["checks_per_minute"] == pytest.approx(4 * 60 / 300)
+    scheduler.stop()
+
+
+def test_directory_sources_drain_one_file_per_check(tmp_path):
+    ref, curr = drift_pair("adult_census", 500, seed=2)
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    scheduler = MonitoringScheduler(workers=2, data_dir=str(tmp_path))
+    scheduler.register(ModelSpec("batches", _write(ref, tmp_path / "ref.csv"), str(incoming), interval_s=3600))
+
+    for i in range(3):
+        _write(curr, incoming / f"part-{i}.csv", age=30 - i)
+    _write(curr, incoming / "late.csv", age=0)  # Still settling: left for a later check
+    (incoming / "notes.txt").write_text("ignored")
+    _drain(scheduler)
+
+    model = scheduler.get("batches")
+    assert model["checks"] == {"analysed": 3, "unchanged": 0, "failed": 0}
+    assert model["last_result"]["file"].endswith("part-2.csv") and model["due_in_s"] > 3000
+    scheduler.stop()
+
+
+def test_registration_is_validated(tmp_path):
+    ref, _ = drift_pair("adult_census", 200)
+    ref_path = _write(ref, tmp_path / "ref.csv")
+    scheduler = MonitoringScheduler(data_dir=str(tmp_path / "data"))
+    with pytest.raises(ValueError, match="SCHEDULER_DATA_DIR"):
+        scheduler.register(ModelSpec("m", ref_path, ref_path))
+    with pytest.raises(ValueError, match="Unknown thresholds"):
+        ModelSpec("m", ref_path, ref_path, thresholds={"retrian": 10})
+    with pytest.raises(ValueError):
+        ModelSpec("m", ref_path, ref_path, interval_s=0)
+    scheduler.stop()
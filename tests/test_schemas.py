@@ -0,0 +1,36 @@
+import pandas as pd
+
+from app.core.schemas import ADULT_CENSUS_CONTRACT, validate_dataframe
+
+
+def _rows(n=300):
+    return pd.DataFrame({
+        "age": [30] * n, "workclass": ["Private"] * n, "fnlwgt": [1000] * n, "education": ["HS-grad"] * n,
+        "education-num": [9] * n, "marital-status": ["Never-married"] * n, "occupation": ["Sales"] * n,
+        "relationship": ["Own-child"] * n, "race": ["White"] * n, "sex": ["Male"] * n,
+        "capital-gain": [0] * n, "capital-loss": [0] * n, "hours-per-week": [40] * n,
+        "native-country": ["United-States"] * n, "class": ["<=50K"] * n,
+    })
+
+
+def test_clean_frame_passes():
+    assert validate_dataframe(_rows()) == (True, None)
+
+
+def test_violations_beyond_first_100_rows_are_caught():
+    df = _rows()
+    df.loc[250, "age"] = 12
+    df.loc[[260, 270], "class"] = "unknown"
+    report = ADULT_CENSUS_CONTRACT.check(df)
+    assert report.violations["age"]["rows"] == [250]
+    assert report.violations["class"]["count"] == 2
+
+
+def test_chunked_validation_reports_global_row_numbers():
+    df = _rows()
+    df.loc[210, "hours-per-week"] = 0
+    validator = ADULT_CENSUS_CONTRACT.streaming()
+    for offset in range(0, len(df), 100):
+        validator(df.iloc[offset:offset + 100], offset)
+    assert validator.report.violations["hours-per-week"]["rows"] == [210]
+    assert validator.report.n_rows == 300
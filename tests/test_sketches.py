@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp
+
+from app.core.approx_drift import ApproxDriftEngine
+from app.core.native_drift import NativeDriftEngine
+from app.core.profile import ReferenceProfile
+from app.core.sketches import DatasetSketch, FrequencySketch, KLLSketch
+
+
+def test_kll_rank_error_within_bound_after_chunked_updates_and_merges():
+    rng = np.random.default_rng(11)
+    values = rng.lognormal(size=300_000)
+    parts = [KLLSketch(seed=i).update(values[i:i + 40_000]) for i in range(0, len(values), 40_000)]
+    sketch = parts[0]
+    for part in parts[1:]:
+        sketch.merge(part)
+
+    queries = np.quantile(values, np.linspace(0, 1, 201))
+    truth = np.searchsorted(np.sort(values), queries, side="right") / len(values)
+    assert np.abs(sketch.cdf(queries) - truth).max() <= sketch.rank_error
+    assert sketch.n == len(values) and sketch.size < 1000
+
+
+def test_frequency_sketch_undercounts_by_at_most_error_bound():
+    rng = np.random.default_rng(12)
+    values = pd.Series(rng.zipf(1.5, 100_000).astype(str))
+    left, right = FrequencySketch(capacity=50), FrequencySketch(capacity=50)
+    left.update(values[:60_000])
+    right.update(values[60_000:])
+    merged = left.merge(right)
+
+    exact = values.value_counts()
+    est = merged.counts.reindex(exact.index, fill_value=0)
+    assert (est <= exact).all()
+    assert (exact - est).max() <= merged.error_bound
+
+
+def test_approx_intervals_cover_exact_scores_and_survive_serialization():
+    rng = np.random.default_rng(13)
+    n = 40_000
+    ref = pd.DataFrame({"age": rng.integers(17, 90, n), "sex": rng.choice(["Male", "Female"], n, p=[0.6, 0.4])})
+    curr = pd.DataFrame({"age": rng.integers(20, 95, n), "sex": rng.choice(["Male", "Female"], n, p=[0.5, 0.5])})
+
+    shards = [DatasetSketch().update(curr.iloc[i:i + 10_000]).to_dict() for i in range(0, n, 10_000)]
+    curr_sketch = DatasetSketch.from_dict(json.loads(json.dumps(shards[0])))
+    for shard in shards[1:]:
+        curr_sketch.merge(DatasetSketch.from_dict(json.loads(json.dumps(shard))))
+
+    approx = ApproxDriftEngine().run(DatasetSketch().update(ref), curr_sketch)["drift_by_columns"]
+    exact = NativeDriftEngine().run(ReferenceProfile.build(ref), curr)["drift_by_columns"]
+    for col in ["age", "sex"]:
+        lo, hi = approx[col]["drift_score_interval"]
+        assert lo <= exact[col]["drift_score"] <= hi
+        assert approx[col]["drift_detected"] == exact[col]["drift_detected"]
+
+    # Small samples are kept whole: the KS p-value is ks_2samp's, exact because max(n1, n2) <= KS_EXACT_MAX_N
+    ref, curr = pd.DataFrame({"x": rng.normal(0, 1, 60)}), pd.DataFrame({"x": rng.normal(0.5, 1, 90)})
+    small = ApproxDriftEngine().run(DatasetSketch().update(ref), DatasetSketch().update(curr))["drift_by_columns"]["x"]
+    assert small["stattest_name"] == "K-S p_value" and np.isclose(small["drift_score"], ks_2samp(ref["x"], curr["x"]).pvalue)
@@ -0,0 +1,52 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from app.core.analyst_store import AnalystStore
+from app.core.database import DatabaseEngine
+from app.core.sql_runner import CursorExpired, normalize_query
+
+
+def test_pages_are_cached_until_a_table_read_changes(tmp_path):
+    db = DatabaseEngine(path=str(tmp_path / "state.db"))
+    store = AnalystStore(db, root=str(tmp_path / "analyst"))
+    store.publish("current_table", pd.DataFrame({"a": range(25)})).result()
+
+    query = "SELECT a FROM current_table ORDER BY a"
+    first = db.sql.run(query, page_size=10)
+    assert [r["a"] for r in first["data"]] == list(range(10)) and not first["cached"]
+    second = db.sql.run(f"  {query} -- same query\n;", cursor=first["next_cursor"], page_size=10)
+    assert second["cached"] and second["data"][0] == {"a": 10}
+
+    # Appending to run_history bumps its version only
+    history = "SELECT count(*) AS n FROM run_history"
+    assert db.sql.run(history)["data"] == [{"n": 0}]
+    db.log_run(0.1, 0.2, 3.0, {"action": "NO ACTION"})
+    assert db.sql.run(history) == {"columns": ["n"], "data": [{"n": 1}], "next_cursor": None, "truncated": False, "cached": False}
+    assert db.sql.run(query)["cached"]
+
+    # A new upload invalidates the results and the cursors issued for the old data
+    store.publish("current_table", pd.DataFrame({"a": range(5)})).result()
+    with pytest.raises(CursorExpired):
+        db.sql.run(query, cursor=first["next_cursor"])
+    assert len(db.sql.run(query)["data"]) == 5
+    assert not db.sql.run("SELECT random() AS r")["cached"] and not db.sql.run("SELECT random() AS r")["cached"]
+
+
+def test_limits_truncate_and_time_out(tmp_path):
+    db = DatabaseEngine(path=str(tmp_path / "state.db"))
+    db.sql.max_rows, db.sql.timeout_s = 100, 0.2
+    endless = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+
+    capped = db.sql.run(endless + "SELECT x FROM c", page_size=1000)
+    assert capped["truncated"] and len(capped["data"]) == 100 and capped["next_cursor"] is None
+    with pytest.raises(sqlite3.OperationalError, match="time limit"):
+        db.sql.run(endless + "SELECT count(*) FROM c")
+
+    lines = "".join(db.sql.stream(endless + "SELECT x FROM c", max_rows=2500)).splitlines()
+    assert len(lines) == 2501 and '"truncated": true' in lines[-1]
+
+
+def test_normalize_query_keeps_literals():
+    assert normalize_query("SELECT  'a  --b',\n\"X  y\" /* c */ FROM t -- hi\n;") == "SELECT 'a  --b', \"X  y\" FROM t"
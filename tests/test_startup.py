@@ -0,0 +1,39 @@
+import subprocess
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core import services as services_module
+from app.core.services import Services
+from app.main import app
+
+
+def test_importing_the_app_loads_no_heavy_dependency():
+    code = "import sys, app.main; print(sorted(m for m in ('pandas', 'numpy', 'scipy', 'evidently') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_ready_waits_for_the_warm_up_while_health_answers():
+    with TestClient(app) as client:
+        assert client.get("/api/health").json() == {"status": "ok"}
+        deadline = time.monotonic() + 60
+        while (response := client.get("/api/ready")).status_code == 503 and time.monotonic() < deadline:
+            assert response.json()["status"] == "warming_up"
+            time.sleep(0.05)
+        assert response.status_code == 200
+        assert {"import scipy.stats", "build db", "build job_queue"} <= set(response.json()["warmup_seconds"])
+
+
+def test_engines_are_built_once_on_first_use_and_warm_up_failures_are_reported(monkeypatch):
+    services = Services()
+    assert services.peek("profile_cache") is None
+    cache = services.profile_cache
+    assert services.profile_cache is cache and services.peek("profile_cache") is cache
+    services.reset()
+    assert services.peek("profile_cache") is None
+
+    monkeypatch.setattr(services_module, "WARMUP_MODULES", ["app.core.no_such_module"])
+    services.warm_up()
+    assert services.ready.is_set() and "ModuleNotFoundError" in services.warmup_error